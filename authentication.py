@@ -1,12 +1,17 @@
+import collections
 import datetime
+import hashlib
+import threading
+import time
 from enum import Enum
-from typing import Optional, Mapping
+from typing import Optional, Mapping, Union
 
 import jwt
 import sqlalchemy.orm
 
 import configuration
 import db_calls
+import models
 
 
 class TokenType(Enum):
@@ -19,6 +24,15 @@ class TokenType(Enum):
     PASSWORD_RECOVERY = 6
 
 
+# The payloads of the verified tokens, by the digest of the token, from the least to the most recently used
+token_payload_cache: 'collections.OrderedDict[str, Mapping]' = collections.OrderedDict()
+token_payload_cache_lock = threading.Lock()
+
+# The refresh tokens found in the DB, by the digest of the token, with when the result expires
+refresh_token_cache: 'collections.OrderedDict[str, float]' = collections.OrderedDict()
+refresh_token_cache_lock = threading.Lock()
+
+
 def generate_token(user_id: int, token_type: TokenType, session: sqlalchemy.orm.Session = None,
                    payload_extra: dict = None) -> Optional[str]:
     """
@@ -96,6 +110,18 @@ def generate_change_token(user_id: int, token_type: TokenType, change_dict: dict
     return generate_token(user_id, token_type, payload_extra=change_dict)
 
 
+def get_access_token_claims(user: models.User) -> dict:
+    """
+    Get the claims with the settings of the user that are carried by the access tokens, so that the endpoints can use
+    them without querying the user.
+
+    :param user: the user.
+    :return: the dictionary with the claims.
+    """
+
+    return {'show_adult': user.show_adult, 'language': user.language}
+
+
 def generate_access_token(session: sqlalchemy.orm.Session, auth_token: bytes) -> (bool, Optional[bytes]):
     """
     Generate an access token, when the authentication token is valid.
@@ -108,12 +134,41 @@ def generate_access_token(session: sqlalchemy.orm.Session, auth_token: bytes) ->
 
     valid, user_id = validate_token(auth_token, TokenType.REFRESH, session)
 
-    if valid:
-        # This generate_token could only fail if the variables of the configuration had not been set
-        return True, generate_token(user_id, TokenType.ACCESS, session=session)
-    else:
+    if not valid:
+        return False, None
+
+    user = db_calls.get_user_id(session, user_id)
+
+    if user is None:
         return False, None
 
+    # This generate_token could only fail if the variables of the configuration had not been set
+    return True, generate_token(user_id, TokenType.ACCESS, session=session,
+                                payload_extra=get_access_token_claims(user))
+
+
+def refresh_access_token(session: sqlalchemy.orm.Session, access_token: bytes) -> Optional[str]:
+    """
+    Generate an access token with the claims of the user updated, keeping the expiration of the current one.
+
+    :param session: the db session.
+    :param access_token: the current access token.
+    :return: the new access token, or None if the current one is not valid.
+    """
+
+    payload = get_token_payload(access_token)
+
+    if payload is None or payload.get('type') != TokenType.ACCESS.name:
+        return None
+
+    user = db_calls.get_user_id(session, payload['user'])
+
+    if user is None:
+        return None
+
+    return generate_token(user.id, TokenType.ACCESS, payload_extra={**get_access_token_claims(user),
+                                                                    'exp': payload['exp']})
+
 
 def validate_token(token: bytes, token_type: TokenType, session: sqlalchemy.orm.Session = None) \
         -> (bool, Optional[str]):
@@ -138,18 +193,76 @@ def validate_token(token: bytes, token_type: TokenType, session: sqlalchemy.orm.
         return False, None
     else:
         # When it's an authentication token, it needs to be validated in the db
-        if token_type == TokenType.REFRESH:
-            token = db_calls.get_token(session, token)
-
-            if token is None:
-                return False, None
+        if token_type == TokenType.REFRESH and not is_refresh_token_registered(session, token):
+            return False, None
 
         return True, payload['user']
 
 
+def get_token_digest(token: Union[bytes, str]) -> str:
+    """
+    Get the digest of a token, used as the key of the caches.
+
+    :param token: the token.
+    :return: the digest of the token.
+    """
+
+    if isinstance(token, str):
+        token = token.encode()
+
+    return hashlib.sha256(token).hexdigest()
+
+
+def is_refresh_token_registered(session: sqlalchemy.orm.Session, token: bytes) -> bool:
+    """
+    Check whether a refresh token is registered in the DB, reusing the recent checks of the same token.
+    Only the tokens found are cached, for configuration.refresh_token_cache_seconds, and logout invalidates them.
+
+    :param session: the db session.
+    :param token: the refresh token.
+    :return: whether the refresh token is registered.
+    """
+
+    digest = get_token_digest(token)
+    now = time.monotonic()
+
+    with refresh_token_cache_lock:
+        expiration = refresh_token_cache.get(digest)
+
+    if expiration is not None and expiration > now:
+        return True
+
+    if db_calls.get_token(session, token) is None:
+        return False
+
+    if configuration.token_cache_size > 0:
+        with refresh_token_cache_lock:
+            refresh_token_cache[digest] = now + configuration.refresh_token_cache_seconds
+            refresh_token_cache.move_to_end(digest)
+
+            while len(refresh_token_cache) > configuration.token_cache_size:
+                refresh_token_cache.popitem(last=False)
+
+    return True
+
+
+def invalidate_refresh_token(token: Union[bytes, str]):
+    """
+    Remove a refresh token from the caches, so that it is checked in the DB again.
+
+    :param token: the refresh token.
+    """
+
+    digest = get_token_digest(token)
+
+    with refresh_token_cache_lock:
+        refresh_token_cache.pop(digest, None)
+
+
 def get_token_payload(token: bytes) -> Optional[Mapping]:
     """
     Get the payload of the token.
+    The payloads of the tokens verified are cached, until the token expires.
 
     :param token: the token.
     :return: the value of that field or None.
@@ -160,14 +273,34 @@ def get_token_payload(token: bytes) -> Optional[Mapping]:
     if not token:
         return None
 
+    digest = get_token_digest(token)
+
+    with token_payload_cache_lock:
+        payload = token_payload_cache.get(digest)
+
+        if payload is not None:
+            if 'exp' not in payload or payload['exp'] > time.time():
+                token_payload_cache.move_to_end(digest)
+                return payload
+
+            del token_payload_cache[digest]
+
     try:
         payload = jwt.decode(token, configuration.secret_key, algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    if configuration.token_cache_size > 0:
+        with token_payload_cache_lock:
+            token_payload_cache[digest] = payload
+
+            while len(token_payload_cache) > configuration.token_cache_size:
+                token_payload_cache.popitem(last=False)
+
+    return payload
+
 
 def get_token_field(auth_token: bytes, field: str) -> any:
     """
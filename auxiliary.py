@@ -1,5 +1,7 @@
 import datetime
 import re
+import threading
+import time
 import unicodedata
 from typing import List
 
@@ -154,3 +156,50 @@ def search_chars(text: str, chars: List[str]) -> List[List[int]]:
                 break
 
     return search_result
+
+
+class TokenBucket:
+    """
+    A token bucket, that limits the rate of an operation shared by multiple threads.
+    The tokens are added at a constant rate, up to the capacity, and each operation takes one.
+    """
+
+    rate: float
+    capacity: float
+    tokens: float
+    last_update: float
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting until there is one available.
+
+        :return: the number of seconds waited.
+        """
+
+        if self.rate <= 0:
+            return 0
+
+        waited_seconds = 0
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+                self.last_update = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited_seconds
+
+                wait_seconds = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_seconds)
+            waited_seconds += wait_seconds
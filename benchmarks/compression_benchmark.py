@@ -0,0 +1,85 @@
+"""
+Benchmark of the bytes on the wire of the larger JSON responses, uncompressed and with each encoding.
+
+Run from the root of the repository with: python -m benchmarks.compression_benchmark
+"""
+
+import datetime
+import time
+
+import flask
+
+import auxiliary
+import compression
+import configuration
+import models
+import response_models
+
+# The number of repetitions of each compression, for the timings
+REPETITIONS = 20
+
+
+def build_local_shows_payload(nb_results: int) -> bytes:
+    """
+    Build a payload like the one of /local-shows, with sessions of a few shows.
+
+    :param nb_results: the number of results.
+    :return: the payload.
+    """
+
+    channel = models.Channel('TC', 'Test Channel')
+    results = []
+
+    for i in range(nb_results):
+        show_data = models.ShowData('show %d' % (i % 20), 'Show %d' % (i % 20))
+        show_data.is_movie = i % 3 == 0
+        show_data.year = 2000 + i % 20
+
+        show_session = models.ShowSession(1 + i % 5, 1 + i % 12,
+                                          datetime.datetime(2021, 3, 1) + datetime.timedelta(minutes=45 * i),
+                                          1, i % 20, audio_language='en')
+        show_session.id = i
+
+        result = response_models.LocalShowResult.create_from_show_session(show_session, channel, show_data)
+        result.match_reason = 'Name'
+
+        results.append(result)
+
+    # Serialize it as the endpoint does
+    with flask.Flask(__name__).app_context():
+        return flask.json.dumps({'show_list': auxiliary.list_to_json(results), 'show': {}}).encode()
+
+
+def main():
+    configuration.compression_min_size = 1024
+    configuration.compression_level = 6
+    configuration.brotli_quality = 5
+
+    encodings = ['gzip']
+
+    if compression.brotli is not None:
+        encodings.append('br')
+    else:
+        print('Brotli is not installed, only gzip is measured.\n')
+
+    print('%8s %12s %12s %14s %10s' % ('results', 'encoding', 'bytes', 'ratio', 'ms'))
+
+    for nb_results in [10, 100, 500, 2000]:
+        payload = build_local_shows_payload(nb_results)
+
+        print('%8d %12s %12d %14s %10s' % (nb_results, 'identity', len(payload), '1.00', '-'))
+
+        for encoding in encodings:
+            start_time = time.perf_counter()
+
+            for _ in range(REPETITIONS):
+                compressed_payload = compression.compress(payload, encoding)
+
+            elapsed_ms = (time.perf_counter() - start_time) * 1000 / REPETITIONS
+
+            print('%8d %12s %12d %14.2f %10.2f' % (nb_results, encoding, len(compressed_payload),
+                                                   len(payload) / len(compressed_payload), elapsed_ms))
+
+
+if __name__ == '__main__':
+    main()
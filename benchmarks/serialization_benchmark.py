@@ -0,0 +1,78 @@
+"""
+Microbenchmark of the serialization of lists of LocalShowResult, with to_dict and Flask and with the serialization
+module, using orjson when it is installed and the json module otherwise.
+
+Run from the root of the repository with: python -m benchmarks.serialization_benchmark
+"""
+
+import datetime
+import timeit
+import unittest.mock
+
+import flask
+
+import auxiliary
+import models
+import response_models
+import serialization
+
+# The number of repetitions of each serialization, for the timings
+REPETITIONS = 50
+
+
+def build_local_show_results(nb_results: int) -> [response_models.LocalShowResult]:
+    """
+    Build a list like the one of /local-shows, with sessions of a few shows.
+
+    :param nb_results: the number of results.
+    :return: the list of results.
+    """
+
+    channel = models.Channel('TC', 'Test Channel')
+    results = []
+
+    for i in range(nb_results):
+        show_data = models.ShowData('show %d' % (i % 20), 'Show %d' % (i % 20))
+        show_data.is_movie = i % 3 == 0
+        show_data.year = 2000 + i % 20
+
+        show_session = models.ShowSession(1 + i % 5, 1 + i % 12,
+                                          datetime.datetime(2021, 3, 1) + datetime.timedelta(minutes=45 * i),
+                                          1, i % 20, audio_language='en')
+        show_session.id = i
+
+        result = response_models.LocalShowResult.create_from_show_session(show_session, channel, show_data)
+        result.match_reason = 'Name'
+
+        results.append(result)
+
+    return results
+
+
+def main():
+    app = flask.Flask(__name__)
+
+    print('%8s %14s %14s %14s' % ('results', 'flask (ms)', 'json (ms)', 'orjson (ms)'))
+
+    for nb_results in [10, 100, 500, 2000]:
+        results = build_local_show_results(nb_results)
+
+        with app.app_context():
+            flask_ms = timeit.timeit(lambda: flask.json.dumps({'show_list': auxiliary.list_to_json(results)}),
+                                     number=REPETITIONS) * 1000 / REPETITIONS
+
+        with unittest.mock.patch('serialization.orjson', None):
+            json_ms = timeit.timeit(lambda: serialization.dumps({'show_list': results}),
+                                    number=REPETITIONS) * 1000 / REPETITIONS
+
+        if serialization.orjson is not None:
+            orjson_ms = '%.3f' % (timeit.timeit(lambda: serialization.dumps({'show_list': results}),
+                                                number=REPETITIONS) * 1000 / REPETITIONS)
+        else:
+            orjson_ms = 'not installed'
+
+        print('%8d %14.3f %14.3f %14s' % (nb_results, flask_ms, json_ms, orjson_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import gzip
+from typing import Optional
+
+import werkzeug.datastructures
+import werkzeug.wrappers
+
+import configuration
+
+# Brotli is used when it is installed, with gzip otherwise
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The types of the responses worth compressing
+COMPRESSIBLE_MIMETYPES = ['application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript']
+
+
+def get_encoding(accept_encodings: werkzeug.datastructures.Accept) -> Optional[str]:
+    """
+    Get the encoding to use in a response, from those accepted by the client.
+
+    :param accept_encodings: the encodings accepted by the client.
+    :return: the encoding, or None when the response should not be compressed.
+    """
+
+    if brotli is not None and accept_encodings.quality('br') > 0:
+        return 'br'
+
+    if accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compress the content of a response.
+
+    :param data: the content.
+    :param encoding: the encoding, br or gzip.
+    :return: the compressed content.
+    """
+
+    if encoding == 'br':
+        return brotli.compress(data, quality=configuration.brotli_quality)
+
+    return gzip.compress(data, compresslevel=configuration.compression_level)
+
+
+def should_compress(response: werkzeug.wrappers.Response) -> bool:
+    """
+    Check whether a response should be compressed, because it is large enough and it is not compressed yet.
+
+    :param response: the response.
+    :return: whether it should be compressed.
+    """
+
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+
+    return response.content_length is not None and response.content_length >= configuration.compression_min_size
+
+
+def encode_response(response: werkzeug.wrappers.Response, encoding: str, data: bytes = None):
+    """
+    Replace the content of a response with its compressed version.
+
+    :param response: the response.
+    :param encoding: the encoding, br or gzip.
+    :param data: the content already compressed, if available.
+    """
+
+    if data is None:
+        data = compress(response.get_data(), encoding)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+
+    # The compressed content is a different representation, which only matches the ETag on a weak comparison
+    etag, weak = response.get_etag()
+
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
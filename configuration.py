@@ -20,6 +20,7 @@ class AvailableLanguage(Enum):
 base_dir: str
 
 database_url: str
+pool_recycle: int
 Session: Any
 
 selected_epg: str
@@ -31,13 +32,24 @@ max_number_retries: int
 
 same_session_minutes: int
 
+alarms_event_driven: bool
+alarm_shards: int
+
+reminders_scheduler: bool
+reminders_scheduler_refresh_seconds: int
+
 tmdb_max_mb_pages: int
 omdb_key: str
 tmdb_key: str
+tmdb_requests_per_second: float
+tmdb_workers: int
+tmdb_refresh_hours: int
 trakt_key: str
 cache_validity_days: int
 
 bcrypt_rounds: int
+bcrypt_workers: int
+bcrypt_max_pending: int
 secret_key: Any
 VERIFICATION_TOKEN_VALIDITY_DAYS: int
 DELETION_TOKEN_VALIDITY_DAYS: int
@@ -45,6 +57,8 @@ CHANGE_EMAIL_TOKEN_VALIDITY_DAYS: int
 PASSWORD_RECOVERY_TOKEN_VALIDITY_DAYS: int
 REFRESH_TOKEN_VALIDITY_DAYS: int
 ACCESS_TOKEN_VALIDITY_HOURS: int
+token_cache_size: int
+refresh_token_cache_seconds: int
 
 google_client_id: Any
 
@@ -52,6 +66,16 @@ email_domain: str
 email_account: str
 email_user: str
 email_password: str
+email_batch_size: int
+email_batch_interval: float
+email_connections: int
+email_debug: bool
+email_outbox: bool
+email_outbox_batch_size: int
+email_outbox_max_attempts: int
+email_mx_cache_seconds: int
+email_mx_negative_cache_seconds: int
+email_mx_cache_size: int
 
 application_name: str
 application_link: str
@@ -61,6 +85,12 @@ score_highlight_counter: int
 new_highlight_counter: int
 minimum_number_votes: int
 
+response_cache_size: int
+response_cache_max_age: int
+compression_min_size: int
+compression_level: int
+brotli_quality: int
+
 
 def initialize():
     """ Initialize this module, preparing all of the variables. """
@@ -73,13 +103,13 @@ def initialize():
     # endregion
 
     # region Database
-    global database_url, Session
+    global database_url, pool_recycle, Session
 
     # Get the database url saved in the environment variable
     database_url = os.environ.get('DATABASE_URL', None)
 
     # Get the database pool recycle
-    pool_recycle = os.environ.get('DB_POOl_RECYCLE', 280)
+    pool_recycle = int(os.environ.get('DB_POOl_RECYCLE', 280))
 
     if database_url is None:
         print('Warning: Unable to find database url!')
@@ -154,8 +184,31 @@ def initialize():
 
     # endregion
 
+    # region Alarms
+    global alarms_event_driven, alarm_shards
+
+    # Whether the alarms are processed incrementally from the events of new sessions, instead of in a daily scan
+    alarms_event_driven = os.environ.get('ALARMS_EVENT_DRIVEN', 'False') == 'True'
+
+    # Number of worker processes among which the alarms are partitioned, by user, in the daily scan
+    alarm_shards = int(os.environ.get('ALARM_SHARDS', 1))
+
+    # endregion
+
+    # region Reminders
+    global reminders_scheduler, reminders_scheduler_refresh_seconds
+
+    # Whether the reminders are sent by the reminder scheduler, instead of in the hourly tasks
+    reminders_scheduler = os.environ.get('REMINDERS_SCHEDULER', 'False') == 'True'
+
+    # Maximum number of seconds between the checks of the scheduler for changes in the reminders
+    reminders_scheduler_refresh_seconds = int(os.environ.get('REMINDERS_SCHEDULER_REFRESH_SECONDS', 60))
+
+    # endregion
+
     # region Shows Information Services
-    global trakt_key, cache_validity_days, omdb_key, tmdb_key, tmdb_max_mb_pages
+    global trakt_key, cache_validity_days, omdb_key, tmdb_key, tmdb_max_mb_pages, tmdb_requests_per_second, \
+        tmdb_workers, tmdb_refresh_hours
 
     # Get the api key for trakt
     trakt_key = os.environ.get('TRAKT_KEY', None)
@@ -194,12 +247,22 @@ def initialize():
         # Set 2 pages as the default value
         tmdb_max_mb_pages = 2
 
+    # Maximum number of requests per second made to TMDB, within its limit of around 50 per second, 0 for no limit
+    tmdb_requests_per_second = float(os.environ.get('TMDB_REQUESTS_PER_SECOND', 40))
+
+    # Maximum number of requests made to TMDB concurrently
+    tmdb_workers = int(os.environ.get('TMDB_WORKERS', 8))
+
+    # Number of hours after which the details of a show are requested again to TMDB, when updating the highlights
+    tmdb_refresh_hours = int(os.environ.get('TMDB_REFRESH_HOURS', 24))
+
     # endregion
 
     # region Information Security
-    global bcrypt_rounds, secret_key, REFRESH_TOKEN_VALIDITY_DAYS, ACCESS_TOKEN_VALIDITY_HOURS, \
-        VERIFICATION_TOKEN_VALIDITY_DAYS, DELETION_TOKEN_VALIDITY_DAYS, CHANGE_EMAIL_TOKEN_VALIDITY_DAYS, \
-        PASSWORD_RECOVERY_TOKEN_VALIDITY_DAYS
+    global bcrypt_rounds, bcrypt_workers, bcrypt_max_pending, secret_key, REFRESH_TOKEN_VALIDITY_DAYS, \
+        ACCESS_TOKEN_VALIDITY_HOURS, VERIFICATION_TOKEN_VALIDITY_DAYS, DELETION_TOKEN_VALIDITY_DAYS, \
+        CHANGE_EMAIL_TOKEN_VALIDITY_DAYS, PASSWORD_RECOVERY_TOKEN_VALIDITY_DAYS, token_cache_size, \
+        refresh_token_cache_seconds
 
     # Get the configuration for the number of rounds used in the bcrypt
     bcrypt_rounds = os.environ.get('BCRYPT_ROUNDS', None)
@@ -207,6 +270,12 @@ def initialize():
     if bcrypt_rounds is None:
         bcrypt_rounds = 10
 
+    # Number of processes in which the passwords are hashed and verified, 0 runs them in the thread of the request
+    bcrypt_workers = int(os.environ.get('BCRYPT_WORKERS', 2))
+
+    # Maximum number of hashes submitted to the processes at once, the requests above it wait for their turn
+    bcrypt_max_pending = int(os.environ.get('BCRYPT_MAX_PENDING', 16))
+
     # Get the secret key used to generate tokens
     secret_key = os.environ.get('SECRET_KEY', None)
 
@@ -222,6 +291,12 @@ def initialize():
     CHANGE_EMAIL_TOKEN_VALIDITY_DAYS = 2
     PASSWORD_RECOVERY_TOKEN_VALIDITY_DAYS = 2
 
+    # Maximum number of verified tokens whose payload is cached, 0 disables the cache
+    token_cache_size = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+
+    # Number of seconds for which a refresh token found in the DB is considered valid without checking it again
+    refresh_token_cache_seconds = int(os.environ.get('REFRESH_TOKEN_CACHE_SECONDS', 60))
+
     # endregion
 
     # region External Login
@@ -238,13 +313,43 @@ def initialize():
     # endregion
 
     # region Email
-    global email_domain, email_account, email_user, email_password
+    global email_domain, email_account, email_user, email_password, email_batch_size, email_batch_interval, \
+        email_connections, email_debug, email_outbox, email_outbox_batch_size, email_outbox_max_attempts, \
+        email_mx_cache_seconds, email_mx_negative_cache_seconds, email_mx_cache_size
 
     email_domain = os.environ.get('EMAIL_DOMAIN', None)
     email_account = os.environ.get('EMAIL_ACCOUNT', None)
     email_user = os.environ.get('EMAIL_USER', None)
     email_password = os.environ.get('EMAIL_PASSWORD', None)
 
+    # Maximum number of emails sent through the same connection, when sending in bulk
+    email_batch_size = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+
+    # Number of seconds to wait between batches, to stay within the limits of the provider
+    email_batch_interval = float(os.environ.get('EMAIL_BATCH_INTERVAL', 1))
+
+    # Maximum number of connections used in parallel, which are kept open to be reused
+    email_connections = int(os.environ.get('EMAIL_CONNECTIONS', 1))
+
+    # Whether the emails are kept in memory by a local stand-in of the SMTP server, instead of being sent
+    email_debug = os.environ.get('EMAIL_DEBUG', 'False') == 'True'
+
+    # Whether the emails are added to the outbox, to be sent by the outbox worker, instead of being sent right away
+    email_outbox = os.environ.get('EMAIL_OUTBOX', 'False') == 'True'
+
+    # Maximum number of emails taken from the outbox at once by a worker
+    email_outbox_batch_size = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 100))
+
+    # Number of failed attempts after which an email in the outbox is no longer retried
+    email_outbox_max_attempts = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+
+    # Number of seconds for which the verification of the domain of an email is cached, when valid and when invalid
+    email_mx_cache_seconds = int(os.environ.get('EMAIL_MX_CACHE_SECONDS', 3600))
+    email_mx_negative_cache_seconds = int(os.environ.get('EMAIL_MX_NEGATIVE_CACHE_SECONDS', 300))
+
+    # Maximum number of domains whose verification is cached, 0 disables the cache
+    email_mx_cache_size = int(os.environ.get('EMAIL_MX_CACHE_SIZE', 4096))
+
     # endregion
 
     # region Highlights
@@ -267,3 +372,23 @@ def initialize():
     AVAILABLE_LANGUAGES = [item.value for item in AvailableLanguage]
 
     # endregion
+
+    # region Responses
+    global response_cache_size, response_cache_max_age, compression_min_size, compression_level, brotli_quality
+
+    # Maximum number of responses kept in memory, by endpoint and arguments, 0 to disable
+    response_cache_size = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+
+    # Number of seconds the clients and proxies can reuse a response without revalidating it
+    response_cache_max_age = int(os.environ.get('RESPONSE_CACHE_MAX_AGE', 60))
+
+    # Minimum number of bytes of a response for it to be compressed
+    compression_min_size = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+    # Level of the gzip compression, from 1 (fastest) to 9 (smallest)
+    compression_level = int(os.environ.get('COMPRESSION_LEVEL', 6))
+
+    # Quality of the brotli compression, when it is installed, from 0 (fastest) to 11 (smallest)
+    brotli_quality = int(os.environ.get('BROTLI_QUALITY', 5))
+
+    # endregion
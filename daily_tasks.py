@@ -40,10 +40,20 @@ def daily_tasks(db_session: sqlalchemy.orm.Session):
     print('Shows list updated!')
 
     # Search the shows for the existing alarms
-    # The date needs to be the day after because it is at 00:00
-    processing.process_alarms(db_session)
+    # When they are event driven, only the new sessions are processed, instead of scanning all updated sessions
+    if configuration.alarms_event_driven:
+        processing.process_alarm_events(db_session)
+    else:
+        processing.process_alarms(db_session)
+
     print('Alarms processed!')
 
+    # Move the shows of the older highlights to their own table
+    nb_migrated = processing.migrate_highlights_shows(db_session)
+
+    if nb_migrated > 0:
+        print('%d highlights migrated!' % nb_migrated)
+
     # Calculate the highlights
     processing.calculate_highlights(db_session)
     print('Highlights calculated!')
@@ -63,6 +73,7 @@ def main():
         raise
     finally:
         session.close()
+        process_emails.close_connections()
 
 
 if __name__ == '__main__':
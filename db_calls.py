@@ -1,5 +1,5 @@
 import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 
 import sqlalchemy.orm
 from sqlalchemy.exc import IntegrityError, InvalidRequestError
@@ -67,6 +67,27 @@ def delete_channel_show_data(session: sqlalchemy.orm.Session, channel_id: int) -
         return False
 
 
+def delete_new_session_events(session: sqlalchemy.orm.Session, event_ids: List[int]) -> bool:
+    """
+    Delete the NewSessionEvent entries with the corresponding ids.
+
+    :param session: the db session.
+    :param event_ids: the ids of the events.
+    :return: True if the operation was a success.
+    """
+
+    session.query(models.NewSessionEvent) \
+        .filter(models.NewSessionEvent.id.in_(event_ids)) \
+        .delete()
+
+    try:
+        session.commit()
+        return True
+    except (IntegrityError, InvalidRequestError):
+        session.rollback()
+        return False
+
+
 def delete_reminder(session: sqlalchemy.orm.Session, reminder_id: int, user_id: int) -> bool:
     """
     Delete the reminder with the corresponding id.
@@ -92,6 +113,27 @@ def delete_reminder(session: sqlalchemy.orm.Session, reminder_id: int, user_id:
     return True
 
 
+def delete_reminders(session: sqlalchemy.orm.Session, reminder_ids: List[int]) -> bool:
+    """
+    Delete the reminders with the corresponding ids, in a single operation.
+
+    :param session: the db session.
+    :param reminder_ids: the ids of the reminders.
+    :return: True if the operation was a success.
+    """
+
+    session.query(models.Reminder) \
+        .filter(models.Reminder.id.in_(reminder_ids)) \
+        .delete()
+
+    try:
+        session.commit()
+        return True
+    except (IntegrityError, InvalidRequestError):
+        session.rollback()
+        return False
+
+
 def delete_user_excluded_channel(session: sqlalchemy.orm.Session, channel_id: int) -> bool:
     """
     Delete all UserExcludedChannel entries for a given channel.
@@ -125,6 +167,37 @@ def get_alarms(session: sqlalchemy.orm.Session) -> List[models.Alarm]:
         .all()
 
 
+def get_alarms_shard(session: sqlalchemy.orm.Session, shard: int, nb_shards: int) -> List[models.Alarm]:
+    """
+    Get the alarms of a shard, with the alarms partitioned by user.
+
+    :param session: the db session.
+    :param shard: the number of the shard.
+    :param nb_shards: the total number of shards.
+    :return: the alarms of the shard.
+    """
+
+    return session.query(models.Alarm) \
+        .filter(models.Alarm.user_id % nb_shards == shard) \
+        .all()
+
+
+def get_alarms_shards_updates(session: sqlalchemy.orm.Session, nb_shards: int) -> Dict[int, datetime.datetime]:
+    """
+    Get the datetime of the last successful processing of each shard of the alarms.
+
+    :param session: the db session.
+    :param nb_shards: the total number of shards.
+    :return: the datetime of the last processing, by shard.
+    """
+
+    shards_updates = session.query(models.AlarmsShardUpdate) \
+        .filter(models.AlarmsShardUpdate.nb_shards == nb_shards) \
+        .all()
+
+    return {u.shard: u.alarms_datetime for u in shards_updates}
+
+
 def get_cache(session: sqlalchemy.orm.Session, key: str) -> Optional[models.Cache]:
     """
     Get an entry of Cache.
@@ -153,6 +226,41 @@ def get_cache(session: sqlalchemy.orm.Session, key: str) -> Optional[models.Cach
     return cache_entry
 
 
+def get_caches(session: sqlalchemy.orm.Session, keys: List[str]) -> Dict[str, models.Cache]:
+    """
+    Get the entries of Cache for multiple keys, with a single query.
+
+    :param session: the db session.
+    :param keys: the keys that represent the requests.
+    :return: the valid cache entries, by key.
+    """
+
+    if len(keys) == 0:
+        return dict()
+
+    cache_entries = session.query(models.Cache) \
+        .filter(models.Cache.key.in_(keys)) \
+        .all()
+
+    expiration_date = datetime.datetime.utcnow() - datetime.timedelta(days=configuration.cache_validity_days)
+
+    valid_entries = dict()
+    expired = False
+
+    for cache_entry in cache_entries:
+        if cache_entry.date_time < expiration_date:
+            session.delete(cache_entry)
+            expired = True
+        else:
+            valid_entries[cache_entry.key] = cache_entry
+
+    # Delete the expired entries, so that they can be registered again
+    if expired:
+        session.commit()
+
+    return valid_entries
+
+
 def get_channel_acronym(session: sqlalchemy.orm.Session, acronym: str) -> Optional[models.Channel]:
     """
     Get the channel with a given acronym.
@@ -207,6 +315,64 @@ def get_channel_name(session: sqlalchemy.orm.Session, name: str) -> Optional[mod
         .first()
 
 
+def get_data_generation(session: sqlalchemy.orm.Session) -> int:
+    """
+    Get the generation of the data, which changes whenever the shows or the channels change.
+
+    :param session: the db session.
+    :return: the generation of the data.
+    """
+
+    last_update = session.query(models.LastUpdate.data_generation) \
+        .first()
+
+    if last_update is None or last_update[0] is None:
+        return 0
+
+    return last_update[0]
+
+
+def get_due_reminders(session: sqlalchemy.orm.Session, below_datetime: datetime.datetime,
+                      max_anticipation_minutes: int) \
+        -> List[Tuple[models.Reminder, models.ShowSession, models.Channel, models.ShowData, models.User]]:
+    """
+    Get the reminders whose session, minus the anticipation, is before a given datetime, and all associated config.
+
+    :param session: the db session.
+    :param below_datetime: the datetime until which the reminders are due.
+    :param max_anticipation_minutes: the maximum anticipation of a reminder, used to limit the sessions searched.
+    :return: the due reminders, with the corresponding session, channel, show config and user.
+    """
+
+    return session.query(models.Reminder, models.ShowSession, models.Channel, models.ShowData, models.User) \
+        .join(models.ShowSession, models.Reminder.session_id == models.ShowSession.id) \
+        .join(models.Channel, models.ShowSession.channel_id == models.Channel.id) \
+        .join(models.ShowData, models.ShowSession.show_id == models.ShowData.id) \
+        .join(models.User, models.Reminder.user_id == models.User.id) \
+        .filter(models.ShowSession.date_time < below_datetime + datetime.timedelta(minutes=max_anticipation_minutes)) \
+        .filter(get_reminder_datetime_dbms() < below_datetime) \
+        .all()
+
+
+def get_email_outbox_batch(session: sqlalchemy.orm.Session, limit: int) -> List[models.EmailOutbox]:
+    """
+    Get a batch of the emails in the outbox whose next attempt is due, locking them for this session.
+    The emails locked by other sessions are skipped, so that multiple workers can drain the outbox.
+
+    :param session: the db session.
+    :param limit: the maximum number of emails.
+    :return: the batch of emails.
+    """
+
+    return session.query(models.EmailOutbox) \
+        .filter(models.EmailOutbox.dead.is_(False)) \
+        .filter(models.EmailOutbox.next_attempt_datetime <= datetime.datetime.utcnow()) \
+        .order_by(models.EmailOutbox.id) \
+        .limit(limit) \
+        .with_for_update(skip_locked=True) \
+        .all()
+
+
 def get_epg_channel_list(session: sqlalchemy.orm.Session) -> List[models.Channel]:
     """
     Get the complete list of channels that should be requested to the EPG.
@@ -220,29 +386,102 @@ def get_epg_channel_list(session: sqlalchemy.orm.Session) -> List[models.Channel
         .all()
 
 
-def get_highest_scored_shows_interval(session: sqlalchemy.orm.Session, start_datetime: datetime.datetime,
-                                      end_datetime: datetime.datetime, is_movie: bool) \
-        -> List[Tuple[int, int, int]]:
+def get_has_session_interval(session: sqlalchemy.orm.Session, start_datetime: datetime.datetime,
+                             end_datetime: datetime.datetime) -> sqlalchemy.sql.ColumnElement:
     """
-    Get the highest scored shows that have a session in the given interval.
+    Get the condition of a show having a session in the given interval, as an EXISTS over the show sessions.
 
     :param session: the db session.
     :param start_datetime: the start datetime.
     :param end_datetime: the end datetime.
-    :param is_movie: whether it is a movie.
-    :return: the list of shows (each represented by a tuple of the show id, the tmdb id and the vote average).
+    :return: the condition, to be used in a query of ShowData.
     """
 
-    return session.query(sqlalchemy.func.distinct(models.ShowSession.show_id), models.ShowData.tmdb_id,
-                         models.ShowData.tmdb_vote_average) \
-        .filter(models.ShowSession.show_id == models.ShowData.id) \
+    return session.query(models.ShowSession.id) \
         .filter(models.ShowSession.date_time >= start_datetime) \
         .filter(models.ShowSession.date_time <= end_datetime) \
-        .filter(models.ShowData.is_movie == is_movie) \
+        .filter(models.ShowSession.show_id == models.ShowData.id) \
+        .exists()
+
+
+def get_highest_scored_shows_interval(session: sqlalchemy.orm.Session, start_datetime: datetime.datetime,
+                                      end_datetime: datetime.datetime) -> List[Tuple[int, int, int]]:
+    """
+    Get the highest scored movies and tv shows that have a session in the given interval.
+    Both are ranked in the same query, with the limit applied to each of them.
+
+    :param session: the db session.
+    :param start_datetime: the start datetime.
+    :param end_datetime: the end datetime.
+    :return: the list of shows, the movies first, (each represented by a tuple of the show id, the tmdb id and the
+    vote average).
+    """
+
+    ranking = sqlalchemy.func.row_number() \
+        .over(partition_by=models.ShowData.is_movie,
+              order_by=(models.ShowData.tmdb_vote_average.desc(), models.ShowData.id)) \
+        .label('ranking')
+
+    ranked_shows = session.query(models.ShowData.id, models.ShowData.tmdb_id, models.ShowData.tmdb_vote_average,
+                                 models.ShowData.is_movie, ranking) \
+        .filter(get_has_session_interval(session, start_datetime, end_datetime)) \
         .filter(models.ShowData.tmdb_id.isnot(None)) \
+        .filter(models.ShowData.is_movie.isnot(None)) \
         .filter(models.ShowData.tmdb_vote_count > configuration.minimum_number_votes) \
-        .order_by(models.ShowData.tmdb_vote_average.desc()) \
-        .limit(configuration.score_highlight_counter) \
+        .subquery()
+
+    return session.query(ranked_shows.c.id, ranked_shows.c.tmdb_id, ranked_shows.c.tmdb_vote_average) \
+        .filter(ranked_shows.c.ranking <= configuration.score_highlight_counter) \
+        .order_by(ranked_shows.c.is_movie.desc(), ranked_shows.c.ranking) \
+        .all()
+
+
+def get_highlights_payload(session: sqlalchemy.orm.Session, year: int, week: int) \
+        -> Optional[models.HighlightsPayload]:
+    """
+    Get the stored response with the highlights of a given week.
+
+    :param session: the db session.
+    :param year: the year of interest.
+    :param week: the week of interest.
+    :return: the HighlightsPayload.
+    """
+
+    return session.query(models.HighlightsPayload) \
+        .filter(models.HighlightsPayload.year == year) \
+        .filter(models.HighlightsPayload.week == week) \
+        .first()
+
+
+def get_highlights_shows(session: sqlalchemy.orm.Session, highlight_ids: List[int]) -> List[models.HighlightShow]:
+    """
+    Get the shows of a list of highlights, in their order.
+
+    :param session: the db session.
+    :param highlight_ids: the ids of the highlights.
+    :return: the list of HighlightShow.
+    """
+
+    if len(highlight_ids) == 0:
+        return []
+
+    return session.query(models.HighlightShow) \
+        .filter(models.HighlightShow.highlight_id.in_(highlight_ids)) \
+        .order_by(models.HighlightShow.highlight_id, models.HighlightShow.position) \
+        .all()
+
+
+def get_highlights_without_shows(session: sqlalchemy.orm.Session) -> List[models.Highlights]:
+    """
+    Get the highlights without any entry in HighlightShow, which were registered before it existed.
+
+    :param session: the db session.
+    :return: the list of Highlights.
+    """
+
+    return session.query(models.Highlights) \
+        .outerjoin(models.HighlightShow, models.HighlightShow.highlight_id == models.Highlights.id) \
+        .filter(models.HighlightShow.id.is_(None)) \
         .all()
 
 
@@ -258,30 +497,50 @@ def get_last_update(session: sqlalchemy.orm.Session) -> Optional[models.LastUpda
         .first()
 
 
+def get_new_session_events(session: sqlalchemy.orm.Session) -> List[models.NewSessionEvent]:
+    """
+    Get all the events of new sessions, in order of insertion.
+
+    :param session: the db session.
+    :return: all the events of new sessions.
+    """
+
+    return session.query(models.NewSessionEvent) \
+        .order_by(models.NewSessionEvent.id) \
+        .all()
+
+
 def get_new_shows_interval(session: sqlalchemy.orm.Session, start_datetime: datetime.datetime,
-                           end_datetime: datetime.datetime, is_movie: bool) \
-        -> List[Tuple[int, int, datetime.date, int]]:
+                           end_datetime: datetime.datetime) -> List[Tuple[int, int, datetime.date, int]]:
     """
-    Get the new shows in the given interval.
+    Get the new movies and tv shows in the given interval.
+    Both are ranked in the same query, with the limit applied to each of them.
 
     :param session: the db session.
     :param start_datetime: the start datetime.
     :param end_datetime: the end datetime.
-    :param is_movie: whether or not it is a movie.
-    :return: the list of shows (each represented by a tuple of the show id, the tmdb id, the premiere date and the
-    season).
+    :return: the list of shows, the movies first, (each represented by a tuple of the show id, the tmdb id, the
+    premiere date and the season).
     """
 
-    return session.query(sqlalchemy.func.distinct(models.ShowSession.show_id), models.ShowData.tmdb_id,
-                         models.ShowData.premiere_date, models.ShowData.season_premiere) \
-        .filter(models.ShowSession.show_id == models.ShowData.id) \
-        .filter(models.ShowSession.date_time >= start_datetime) \
-        .filter(models.ShowSession.date_time <= end_datetime) \
-        .filter(models.ShowData.is_movie == is_movie) \
+    ranking = sqlalchemy.func.row_number() \
+        .over(partition_by=models.ShowData.is_movie,
+              order_by=(models.ShowData.premiere_date, models.ShowData.id)) \
+        .label('ranking')
+
+    ranked_shows = session.query(models.ShowData.id, models.ShowData.tmdb_id, models.ShowData.premiere_date,
+                                 models.ShowData.season_premiere, models.ShowData.is_movie, ranking) \
+        .filter(get_has_session_interval(session, start_datetime, end_datetime)) \
         .filter(models.ShowData.tmdb_id.isnot(None)) \
+        .filter(models.ShowData.is_movie.isnot(None)) \
         .filter(models.ShowData.premiere_date >= start_datetime) \
         .filter(models.ShowData.premiere_date <= end_datetime) \
-        .limit(configuration.new_highlight_counter) \
+        .subquery()
+
+    return session.query(ranked_shows.c.id, ranked_shows.c.tmdb_id, ranked_shows.c.premiere_date,
+                         ranked_shows.c.season_premiere) \
+        .filter(ranked_shows.c.ranking <= configuration.new_highlight_counter) \
+        .order_by(ranked_shows.c.is_movie.desc(), ranked_shows.c.ranking) \
         .all()
 
 
@@ -298,6 +557,22 @@ def get_regex_operation_dbms() -> str:
         return '~*'
 
 
+def get_reminder_datetime_dbms() -> sqlalchemy.sql.ColumnElement:
+    """
+    Get the expression of the datetime of a reminder, the datetime of the session minus the anticipation,
+    based on the current DBMS.
+
+    :return: the expression of the datetime of a reminder.
+    """
+
+    if 'mysql' in configuration.database_url:
+        return sqlalchemy.func.timestampadd(sqlalchemy.text('MINUTE'), -models.Reminder.anticipation_minutes,
+                                            models.ShowSession.date_time)
+    else:
+        return models.ShowSession.date_time - sqlalchemy.func.make_interval(
+            0, 0, 0, 0, 0, models.Reminder.anticipation_minutes)
+
+
 def get_reminder_id_user(session: sqlalchemy.orm.Session, reminder_id: int, user_id: int) -> models.Reminder:
     """
     Get the reminder with the given id, if it is the correct user.
@@ -340,32 +615,47 @@ def get_reminders_session(session: sqlalchemy.orm.Session, session_id: int) -> L
         .all()
 
 
-# TODO: IT ISN'T A TUPLE, BUT A sqlalchemy._util._collections.result
-def get_reminders_user(session: sqlalchemy.orm.Session, user_id: int) -> List[models.Reminder]:
+def get_reminders_user_complete(session: sqlalchemy.orm.Session, user_id: int) -> List[sqlalchemy.engine.Row]:
     """
-    Get a list of reminders for the user who's id is user_id.
+    Get the list of reminders of a user, with the information of the corresponding session, channel and show,
+    in a single query with only the columns needed for the responses.
 
     :param session: the db session.
     :param user_id: the id of the user.
-    :return: a list of reminders for the user who's id is user_id.
+    :return: the list of reminders, with the columns labeled with the fields of the responses.
     """
 
-    return session.query(models.Reminder) \
+    return session.query(models.Reminder.id, models.Reminder.anticipation_minutes, models.Reminder.session_id,
+                         models.ShowData.portuguese_title.label('title'), models.ShowSession.season,
+                         models.ShowSession.episode, models.ShowSession.date_time,
+                         models.Channel.name.label('channel_name')) \
+        .join(models.ShowSession, models.Reminder.session_id == models.ShowSession.id) \
+        .join(models.Channel, models.ShowSession.channel_id == models.Channel.id) \
+        .join(models.ShowData, models.ShowSession.show_id == models.ShowData.id) \
         .filter(models.Reminder.user_id == user_id) \
         .all()
 
 
-def get_sessions_reminders(session: sqlalchemy.orm.Session) -> List[Tuple[models.Reminder, models.ShowSession]]:
+def get_reminders_updated(session: sqlalchemy.orm.Session, below_datetime: Optional[datetime.datetime] = None) \
+        -> List[Tuple[models.Reminder, models.ShowSession]]:
     """
-    Get all reminders and the corresponding sessions.
+    Get the reminders of future sessions, and the corresponding sessions, where either was updated after a given
+    datetime.
 
     :param session: the db session.
-    :return: all reminders and the corresponding sessions.
+    :param below_datetime: a datetime below to limit the search, or None for all reminders.
+    :return: the updated reminders and the corresponding sessions.
     """
 
-    return session.query(models.Reminder, models.ShowSession) \
-        .filter(models.Reminder.session_id == models.ShowSession.id) \
-        .all()
+    query = session.query(models.Reminder, models.ShowSession) \
+        .join(models.ShowSession, models.Reminder.session_id == models.ShowSession.id) \
+        .filter(models.ShowSession.date_time > datetime.datetime.utcnow())
+
+    if below_datetime is not None:
+        query = query.filter(sqlalchemy.or_(models.Reminder.update_timestamp > below_datetime,
+                                            models.ShowSession.update_timestamp > below_datetime))
+
+    return query.all()
 
 
 def get_show_data_by_tmdb_id(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: bool) \
@@ -399,6 +689,39 @@ def get_show_data_id(session: sqlalchemy.orm.Session, show_data_id: int) -> Opti
         .first()
 
 
+def get_show_data_ids(session: sqlalchemy.orm.Session, show_data_ids: List[int]) -> List[models.ShowData]:
+    """
+    Get the ShowData with the given ids, with a single query.
+
+    :param session: the db session.
+    :param show_data_ids: the ids of the ShowData.
+    :return: the list of ShowData.
+    """
+
+    if len(show_data_ids) == 0:
+        return []
+
+    return session.query(models.ShowData) \
+        .filter(models.ShowData.id.in_(show_data_ids)) \
+        .all()
+
+
+def get_show_highlights(session: sqlalchemy.orm.Session, show_id: int) -> List[models.Highlights]:
+    """
+    Get the highlights that featured a show, which correspond to the weeks in which it was highlighted.
+
+    :param session: the db session.
+    :param show_id: the id of the ShowData.
+    :return: the list of Highlights, by week.
+    """
+
+    return session.query(models.Highlights) \
+        .join(models.HighlightShow, models.HighlightShow.highlight_id == models.Highlights.id) \
+        .filter(models.HighlightShow.show_id == show_id) \
+        .order_by(models.Highlights.year, models.Highlights.week, models.Highlights.key) \
+        .all()
+
+
 def get_show_session(session: sqlalchemy.orm.Session, show_id: int) -> Optional[models.ShowSession]:
     """
     Get the show session with a given id.
@@ -500,6 +823,23 @@ def get_shows_interval(session: sqlalchemy.orm.Session, start_datetime: datetime
         .all()
 
 
+def get_shows_titles(session: sqlalchemy.orm.Session, tmdb_ids: List[int]) -> List[models.ShowTitles]:
+    """
+    Get the titles stored in the DB for a list of tmdb ids, regardless of their validity.
+
+    :param session: the db session.
+    :param tmdb_ids: the tmdb ids of the shows.
+    :return: the titles of the shows.
+    """
+
+    if len(tmdb_ids) == 0:
+        return []
+
+    return session.query(models.ShowTitles) \
+        .filter(models.ShowTitles.tmdb_id.in_(tmdb_ids)) \
+        .all()
+
+
 def get_streaming_service_id(session: sqlalchemy.orm.Session, ss_id: int) -> Optional[models.StreamingService]:
     """
     Get the streaming service with a given id.
@@ -600,6 +940,35 @@ def get_user_id(session: sqlalchemy.orm.Session, user_id: int) -> Optional[model
         .first()
 
 
+def get_users_excluded_channels(session: sqlalchemy.orm.Session, user_ids: List[int]) \
+        -> List[models.UserExcludedChannel]:
+    """
+    Get the excluded channels of a set of users.
+
+    :param session: the db session.
+    :param user_ids: the ids of the users.
+    :return: the list of excluded channels.
+    """
+
+    return session.query(models.UserExcludedChannel) \
+        .filter(models.UserExcludedChannel.user_id.in_(user_ids)) \
+        .all()
+
+
+def get_users_ids(session: sqlalchemy.orm.Session, user_ids: List[int]) -> List[models.User]:
+    """
+    Get the users with the given ids.
+
+    :param session: the db session.
+    :param user_ids: the ids of the users.
+    :return: the list of users.
+    """
+
+    return session.query(models.User) \
+        .filter(models.User.id.in_(user_ids)) \
+        .all()
+
+
 def get_week_highlights(session: sqlalchemy.orm.Session, key: models.HighlightsType, year: int, week: int) \
         -> Optional[models.Highlights]:
     """
@@ -619,6 +988,35 @@ def get_week_highlights(session: sqlalchemy.orm.Session, key: models.HighlightsT
         .first()
 
 
+def increment_data_generation(session: sqlalchemy.orm.Session) -> int:
+    """
+    Increment the generation of the data, after a change to the shows or the channels has been committed.
+
+    :param session: the db session.
+    :return: the new generation of the data.
+    """
+
+    last_update = get_last_update(session)
+
+    # If this is the first update set yesterday's date as the last update, as it is done with the EPG
+    if last_update is None:
+        last_update = models.LastUpdate(datetime.date.today() - datetime.timedelta(days=1),
+                                        datetime.datetime.utcnow())
+
+        session.add(last_update)
+        session.flush()
+
+    # Increment it in the DB, so that concurrent increments are not lost
+    session.query(models.LastUpdate) \
+        .filter(models.LastUpdate.id == last_update.id) \
+        .update({models.LastUpdate.data_generation: sqlalchemy.func.coalesce(models.LastUpdate.data_generation, 0)
+                 + 1}, synchronize_session=False)
+
+    session.commit()
+
+    return last_update.data_generation
+
+
 def insert_if_missing_show_data(session: sqlalchemy.orm.Session, localized_title: str, original_title: str = None,
                                 duration: int = None, synopsis: str = None, year: int = None, genre: str = None,
                                 directors: List[str] = None, cast: str = None, audio_languages: str = None,
@@ -720,6 +1118,37 @@ def register_alarm(session: sqlalchemy.orm.Session, show_name: str, trakt_id: in
         return None
 
 
+def register_alarms_shard_update(session: sqlalchemy.orm.Session, nb_shards: int, shard: int,
+                                 alarms_datetime: datetime.datetime) -> Optional[models.AlarmsShardUpdate]:
+    """
+    Register the datetime of the last successful processing of a shard of the alarms, replacing the existing one.
+
+    :param session: the db session.
+    :param nb_shards: the total number of shards.
+    :param shard: the number of the shard.
+    :param alarms_datetime: the datetime of the processing.
+    :return: the AlarmsShardUpdate, if successful.
+    """
+
+    shard_update = session.query(models.AlarmsShardUpdate) \
+        .filter(models.AlarmsShardUpdate.nb_shards == nb_shards) \
+        .filter(models.AlarmsShardUpdate.shard == shard) \
+        .first()
+
+    if shard_update is None:
+        shard_update = models.AlarmsShardUpdate(nb_shards, shard, alarms_datetime)
+        session.add(shard_update)
+    else:
+        shard_update.alarms_datetime = alarms_datetime
+
+    try:
+        session.commit()
+        return shard_update
+    except (IntegrityError, InvalidRequestError):
+        session.rollback()
+        return None
+
+
 def register_cache(session: sqlalchemy.orm.Session, key: str,
                    request_result: str) -> Optional[models.Cache]:
     """
@@ -809,6 +1238,26 @@ def register_channel_show_data_correction(session: sqlalchemy.orm.Session, chann
         return None
 
 
+def register_emails_outbox(session: sqlalchemy.orm.Session, emails: List[Tuple[str, str, str]]) -> bool:
+    """
+    Register a list of emails in the outbox.
+
+    :param session: the db session.
+    :param emails: the list of emails, each as a tuple with the content, the subject and the destination address.
+    :return: True if the operation was a success.
+    """
+
+    for content, subject, destination in emails:
+        session.add(models.EmailOutbox(content, subject, destination))
+
+    try:
+        session.commit()
+        return True
+    except (IntegrityError, InvalidRequestError):
+        session.rollback()
+        return False
+
+
 def register_highlights(session: sqlalchemy.orm.Session, key: models.HighlightsType, year: int, week: int,
                         id_list: [int], season_list: [int] = None) -> Optional[models.Highlights]:
     """
@@ -831,6 +1280,13 @@ def register_highlights(session: sqlalchemy.orm.Session, key: models.HighlightsT
     session.add(highlights)
 
     try:
+        # Get the id of the highlights, for the shows
+        session.flush()
+
+        for i in range(len(id_list)):
+            season = season_list[i] if season_list is not None and i < len(season_list) else None
+            session.add(models.HighlightShow(highlights.id, i, id_list[i], season))
+
         session.commit()
         return highlights
     except (IntegrityError, InvalidRequestError):
@@ -838,6 +1294,65 @@ def register_highlights(session: sqlalchemy.orm.Session, key: models.HighlightsT
         return None
 
 
+def register_highlights_payload(session: sqlalchemy.orm.Session, year: int, week: int, payload: str, etag: str) \
+        -> Optional[models.HighlightsPayload]:
+    """
+    Register the response with the highlights of a given week, replacing the existing one.
+
+    :param session: the db session.
+    :param year: the year of interest.
+    :param week: the week of interest.
+    :param payload: the serialized response.
+    :param etag: the hash of the payload.
+    :return: the HighlightsPayload, if successful.
+    """
+
+    highlights_payload = get_highlights_payload(session, year, week)
+
+    if highlights_payload is None:
+        highlights_payload = models.HighlightsPayload(year, week, payload, etag)
+        session.add(highlights_payload)
+    else:
+        highlights_payload.payload = payload
+        highlights_payload.etag = etag
+
+    try:
+        session.commit()
+        return highlights_payload
+    except (IntegrityError, InvalidRequestError):
+        session.rollback()
+        return None
+
+
+def register_new_session_event(session: sqlalchemy.orm.Session, show_session: models.ShowSession,
+                               should_commit: bool = True) -> Optional[models.NewSessionEvent]:
+    """
+    Register the event of a new show session.
+
+    :param session: the db session.
+    :param show_session: the new show session.
+    :param should_commit: True it the config should be committed right away.
+    :return: the created event.
+    """
+
+    # Make sure the show session has an id
+    if show_session.id is None:
+        session.flush()
+
+    new_session_event = models.NewSessionEvent(show_session.id)
+    session.add(new_session_event)
+
+    if should_commit:
+        try:
+            session.commit()
+            return new_session_event
+        except (IntegrityError, InvalidRequestError):
+            session.rollback()
+            return None
+    else:
+        return new_session_event
+
+
 def register_reminder(session: sqlalchemy.orm.Session, show_session_id: int, anticipation_minutes: int,
                       user_id: int) -> Optional[models.Reminder]:
     """
@@ -1397,6 +1912,24 @@ def search_show_sessions_data(session: sqlalchemy.orm.Session, search_pattern: s
     return query.all()
 
 
+def search_show_sessions_data_ids(session: sqlalchemy.orm.Session, session_ids: List[int]) \
+        -> List[Tuple[models.ShowSession, models.Channel, models.ShowData]]:
+    """
+    Get the future show sessions, and all associated config, with the corresponding ids.
+
+    :param session: the db session.
+    :param session_ids: the ids of the show sessions.
+    :return: the show sessions with the corresponding ids.
+    """
+
+    return session.query(models.ShowSession, models.Channel, models.ShowData) \
+        .filter(models.ShowSession.id.in_(session_ids)) \
+        .filter(models.ShowSession.date_time > datetime.datetime.utcnow()) \
+        .join(models.Channel) \
+        .join(models.ShowData) \
+        .all()
+
+
 def search_show_sessions_data_with_tmdb_id(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: bool,
                                            season: Optional[int], episode: Optional[int],
                                            below_datetime: Optional[datetime.datetime] = None) \
@@ -1542,6 +2075,53 @@ def search_streaming_service_shows_data_with_tmdb_id(session: sqlalchemy.orm.Ses
     return query.all()
 
 
+def search_updated_show_sessions_data(session: sqlalchemy.orm.Session,
+                                      below_datetime: Optional[datetime.datetime] = None) \
+        -> List[Tuple[models.ShowSession, models.Channel, models.ShowData]]:
+    """
+    Get the future show sessions, and all associated config, that were updated after a given datetime.
+
+    :param session: the db session.
+    :param below_datetime: a datetime below to limit the search.
+    :return: the show sessions updated after the given datetime.
+    """
+
+    query = session.query(models.ShowSession, models.Channel, models.ShowData)
+
+    if below_datetime is not None:
+        query = query.filter(models.ShowSession.update_timestamp > below_datetime)
+        query = query.filter(models.ShowSession.date_time > datetime.datetime.utcnow())
+
+    # Join channels
+    query = query.join(models.Channel)
+
+    # Join show config
+    query = query.join(models.ShowData)
+
+    return query.all()
+
+
+def update_cache(session: sqlalchemy.orm.Session, cache_entry: models.Cache, request_result: str) -> bool:
+    """
+    Update an entry of Cache, with a new result of the request.
+
+    :param session: the db session.
+    :param cache_entry: the cache entry.
+    :param request_result: the new result of the request.
+    :return: whether the update was successful or not.
+    """
+
+    cache_entry.result = request_result
+    cache_entry.date_time = datetime.datetime.utcnow()
+
+    try:
+        session.commit()
+        return True
+    except (IntegrityError, InvalidRequestError):
+        session.rollback()
+        return False
+
+
 def update_reminder(session: sqlalchemy.orm.Session, reminder: models.Reminder, anticipation_minutes: int) \
         -> bool:
     """
@@ -0,0 +1,106 @@
+import datetime
+import time
+from typing import Tuple
+
+import dns.exception
+import sqlalchemy.orm
+
+import configuration
+import db_calls
+import process_emails
+
+# The number of seconds to wait before checking the outbox again, when it is empty
+POLL_SECONDS = 5
+
+
+def is_valid_address(destination: str) -> bool:
+    """
+    Check whether the destination address of an email is valid.
+    The addresses whose verification fails, such as on a timeout of the DNS, are considered valid, to be retried.
+
+    :param destination: the destination address.
+    :return: False if the address is known to be invalid.
+    """
+
+    try:
+        return process_emails.verify_email(destination)
+    except dns.exception.DNSException:
+        return True
+
+
+def process_email_outbox(session: sqlalchemy.orm.Session) -> Tuple[int, int, int]:
+    """
+    Send a batch of the emails in the outbox.
+    The emails that fail are retried later, with an exponential backoff, until they exceed the number of attempts.
+    The emails to invalid addresses are given up on right away, since they would fail in every attempt.
+
+    :param session: the db session.
+    :return: the number of emails sent, the number of emails to be retried and the number of emails given up on.
+    """
+
+    batch = db_calls.get_email_outbox_batch(session, configuration.email_outbox_batch_size)
+
+    if len(batch) == 0:
+        return 0, 0, 0
+
+    results = process_emails.deliver_emails([(e.content, e.subject, e.destination) for e in batch])
+
+    now = datetime.datetime.utcnow()
+    nb_sent = nb_retried = nb_dead = 0
+
+    for email, success in zip(batch, results):
+        if success:
+            session.delete(email)
+            nb_sent += 1
+            continue
+
+        email.nb_attempts += 1
+
+        # Unlike the errors of the SMTP server or of the network, an invalid address does not get better with time
+        if not is_valid_address(email.destination):
+            email.dead = True
+            nb_dead += 1
+
+            print('ERROR: Gave up on the email %d to the invalid address %s!' % (email.id, email.destination))
+            continue
+
+        if email.nb_attempts >= configuration.email_outbox_max_attempts:
+            email.dead = True
+            nb_dead += 1
+
+            print('ERROR: Gave up on the email %d to %s after %d attempts!'
+                  % (email.id, email.destination, email.nb_attempts))
+        else:
+            email.next_attempt_datetime = now + datetime.timedelta(minutes=2 ** email.nb_attempts)
+            nb_retried += 1
+
+    db_calls.commit(session)
+
+    return nb_sent, nb_retried, nb_dead
+
+
+def main():
+    configuration.initialize()
+    process_emails.initialize()
+
+    while True:
+        session = configuration.Session()
+
+        try:
+            nb_sent, nb_retried, nb_dead = process_email_outbox(session)
+        except Exception as e:
+            session.rollback()
+            print('ERROR: Email outbox worker failed: %s' % str(e))
+
+            nb_sent = nb_retried = nb_dead = 0
+        finally:
+            session.close()
+
+        if nb_sent + nb_retried + nb_dead > 0:
+            print('Email outbox: %d sent, %d to retry, %d given up!' % (nb_sent, nb_retried, nb_dead))
+        else:
+            time.sleep(POLL_SECONDS)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
+import re
+import threading
+import time
 from enum import Enum
-from typing import Optional
+from typing import Optional, Dict, Tuple, Mapping
 
-from google.auth.transport import requests
+import google.auth.transport
+import requests
+from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
 
 import configuration
@@ -11,6 +16,69 @@ class UserSource(Enum):
     GOOGLE = 0
 
 
+def get_max_age(headers: Mapping) -> int:
+    """
+    Get the max-age of the Cache-Control header of a response.
+
+    :param headers: the headers of the response.
+    :return: the number of seconds for which the response can be cached, 0 when it can't.
+    """
+
+    cache_control = headers.get('Cache-Control', '')
+
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+
+    match = re.search(r'max-age=(\d+)', cache_control)
+
+    if match is None:
+        return 0
+
+    return int(match.group(1))
+
+
+class CachedRequest(google.auth.transport.Request):
+    """
+    A transport that keeps the responses of the GET requests, for as long as allowed by their Cache-Control header.
+    It is used for the public certificates of Google, so that the tokens are verified without fetching them every time.
+    """
+
+    request: google.auth.transport.Request
+    cache: Dict[str, Tuple[google.auth.transport.Response, float]]
+
+    def __init__(self, request: google.auth.transport.Request):
+        self.request = request
+        self.cache = dict()
+        self.lock = threading.Lock()
+
+    def __call__(self, url, method='GET', body=None, headers=None, timeout=120, **kwargs):
+        if method != 'GET' or body is not None:
+            return self.request(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+
+        now = time.monotonic()
+
+        with self.lock:
+            cached = self.cache.get(url)
+
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        response = self.request(url, method=method, headers=headers, timeout=timeout, **kwargs)
+
+        if response.status == 200:
+            max_age = get_max_age(response.headers)
+
+            if max_age > 0:
+                with self.lock:
+                    self.cache[url] = (response, now + max_age)
+
+        return response
+
+
+# The transport used to get the certificates of Google, with the connections pooled in the same session
+google_request = CachedRequest(google_requests.Request(session=requests.Session()))
+
+
 def external_authentication(token: str, source: str) -> Optional[str]:
     """
     Validate the token and get the user's email.
@@ -30,6 +98,7 @@ def external_authentication(token: str, source: str) -> Optional[str]:
 def google_authentication(token: str) -> Optional[str]:
     """
     Validate the id token and get the user's email.
+    The token is verified locally, with the certificates of Google cached by google_request.
 
     :param token: the id token from Google.
     :return: the email of the user, when successful.
@@ -37,7 +106,7 @@ def google_authentication(token: str) -> Optional[str]:
 
     try:
         # Verify the token
-        idinfo = id_token.verify_oauth2_token(token, requests.Request(), configuration.google_client_id)
+        idinfo = id_token.verify_oauth2_token(token, google_request, configuration.google_client_id)
 
         return idinfo['email']
     except ValueError:
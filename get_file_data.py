@@ -3,6 +3,7 @@ from typing import List, Optional
 
 import sqlalchemy.orm
 
+import configuration
 import db_calls
 import models
 import process_emails
@@ -174,6 +175,10 @@ def process_show_session(db_session: sqlalchemy.orm.Session, insertion_result: I
             print('Session insertion failed!')
             return insertion_result
 
+        # Register the new session for the incremental processing of the alarms
+        if configuration.alarms_event_driven:
+            db_calls.register_new_session_event(db_session, show_session, should_commit=False)
+
         insertion_result.nb_added_sessions += 1
     else:
         insertion_result.nb_updated_sessions += 1
@@ -215,7 +220,7 @@ def delete_old_sessions(db_session: sqlalchemy.orm.Session, start_datetime: date
             for r in reminders:
                 user = db_calls.get_user_id(db_session, r.user_id)
 
-                process_emails.send_deleted_sessions_email(user.email, [show_result])
+                process_emails.send_deleted_sessions_email(user.email, user.language, [show_result])
 
                 # Delete the reminder
                 db_session.delete(r)
@@ -63,6 +63,9 @@ def update_channel_list(session: sqlalchemy.orm.Session):
 
     session.commit()
 
+    # Discard the cached responses with the channels
+    db_calls.increment_data_generation(session)
+
 
 class MEPG:
     @staticmethod
@@ -187,8 +190,12 @@ class MEPG:
 
                 shows_added = True
 
-                db_calls.register_show_session(session, show_season, show_episode, show_datetime, channel_id,
-                                               show_data.id, should_commit=False)
+                show_session = db_calls.register_show_session(session, show_season, show_episode, show_datetime,
+                                                              channel_id, show_data.id, should_commit=False)
+
+                # Register the new session for the incremental processing of the alarms
+                if configuration.alarms_event_driven:
+                    db_calls.register_new_session_event(session, show_session, should_commit=False)
 
         session.commit()
 
@@ -244,3 +251,6 @@ class MEPG:
                 MEPG.update_show_list_day(session, current, db_last_update.epg_date)
 
         db_calls.commit(session)
+
+        # Discard the cached responses with the shows
+        db_calls.increment_data_generation(session)
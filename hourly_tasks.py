@@ -2,6 +2,7 @@ import sqlalchemy.orm
 
 import configuration
 import process_emails
+import processing
 import reminders
 
 
@@ -12,8 +13,15 @@ def hourly_tasks(db_session: sqlalchemy.orm.Session):
     :param db_session: the db session.
     """
 
-    reminders.process_reminders(db_session)
-    print('Reminders processed!')
+    # When the reminder scheduler is running, it is the one sending the reminders
+    if not configuration.reminders_scheduler:
+        reminders.process_reminders(db_session)
+        print('Reminders processed!')
+
+    # Process the alarms for the sessions added since the last run
+    if configuration.alarms_event_driven:
+        processing.process_alarm_events(db_session)
+        print('Alarm events processed!')
 
 
 def main():
@@ -30,6 +38,7 @@ def main():
         raise
     finally:
         session.close()
+        process_emails.close_connections()
 
 
 if __name__ == '__main__':
@@ -1,22 +1,26 @@
 from contextlib import contextmanager
 from enum import Enum
+from typing import Callable, Hashable
 
 import flask
 import flask_httpauth as fh
 import flask_limiter as fl
 import flask_restful as fr
+import sqlalchemy.orm
 import webargs
 import webargs.flaskparser as fp
 from flask_cors import CORS
 
 import authentication
-import auxiliary
+import compression
 import configuration
 import db_calls
 import external_authentication
 import process_emails
 import processing
 import reminders
+import response_cache
+import serialization
 from processing import ChangeType
 from response_models import AlarmType
 
@@ -26,13 +30,17 @@ class FlaskApp(flask.Flask):
         super(FlaskApp, self).__init__(*args, **kwargs)
 
 
-configuration.initialize()
-process_emails.initialize()
-
 basic_auth = fh.HTTPBasicAuth()
 token_auth = fh.HTTPTokenAuth()
 app = FlaskApp(__name__)
-CORS(app, supports_credentials=True, resources={r'*': {'origins': configuration.application_link}})
+
+# The processes spawned for bcrypt import this module again, as __mp_main__, and they only need the functions they run
+if __name__ != '__mp_main__':
+    configuration.initialize()
+    process_emails.initialize()
+
+    CORS(app, supports_credentials=True, resources={r'*': {'origins': configuration.application_link}})
+
 api = fr.Api(app)
 
 # Limit the number of requests that can be made in a certain time period
@@ -43,6 +51,28 @@ limiter = fl.Limiter(
 )
 
 
+@app.after_request
+def compress_response(response: flask.Response):
+    """
+    Compress the large responses, with the best encoding accepted by the client.
+
+    :param response: the response.
+    :return: the response, compressed when worth it.
+    """
+
+    if not compression.should_compress(response):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = compression.get_encoding(flask.request.accept_encodings)
+
+    if encoding is not None:
+        compression.encode_response(response, encoding)
+
+    return response
+
+
 @basic_auth.error_handler
 @token_auth.error_handler
 def unauthorized():
@@ -94,6 +124,69 @@ def session_scope():
         session.close()
 
 
+def make_json_response(obj, status: int):
+    """
+    Make a JSON response, serializing the response objects directly, with the keys sorted as in Flask.
+
+    :param obj: the content of the response.
+    :param status: the status of the response.
+    :return: the response.
+    """
+
+    return flask.Response(serialization.dumps(obj, sort_keys=True), status=status, mimetype='application/json')
+
+
+def make_cached_response(session: sqlalchemy.orm.Session, key: Hashable,
+                         build_payload: Callable[[sqlalchemy.orm.Session], str], public: bool = True):
+    """
+    Make the response of a GET request whose content only changes with the data, cached until the data changes.
+    It is sent with an ETag and Cache-Control headers, and it is not sent again when the client already has it.
+
+    :param session: the db session.
+    :param key: the key of the response, with the endpoint and the arguments.
+    :param build_payload: the function that builds the serialized response, when it is not cached.
+    :param public: whether the response can be stored by shared caches, or only by the client.
+    :return: the response.
+    """
+
+    data_generation = db_calls.get_data_generation(session)
+
+    cached_response = response_cache.get_response(key, data_generation)
+
+    if cached_response is not None:
+        payload, etag = cached_response
+    else:
+        payload = build_payload(session)
+        etag = response_cache.store_response(key, data_generation, payload)
+
+    # The client already has the current version of the response, possibly compressed
+    if flask.request.if_none_match.contains_weak(etag):
+        response = flask.make_response('', 304)
+        response.set_etag(etag)
+    else:
+        response = flask.make_response(payload, 200)
+        response.mimetype = 'application/json'
+        response.set_etag(etag)
+
+        # Use the compressed version kept with the cached response, instead of compressing it on every request
+        encoding = compression.get_encoding(flask.request.accept_encodings)
+
+        if encoding is not None and compression.should_compress(response):
+            compression.encode_response(response, encoding,
+                                        response_cache.get_compressed_response(key, data_generation, encoding))
+
+    response.vary.add('Accept-Encoding')
+    response.cache_control.max_age = configuration.response_cache_max_age
+
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+        response.vary.add('Authorization')
+
+    return response
+
+
 class LoginEP(fr.Resource):
     decorators = [basic_auth.login_required]
 
@@ -249,13 +342,13 @@ class RemindersEP(fr.Resource):
 
             reminder_list = reminders.get_reminders(session, user_id)
 
-            return flask.make_response(flask.jsonify({'reminder_list': auxiliary.list_to_json(reminder_list)}), 200)
+            return make_json_response({'reminder_list': reminder_list}, 200)
 
     register_args = \
         {
             'show_session_id': webargs.fields.Int(required=True),
-            'anticipation_minutes': webargs.fields.Int(required=True,
-                                                       validate=[webargs.validate.Range(min=60, max=1440)])
+            'anticipation_minutes': webargs.fields.Int(
+                required=True, validate=[webargs.validate.Range(min=60, max=reminders.MAX_ANTICIPATION_MINUTES)])
         }
 
     @fp.use_args(register_args)
@@ -271,18 +364,15 @@ class RemindersEP(fr.Resource):
             user_id = authentication.get_token_field(token.encode(), 'user')
 
             if reminders.register_reminder(session, show_session_id, anticipation_minutes, user_id) is not None:
-                return flask.make_response(
-                    flask.jsonify({
-                        'reminder_list': auxiliary.list_to_json(reminders.get_reminders(session, user_id))
-                    }), 201)
+                return make_json_response({'reminder_list': reminders.get_reminders(session, user_id)}, 201)
             else:
                 return flask.make_response('Invalid reminder', 400)
 
     update_args = \
         {
             'reminder_id': webargs.fields.Int(required=True),
-            'anticipation_minutes': webargs.fields.Int(required=True,
-                                                       validate=[webargs.validate.Range(min=60, max=1440)])
+            'anticipation_minutes': webargs.fields.Int(
+                required=True, validate=[webargs.validate.Range(min=60, max=reminders.MAX_ANTICIPATION_MINUTES)])
         }
 
     @fp.use_args(update_args)
@@ -300,10 +390,7 @@ class RemindersEP(fr.Resource):
             success, msg = reminders.update_reminder(session, reminder_id, anticipation_minutes, user_id)
 
             if success:
-                return flask.make_response(
-                    flask.jsonify({
-                        'reminder_list': auxiliary.list_to_json(reminders.get_reminders(session, user_id))
-                    }), 201)
+                return make_json_response({'reminder_list': reminders.get_reminders(session, user_id)}, 201)
             else:
                 if msg == 'Not found':
                     return flask.make_response('', 404)
@@ -327,9 +414,7 @@ class RemindersEP(fr.Resource):
             user_id = authentication.get_token_field(token.encode(), 'user')
 
             if db_calls.delete_reminder(session, reminder_id, user_id):
-                return flask.make_response(flask.jsonify({
-                    'reminder_list': auxiliary.list_to_json(reminders.get_reminders(session, user_id))
-                }), 200)
+                return make_json_response({'reminder_list': reminders.get_reminders(session, user_id)}, 200)
             else:
                 return flask.make_response('', 404)
 
@@ -350,7 +435,7 @@ class AlarmsEP(fr.Resource):
 
             alarms = processing.get_alarms(session, user_id)
 
-            return flask.make_response(flask.jsonify({'alarm_list': auxiliary.list_to_json(alarms)}), 200)
+            return make_json_response({'alarm_list': alarms}, 200)
 
     register_args = \
         {
@@ -407,10 +492,7 @@ class AlarmsEP(fr.Resource):
 
             if db_calls.register_alarm(session, show_name, trakt_id, is_movie, alarm_type, show_season,
                                        show_episode, user_id) is not None:
-                return flask.make_response(
-                    flask.jsonify({
-                        'alarm_list': auxiliary.list_to_json(processing.get_alarms(session, user_id))
-                    }), 201)
+                return make_json_response({'alarm_list': processing.get_alarms(session, user_id)}, 201)
             else:
                 return flask.make_response('Alarm Already Exists', 400)
 
@@ -435,10 +517,7 @@ class AlarmsEP(fr.Resource):
             user_id = authentication.get_token_field(token.encode(), 'user')
 
             if processing.update_alarm(session, alarm_id, show_season, show_episode, user_id):
-                return flask.make_response(
-                    flask.jsonify({
-                        'alarm_list': auxiliary.list_to_json(processing.get_alarms(session, user_id))
-                    }), 201)
+                return make_json_response({'alarm_list': processing.get_alarms(session, user_id)}, 201)
             else:
                 return flask.make_response('', 404)
 
@@ -460,9 +539,7 @@ class AlarmsEP(fr.Resource):
 
             processing.remove_alarm(session, alarm_id, user_id)
 
-            return flask.make_response(flask.jsonify({
-                'alarm_list': auxiliary.list_to_json(processing.get_alarms(session, user_id))
-            }), 200)
+            return make_json_response({'alarm_list': processing.get_alarms(session, user_id)}, 200)
 
 
 class SendEmailEP(fr.Resource):
@@ -625,8 +702,9 @@ class ChannelsEP(fr.Resource):
         """Get a list of all available channels."""
 
         with session_scope() as session:
-            channel_list = db_calls.get_channel_list(session)
-            return flask.make_response(flask.jsonify(auxiliary.list_to_json(channel_list)), 200)
+            return make_cached_response(
+                session, ('channels',),
+                lambda s: serialization.dumps(db_calls.get_channel_list(s), sort_keys=True))
 
 
 class ShowsEP(fr.Resource):
@@ -664,10 +742,14 @@ class ShowsEP(fr.Resource):
             # Get the user settings of whether it should look in channels with adult content or not
             if 'HTTP_AUTHORIZATION' in flask.request.headers.environ:
                 token = flask.request.headers.environ['HTTP_AUTHORIZATION'][7:]
-                user_id = authentication.get_token_field(token.encode(), 'user')
+                search_adult = authentication.get_token_field(token.encode(), 'show_adult')
 
-                user = db_calls.get_user_id(session, user_id)
-                search_adult = user.show_adult if user is not None else False
+                # The access tokens generated before the claims were added require the user
+                if search_adult is None:
+                    user_id = authentication.get_token_field(token.encode(), 'user')
+
+                    user = db_calls.get_user_id(session, user_id)
+                    search_adult = user.show_adult if user is not None else False
 
             if search_text[0] == '"' and search_text[-1] == '"':
                 search_text = search_text[1:-1]
@@ -722,66 +804,76 @@ class LocalShowsEP(fr.Resource):
         if search_text is None and show_id is None:
             return flask.make_response('Invalid request', 400)
 
+        if show_id is not None and is_movie is None:
+            return flask.make_response('Invalid request', 400)
+
+        if show_id is None and len(search_text) < 2:
+            return flask.make_response('Search Text Too Small', 400)
+
         with session_scope() as session:
             search_adult = False
 
             # Get the user settings of whether it should look in channels with adult content or not
             if 'HTTP_AUTHORIZATION' in flask.request.headers.environ:
                 token = flask.request.headers.environ['HTTP_AUTHORIZATION'][7:]
-                user_id = authentication.get_token_field(token.encode(), 'user')
+                search_adult = authentication.get_token_field(token.encode(), 'show_adult')
 
-                user = db_calls.get_user_id(session, user_id)
-                search_adult = user.show_adult if user is not None else False
+                # The access tokens generated before the claims were added require the user
+                if search_adult is None:
+                    user_id = authentication.get_token_field(token.encode(), 'user')
 
-            # Check whether it is a request by id or by text
-            if show_id is not None:
-                if is_movie is None:
-                    return flask.make_response('Invalid request', 400)
+                    user = db_calls.get_user_id(session, user_id)
+                    search_adult = user.show_adult if user is not None else False
 
-                titles = processing.get_show_titles(session, show_id, is_movie)
+            def build_payload(db_session) -> str:
+                # Check whether it is a request by id or by text
+                if show_id is not None:
+                    titles = processing.get_show_titles(db_session, show_id, is_movie)
 
-                db_shows = processing.search_sessions_db_with_tmdb_id(session, show_id, is_movie)
-            else:
-                if len(search_text) < 2:
-                    return flask.make_response('Search Text Too Small', 400)
+                    db_shows = processing.search_sessions_db_with_tmdb_id(db_session, show_id, is_movie)
+                else:
+                    titles = [search_text]
 
-                titles = [search_text]
+                    db_shows = []
 
-                db_shows = []
+                # If it is a search with id
+                # - we only want exact title matches
+                # - for those results that don't have a TMDB id
+                complete_title = show_id is not None
+                ignore_with_tmdb_id = show_id is not None
 
-            # If it is a search with id
-            # - we only want exact title matches
-            # - for those results that don't have a TMDB id
-            complete_title = show_id is not None
-            ignore_with_tmdb_id = show_id is not None
+                # db_shows += processing.search_streaming_services_shows_db(db_session, titles, is_movie=is_movie,
+                #                                                          complete_title=complete_title,
+                #                                                          search_adult=search_adult,
+                #                                                          ignore_with_tmdb_id=ignore_with_tmdb_id)
 
-            # db_shows += processing.search_streaming_services_shows_db(session, titles, is_movie=is_movie,
-            #                                                          complete_title=complete_title,
-            #                                                          search_adult=search_adult,
-            #                                                          ignore_with_tmdb_id=ignore_with_tmdb_id)
+                db_shows += processing.search_sessions_db(db_session, titles, is_movie=is_movie,
+                                                          complete_title=complete_title, search_adult=search_adult,
+                                                          ignore_with_tmdb_id=ignore_with_tmdb_id)
 
-            db_shows += processing.search_sessions_db(session, titles, is_movie=is_movie, complete_title=complete_title,
-                                                      search_adult=search_adult,
-                                                      ignore_with_tmdb_id=ignore_with_tmdb_id)
+                response_dict = {'show_list': db_shows}
 
-            response_dict = {'show_list': auxiliary.list_to_json(db_shows)}
+                show_dict = {}
 
-            show_dict = {}
+                # If it is a search by id, add information on the premiere of the show
+                if show_id is not None:
+                    show = db_calls.get_show_data_by_tmdb_id(db_session, show_id, is_movie)
 
-            # If it is a search by id, add information on the premiere of the show
-            if show_id is not None:
-                show = db_calls.get_show_data_by_tmdb_id(session, show_id, is_movie)
+                    if show is not None:
+                        if show.premiere_date is not None:
+                            show_dict['premiere_date'] = show.premiere_date
 
-                if show is not None:
-                    if show.premiere_date is not None:
-                        show_dict['premiere_date'] = show.premiere_date
+                            if show.season_premiere is not None:
+                                show_dict['season_premiere'] = show.season_premiere
 
-                        if show.season_premiere is not None:
-                            show_dict['season_premiere'] = show.season_premiere
+                response_dict['show'] = show_dict
 
-            response_dict['show'] = show_dict
+                return serialization.dumps(response_dict, sort_keys=True)
 
-            return flask.make_response(flask.jsonify(response_dict), 200)
+            # The results depend on the settings of the user, when authenticated
+            return make_cached_response(session, ('local-shows', search_text, show_id, is_movie, search_adult),
+                                        build_payload,
+                                        public='HTTP_AUTHORIZATION' not in flask.request.headers.environ)
 
 
 class UsersEP(fr.Resource):
@@ -973,7 +1065,15 @@ class UsersSettingsEP(fr.Resource):
             # If there are changes to be made
             if changes != {}:
                 if processing.change_user_settings(session, changes, user_id):
-                    return flask.make_response(flask.jsonify(processing.get_settings(session, user_id)), 200)
+                    response_dict = processing.get_settings(session, user_id)
+
+                    # Send an access token with the claims updated with the new settings, when it can be refreshed
+                    access_token = authentication.refresh_access_token(session, token.encode())
+
+                    if access_token is not None:
+                        response_dict['access_token'] = str(access_token)
+
+                    return flask.make_response(flask.jsonify(response_dict), 200)
                 else:
                     return flask.make_response('', 400)
 
@@ -1055,8 +1155,9 @@ class HighlightsEP(fr.Resource):
         week = args['week']
 
         with session_scope() as session:
-            highlights = processing.get_response_highlights_week(session, year, week)
-            return flask.make_response(flask.jsonify({'highlight_list': auxiliary.list_to_json(highlights)}), 200)
+            return make_cached_response(
+                session, ('highlights', year, week),
+                lambda s: processing.get_response_highlights_payload(s, year, week)[0])
 
 
 # Functions
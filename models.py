@@ -47,6 +47,25 @@ class Alarm(Base):
         self.user_id = user_id
 
 
+class AlarmsShardUpdate(Base):
+    """Used to store the datetime of the last successful processing of each shard of the alarms."""
+
+    __tablename__ = 'AlarmsShardUpdate'
+    __table_args__ = (
+        sqlalchemy.UniqueConstraint("nb_shards", "shard"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nb_shards = Column(Integer, nullable=False)  # The total number of shards, since the partition depends on it
+    shard = Column(Integer, nullable=False)
+    alarms_datetime = Column(DateTime, nullable=False)
+
+    def __init__(self, nb_shards: int, shard: int, alarms_datetime: datetime.datetime):
+        self.nb_shards = nb_shards
+        self.shard = shard
+        self.alarms_datetime = alarms_datetime
+
+
 class Cache(Base):
     """Used as cache to all outside requests."""
 
@@ -54,7 +73,7 @@ class Cache(Base):
 
     key = Column(String(200), primary_key=True)
     result = Column(String(100000))
-    date_time = Column(DateTime, default=datetime.datetime.utcnow())
+    date_time = Column(DateTime, default=datetime.datetime.utcnow)
 
     def __init__(self, key: str, result: str):
         self.key = key
@@ -125,6 +144,29 @@ class ChannelShowData(Base):
         self.localized_title = localized_title
 
 
+class EmailOutbox(Base):
+    """Used to store the emails waiting to be sent, by the outbox worker."""
+
+    __tablename__ = 'EmailOutbox'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    insertion_datetime = Column(DateTime, default=datetime.datetime.utcnow)
+
+    content = Column(String(100000), nullable=False)
+    subject = Column(String(255), nullable=False)
+    destination = Column(String(255), nullable=False)
+
+    # Delivery
+    nb_attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_datetime = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    dead = Column(Boolean, default=False, nullable=False)  # True when it exceeded the number of attempts
+
+    def __init__(self, content: str, subject: str, destination: str):
+        self.content = content
+        self.subject = subject
+        self.destination = destination
+
+
 class HighlightsType(Enum):
     SCORE = 0
     NEW = 1
@@ -140,6 +182,7 @@ class Highlights(Base):
     key = Column(String(50))  # Either SCORE or NEW
     year = Column(Integer)
     week = Column(Integer)  # The number of the week
+    # Legacy lists, kept for compatibility, with the shows now in HighlightShow
     id_list = Column(String(10000))  # The list of ids - DB ids, not TMDB
     season_list = Column(String(5000))  # The list of seasons - only for NEW
 
@@ -171,6 +214,49 @@ class Highlights(Base):
                     self.season_list += str(season)
 
 
+class HighlightShow(Base):
+    """Used to store each of the shows in the highlights of a week, in their order."""
+
+    __tablename__ = 'HighlightShow'
+    __table_args__ = (
+        sqlalchemy.UniqueConstraint("highlight_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    highlight_id = Column(Integer, ForeignKey('Highlights.id'), nullable=False)
+    position = Column(Integer, nullable=False)  # The position of the show in the highlights
+    show_id = Column(Integer, ForeignKey('ShowData.id'), nullable=False, index=True)
+    season = Column(Integer)  # The season that premieres - only for NEW
+
+    def __init__(self, highlight_id: int, position: int, show_id: int, season: Optional[int]):
+        self.highlight_id = highlight_id
+        self.position = position
+        self.show_id = show_id
+        self.season = season
+
+
+class HighlightsPayload(Base):
+    """Used to store the response with the highlights of each week, ready to be served."""
+
+    __tablename__ = 'HighlightsPayload'
+    __table_args__ = (
+        sqlalchemy.UniqueConstraint("year", "week"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    year = Column(Integer, nullable=False)
+    week = Column(Integer, nullable=False)  # The number of the week
+    payload = Column(String(100000), nullable=False)  # The serialized response
+    etag = Column(String(64), nullable=False)  # The hash of the payload
+    update_datetime = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    def __init__(self, year: int, week: int, payload: str, etag: str):
+        self.year = year
+        self.week = week
+        self.payload = payload
+        self.etag = etag
+
+
 class LastUpdate(Base):
     """Used to store the config from the last update."""
 
@@ -180,11 +266,29 @@ class LastUpdate(Base):
     epg_date = Column(Date)
     alarms_datetime = Column(DateTime)
 
+    # Incremented whenever the shows or the channels change, so that the cached responses are discarded
+    data_generation = Column(Integer, default=0)
+
     def __init__(self, epg_date: datetime.date, alarms_datetime: datetime.datetime):
         self.epg_date = epg_date
         self.alarms_datetime = alarms_datetime
 
 
+class NewSessionEvent(Base):
+    """Used to register the sessions that were added, so that the alarms can be processed incrementally."""
+
+    __tablename__ = 'NewSessionEvent'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    insertion_datetime = Column(DateTime, default=datetime.datetime.utcnow)
+
+    # Not a foreign key, so that deleting a session does not depend on its events having been processed
+    session_id = Column(Integer, nullable=False)
+
+    def __init__(self, session_id: int):
+        self.session_id = session_id
+
+
 class Reminder(Base):
     __tablename__ = 'Reminder'
     __table_args__ = (
@@ -192,6 +296,7 @@ class Reminder(Base):
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    update_timestamp = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     anticipation_minutes = Column(Integer, nullable=False)
 
@@ -254,6 +359,10 @@ class ShowData(Base):
 @auxiliary.auto_repr
 class ShowSession(Base):
     __tablename__ = 'ShowSession'
+    __table_args__ = (
+        # For the shows with sessions in an interval, which also covers the queries by date_time alone
+        sqlalchemy.Index('ix_ShowSession_date_time_show_id', 'date_time', 'show_id'),
+    )
 
     # Technical
     id = Column(Integer, primary_key=True, autoincrement=True)
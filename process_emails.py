@@ -1,40 +1,63 @@
+import collections
+import concurrent.futures
 import email.mime.text as emt
 import gettext
 import os
+import queue
 import re
 import smtplib
-from typing import List, Any
+import threading
+import time
+from typing import List, Any, Tuple, Dict
 
+import dns.exception
 import dns.resolver as dnsr
 import jinja2
 
 import configuration
+import db_calls
 import response_models
 
-env: jinja2.Environment
+# The environments of the emails, one for each language, with the corresponding translations installed
+envs: Dict[str, jinja2.Environment] = dict()
 
-current: Any
-pt: Any
-en: Any
+# The translations of each language
+translations: Dict[str, gettext.NullTranslations] = dict()
 
+# The templates of the emails, compiled once for each language
+templates: Dict[str, Dict[str, jinja2.Template]] = dict()
 
-def initialize():
-    """ Initialize this module, preparing all of the variables. """
+# The results of the verification of the domains, with whether they are valid and when the result expires, from the
+# least to the most recently used
+mx_cache: 'collections.OrderedDict[str, Tuple[bool, float]]' = collections.OrderedDict()
+mx_cache_lock = threading.Lock()
 
-    global env, current, pt, en
+# The maximum number of domains verified concurrently
+MX_RESOLVE_WORKERS = 8
 
-    LOCALES_DIR = os.path.join(configuration.base_dir, 'locales')
 
-    pt = gettext.translation('main', localedir=LOCALES_DIR, languages=['pt'])
-    en = gettext.translation('main', localedir=LOCALES_DIR, languages=['en'])
+def initialize():
+    """
+    Initialize this module, preparing all of the variables.
+    Each language has its own environment, so that the emails can be rendered concurrently in different languages, and
+    all of the templates are compiled here, once.
+    """
 
+    LOCALES_DIR = os.path.join(configuration.base_dir, 'locales')
     EMAIL_TEMPLATES_DIR = os.path.join(configuration.base_dir, 'email_templates')
 
     extensions = ['jinja2.ext.i18n']
-    env = jinja2.Environment(loader=jinja2.FileSystemLoader(EMAIL_TEMPLATES_DIR), extensions=extensions)
 
-    current = pt
-    env.install_gettext_callables(gettext=current.gettext, ngettext=current.ngettext, newstyle=True)
+    for language in [item.value for item in configuration.AvailableLanguage]:
+        translation = gettext.translation('main', localedir=LOCALES_DIR, languages=[language])
+
+        language_env = jinja2.Environment(loader=jinja2.FileSystemLoader(EMAIL_TEMPLATES_DIR), extensions=extensions)
+        language_env.install_gettext_callables(gettext=translation.gettext, ngettext=translation.ngettext,
+                                               newstyle=True)
+
+        translations[language] = translation
+        envs[language] = language_env
+        templates[language] = {name: language_env.get_template(name) for name in language_env.list_templates()}
 
 
 def valid_configuration():
@@ -44,24 +67,101 @@ def valid_configuration():
     :return: true if the configuration is valid.
     """
 
+    if configuration.email_debug:
+        return True
+
     return configuration.email_domain is not None and configuration.email_account is not None and \
            configuration.email_user is not None and configuration.email_password is not None
 
 
-def set_language(language: str):
+def get_language(language: str) -> str:
     """
-    Set the language for the emails.
+    Get the language in which the emails are sent, defaulting to english for unknown languages.
 
     :param language: the language string.
+    :return: the language of the emails.
     """
-    global current, pt, en
 
-    if language == 'pt':
-        current = pt
-    else:
-        current = en
+    if language in envs:
+        return language
+
+    return configuration.AvailableLanguage.EN.value
+
+
+def translate(language: str, message: str) -> str:
+    """
+    Translate a message to a language.
+
+    :param language: the language string.
+    :param message: the message.
+    :return: the translated message.
+    """
+
+    return translations[get_language(language)].gettext(message)
+
+
+def render_template(language: str, template_name: str, **kwargs) -> str:
+    """
+    Render a template of an email in a language.
+
+    :param language: the language string.
+    :param template_name: the name of the template.
+    :return: the rendered template.
+    """
+
+    return templates[get_language(language)][template_name].render(application_name=configuration.application_name,
+                                                                   application_link=configuration.application_link,
+                                                                   **kwargs)
+
 
-    env.install_gettext_callables(gettext=current.gettext, ngettext=current.ngettext, newstyle=True)
+def render_fragments(language: str, fragment_name: str, results: List[response_models.LocalShowResult],
+                     fragments_cache: Dict[Tuple[str, str, response_models.LocalShowResultType, int], str]) \
+        -> List[str]:
+    """
+    Render the fragment of each result, reusing the fragments already rendered for the same result and language.
+
+    :param language: the language string.
+    :param fragment_name: the name of the template of the fragment.
+    :param results: the list of results.
+    :param fragments_cache: the fragments already rendered, shared between the emails of the same batch.
+    :return: the list of fragments, one for each result.
+    """
+
+    language = get_language(language)
+    fragments = []
+
+    for result in results:
+        key = (language, fragment_name, result.type, result.id)
+        fragment = fragments_cache.get(key)
+
+        if fragment is None:
+            fragment = templates[language][fragment_name].render(show=result)
+            fragments_cache[key] = fragment
+
+        fragments.append(fragment)
+
+    return fragments
+
+
+def render_results_email(language: str, template_name: str, fragment_name: str, destination: str, subject: str,
+                         results: List[response_models.LocalShowResult],
+                         fragments_cache: Dict[Tuple[str, str, response_models.LocalShowResultType, int], str]) -> str:
+    """
+    Render an email with a list of results, assembled from the fragments of each result.
+
+    :param language: the language string.
+    :param template_name: the name of the template of the email.
+    :param fragment_name: the name of the template of the fragment of each result.
+    :param destination: the destination address.
+    :param subject: the subject.
+    :param results: the list of results.
+    :param fragments_cache: the fragments already rendered, shared between the emails of the same batch.
+    :return: the rendered email.
+    """
+
+    fragments = render_fragments(language, fragment_name, results, fragments_cache)
+
+    return render_template(language, template_name, username=destination, fragments=fragments, title=subject)
 
 
 def verify_email(email):
@@ -79,19 +179,233 @@ def verify_email(email):
         return False
 
     # Verify if the domain exists
-    domain_name = email.split('@')[1]
+    return verify_domain(email.split('@')[1])
+
+
+def verify_domain(domain_name: str) -> bool:
+    """
+    Verify if the domain of an email has MX records, using the results cached for the domain when still valid.
+    The cache keeps up to configuration.email_mx_cache_size domains, evicting the least recently used ones.
+
+    :param domain_name: the domain.
+    :return: True if the domain has MX records.
+    """
+
+    now = time.monotonic()
+
+    with mx_cache_lock:
+        cached = mx_cache.get(domain_name)
+
+        if cached is not None:
+            if cached[1] > now:
+                mx_cache.move_to_end(domain_name)
+                return cached[0]
+
+            del mx_cache[domain_name]
 
     try:
         dnsr.query(domain_name, 'MX')
+        valid = True
     except (dnsr.NoAnswer, dnsr.NXDOMAIN):
+        valid = False
+
+    if valid:
+        expiration = now + configuration.email_mx_cache_seconds
+    else:
+        expiration = now + configuration.email_mx_negative_cache_seconds
+
+    if configuration.email_mx_cache_size > 0:
+        with mx_cache_lock:
+            mx_cache[domain_name] = (valid, expiration)
+            mx_cache.move_to_end(domain_name)
+
+            while len(mx_cache) > configuration.email_mx_cache_size:
+                mx_cache.popitem(last=False)
+
+    return valid
+
+
+def resolve_domains(destinations: List[str]):
+    """
+    Verify, concurrently, the domains of a list of destination addresses, so that their results are cached.
+
+    :param destinations: the destination addresses.
+    """
+
+    domains = {d.split('@')[1] for d in destinations if '@' in d}
+
+    # The errors are ignored, since the domains that fail are verified again when sending
+    def resolve(domain_name: str):
+        try:
+            verify_domain(domain_name)
+        except dns.exception.DNSException:
+            pass
+
+    if len(domains) > 0:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(domains), MX_RESOLVE_WORKERS)) as executor:
+            list(executor.map(resolve, domains))
+
+
+def create_message(content: str, subject: str, destination: str) -> emt.MIMEText:
+    """
+    Create the message of an email.
+
+    :param str content: the content of the email.
+    :param str subject: the subject of the email.
+    :param str destination: the destination address.
+    :return: the message.
+    """
+
+    msg = emt.MIMEText(content, 'html', 'utf-8')
+
+    msg['Subject'] = subject
+    msg['From'] = configuration.email_account
+    msg['To'] = destination
+
+    return msg
+
+
+class DebugSMTP:
+    """
+    Local stand-in for an SMTP connection, used when configuration.email_debug is set.
+    It keeps the messages in memory instead of sending them, and can simulate the latency of a real server.
+    """
+
+    # The messages sent through all the connections, as tuples with the sender, the recipients and the message
+    sent_messages: List[Tuple[str, List[str], str]] = []
+
+    # The number of connections opened
+    nb_connections: int = 0
+
+    # The seconds it takes to open a connection and to send a message
+    connect_latency: float = 0
+    send_latency: float = 0
+
+    def __init__(self):
+        time.sleep(DebugSMTP.connect_latency)
+
+        DebugSMTP.nb_connections += 1
+        self.closed = False
+
+    def sendmail(self, from_addr: str, to_addrs: List[str], msg: str):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+        time.sleep(DebugSMTP.send_latency)
+
+        DebugSMTP.sent_messages.append((from_addr, to_addrs, msg))
+
+    def quit(self):
+        self.closed = True
+
+
+# The idle connections, ready to be reused
+smtp_connections = queue.LifoQueue()
+
+
+def open_connection() -> Any:
+    """
+    Open an authenticated connection to the SMTP server.
+
+    :return: the connection.
+    """
+
+    if configuration.email_debug:
+        return DebugSMTP()
+
+    s = smtplib.SMTP(configuration.email_domain)
+    s.starttls()
+    s.login(configuration.email_user, configuration.email_password)
+
+    return s
+
+
+def close_connection(s: Any):
+    """
+    Close a connection to the SMTP server, ignoring the errors of connections that are already broken.
+
+    :param s: the connection.
+    """
+
+    try:
+        s.quit()
+    except (smtplib.SMTPException, OSError):
+        pass
+
+
+def acquire_connection() -> Any:
+    """
+    Get an idle connection to the SMTP server, or open a new one if there are none.
+
+    :return: the connection.
+    """
+
+    try:
+        return smtp_connections.get_nowait()
+    except queue.Empty:
+        return open_connection()
+
+
+def release_connection(s: Any):
+    """
+    Return a connection to the idle connections, to be reused, closing it if there are enough idle connections.
+
+    :param s: the connection.
+    """
+
+    if smtp_connections.qsize() < configuration.email_connections:
+        smtp_connections.put(s)
+    else:
+        close_connection(s)
+
+
+def close_connections():
+    """ Close all the idle connections to the SMTP server. """
+
+    while True:
+        try:
+            close_connection(smtp_connections.get_nowait())
+        except queue.Empty:
+            return
+
+
+def send_message(msg: emt.MIMEText, destination: str) -> bool:
+    """
+    Send a message through a reused connection, reconnecting once if the connection was closed by the server.
+
+    :param msg: the message.
+    :param str destination: the destination address.
+    :return: true if it sent the message with success.
+    """
+
+    s = acquire_connection()
+
+    try:
+        try:
+            s.sendmail(configuration.email_account, [destination], msg.as_string())
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            close_connection(s)
+
+            s = open_connection()
+            s.sendmail(configuration.email_account, [destination], msg.as_string())
+    except smtplib.SMTPRecipientsRefused:
+        print('WARNING: The email to %s was refused!' % destination)
+
+        release_connection(s)
+        return False
+    except (smtplib.SMTPException, OSError) as e:
+        print('ERROR: The email to %s failed: %s' % (destination, str(e)))
+
+        close_connection(s)
         return False
 
+    release_connection(s)
     return True
 
 
-def send_email(content: str, subject: str, destination: str) -> bool:
+def deliver_email(content: str, subject: str, destination: str) -> bool:
     """
-    Send an email.
+    Send an email right away, through the SMTP server.
 
     :param str content: the content of the email.
     :param str subject: the subject of the email.
@@ -103,189 +417,277 @@ def send_email(content: str, subject: str, destination: str) -> bool:
         print('Invalid email configuration!')
         return False
 
-    # TODO: THIS VERIFICATION SHOULD NOT BE DONE HERE, IT SHOULD BE DONE FOR EVERY POSSIBLE ENTRY OF AN EMAIL
-    if not verify_email(destination):
+    # The errors are handled for each email, so that they do not affect the other emails of a batch
+    try:
+        # TODO: THIS VERIFICATION SHOULD NOT BE DONE HERE, IT SHOULD BE DONE FOR EVERY POSSIBLE ENTRY OF AN EMAIL
+        if not verify_email(destination):
+            return False
+
+        return send_message(create_message(content, subject, destination), destination)
+    except Exception as e:
+        print('ERROR: The email to %s failed: %s' % (destination, str(e)))
         return False
 
-    msg = emt.MIMEText(content, 'html', 'utf-8')
 
-    msg['Subject'] = subject
-    msg['From'] = configuration.email_account
-    msg['To'] = destination
+def enqueue_emails(emails: List[Tuple[str, str, str]]) -> bool:
+    """
+    Add emails to the outbox, to be sent by the outbox worker.
+    It uses its own db session, so that the emails are registered independently of the caller's transaction.
 
-    s = smtplib.SMTP(configuration.email_domain)
-    s.starttls()
-    s.login(configuration.email_user, configuration.email_password)
-    s.sendmail(configuration.email_account, [destination], msg.as_string())
-    s.quit()
+    :param emails: the list of emails, each as a tuple with the content, the subject and the destination address.
+    :return: true if the emails were added with success.
+    """
 
-    return True
+    session = configuration.Session()
+
+    try:
+        return db_calls.register_emails_outbox(session, emails)
+    finally:
+        session.close()
+
+
+def send_email(content: str, subject: str, destination: str) -> bool:
+    """
+    Send an email, or add it to the outbox when configuration.email_outbox is set.
+
+    :param str content: the content of the email.
+    :param str subject: the subject of the email.
+    :param str destination: the destination address.
+    :return: true if it sent, or added to the outbox, the email with success.
+    """
+
+    if configuration.email_outbox:
+        return enqueue_emails([(content, subject, destination)])
 
+    return deliver_email(content, subject, destination)
 
-def send_arbitrary_email(content: str, destination: str, subject: str) -> bool:
+
+def deliver_emails(emails: List[Tuple[str, str, str]]) -> List[bool]:
+    """
+    Send a batch of emails right away, through up to configuration.email_connections parallel connections.
+    The emails are sent in batches of configuration.email_batch_size, with a pause between batches.
+
+    :param emails: the list of emails, each as a tuple with the content, the subject and the destination address.
+    :return: whether each of the emails was sent with success.
+    """
+
+    if not valid_configuration():
+        print('Invalid email configuration!')
+        return [False] * len(emails)
+
+    results = []
+
+    # Verify all the domains at once, instead of one at a time when sending
+    resolve_domains([e[2] for e in emails])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=configuration.email_connections) as executor:
+        for i in range(0, len(emails), configuration.email_batch_size):
+            if i > 0:
+                time.sleep(configuration.email_batch_interval)
+
+            results.extend(executor.map(lambda e: deliver_email(*e), emails[i:i + configuration.email_batch_size]))
+
+    return results
+
+
+def send_emails(emails: List[Tuple[str, str, str]]) -> int:
+    """
+    Send a batch of emails, or add them to the outbox when configuration.email_outbox is set.
+
+    :param emails: the list of emails, each as a tuple with the content, the subject and the destination address.
+    :return: the number of emails sent, or added to the outbox, with success.
+    """
+
+    if configuration.email_outbox:
+        return len(emails) if enqueue_emails(emails) else 0
+
+    return sum(deliver_emails(emails))
+
+
+def send_arbitrary_email(content: str, destination: str, subject: str, language: str) -> bool:
     """
     Send an arbitrary email.
 
     :param str content: the desired content.
     :param str destination: the destination address.
     :param str subject: the subject.
+    :param str language: the language of the email.
     """
 
-    content = env.get_template('arbitrary_email.html').render(application_name=configuration.application_name,
-                                                              application_link=configuration.application_link,
-                                                              username=destination, title=subject, content=content)
+    content = render_template(language, 'arbitrary_email.html', username=destination, title=subject, content=content)
 
     return send_email(content, subject, destination)
 
 
-def send_verification_email(destination: str, verification_token: str) -> bool:
+def send_verification_email(destination: str, language: str, verification_token: str) -> bool:
     """
     Send a verification email.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param str verification_token: the verification token.
     """
 
-    subject = current.gettext('verification_email')
+    subject = translate(language, 'verification_email')
 
-    content = env.get_template('verification_email.html').render(application_name=configuration.application_name,
-                                                                 application_link=configuration.application_link,
-                                                                 username=destination,
-                                                                 verification_token=verification_token,
-                                                                 validity_hours=configuration.VERIFICATION_TOKEN_VALIDITY_DAYS * 24,
-                                                                 title=subject)
+    content = render_template(language, 'verification_email.html', username=destination,
+                              verification_token=verification_token,
+                              validity_hours=configuration.VERIFICATION_TOKEN_VALIDITY_DAYS * 24, title=subject)
 
     return send_email(content, subject, destination)
 
 
-def send_deletion_email(destination: str, deletion_token: str) -> bool:
+def send_deletion_email(destination: str, language: str, deletion_token: str) -> bool:
     """
     Send a deletion email.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param str deletion_token: the deletion token.
     """
 
-    subject = current.gettext('deletion_email')
+    subject = translate(language, 'deletion_email')
 
-    content = env.get_template('deletion_email.html').render(application_name=configuration.application_name,
-                                                             application_link=configuration.application_link,
-                                                             username=destination,
-                                                             deletion_token=deletion_token,
-                                                             validity_hours=configuration.DELETION_TOKEN_VALIDITY_DAYS * 24,
-                                                             title=subject)
+    content = render_template(language, 'deletion_email.html', username=destination, deletion_token=deletion_token,
+                              validity_hours=configuration.DELETION_TOKEN_VALIDITY_DAYS * 24, title=subject)
 
     return send_email(content, subject, destination)
 
 
-def send_change_email_old(destination: str, token: str) -> bool:
+def send_change_email_old(destination: str, language: str, token: str) -> bool:
     """
     Send a change email email to the old email.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param str token: the change email old token.
     """
 
-    subject = current.gettext('change_email')
+    subject = translate(language, 'change_email')
 
-    content = env.get_template('change_email_old.html').render(application_name=configuration.application_name,
-                                                               application_link=configuration.application_link,
-                                                               username=destination,
-                                                               token=token,
-                                                               validity_hours=configuration.CHANGE_EMAIL_TOKEN_VALIDITY_DAYS * 24,
-                                                               title=subject)
+    content = render_template(language, 'change_email_old.html', username=destination, token=token,
+                              validity_hours=configuration.CHANGE_EMAIL_TOKEN_VALIDITY_DAYS * 24, title=subject)
 
     return send_email(content, subject, destination)
 
 
-def send_change_email_new(destination: str, token: str, old_email: str) -> bool:
+def send_change_email_new(destination: str, language: str, token: str, old_email: str) -> bool:
     """
     Send a change email email to the new email.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param str token: the change email new token.
     :param str old_email: the old email.
     """
 
-    subject = current.gettext('change_email')
+    subject = translate(language, 'change_email')
 
-    content = env.get_template('change_email_new.html').render(application_name=configuration.application_name,
-                                                               application_link=configuration.application_link,
-                                                               username=destination,
-                                                               token=token,
-                                                               old_email=old_email,
-                                                               validity_hours=configuration.CHANGE_EMAIL_TOKEN_VALIDITY_DAYS * 24,
-                                                               title=subject)
+    content = render_template(language, 'change_email_new.html', username=destination, token=token,
+                              old_email=old_email,
+                              validity_hours=configuration.CHANGE_EMAIL_TOKEN_VALIDITY_DAYS * 24, title=subject)
 
     return send_email(content, subject, destination)
 
 
-def send_alarms_email(destination: str, results: List[response_models.LocalShowResult]) -> bool:
+def send_alarms_emails(alarms_results: List[Tuple[str, str, List[response_models.LocalShowResult]]]) -> int:
     """
-    Send an email with the results found for the alarms created.
+    Send the emails with the results found for the alarms of multiple users, in a single batch.
 
-    :param str destination: the destination address.
-    :param list results: the list of results.
+    :param alarms_results: the list of results, each as a tuple with the destination address, the language and the
+    list of results.
+    :return: the number of emails sent with success.
     """
 
-    subject = current.gettext('alarm_results')
+    emails = []
 
-    content = env.get_template('alarms_email.html').render(application_name=configuration.application_name,
-                                                           application_link=configuration.application_link,
-                                                           username=destination, results=results, title=subject)
+    # The fragment of each result is rendered once per language, and shared by all the emails with it
+    fragments_cache = dict()
 
-    return send_email(content, subject, destination)
+    for destination, language, results in alarms_results:
+        subject = translate(language, 'alarm_results')
+
+        content = render_results_email(language, 'alarms_email.html', 'alarm_fragment.html', destination, subject,
+                                       results, fragments_cache)
+
+        emails.append((content, subject, destination))
 
+    return send_emails(emails)
 
-def send_reminders_email(destination: str, results: List[response_models.LocalShowResult]) -> bool:
+
+def send_reminders_email(destination: str, language: str, results: List[response_models.LocalShowResult]) -> bool:
     """
-    Send an email with the results found for the alarms created.
+    Send an email with the sessions of the reminders.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param list results: the list of results.
     """
 
-    subject = current.gettext('subject_reminders_results')
+    subject = translate(language, 'subject_reminders_results')
 
-    content = env.get_template('reminders_email.html').render(application_name=configuration.application_name,
-                                                              application_link=configuration.application_link,
-                                                              username=destination, results=results, title=subject)
+    content = render_results_email(language, 'reminders_email.html', 'session_fragment.html', destination, subject,
+                                   results, dict())
 
     return send_email(content, subject, destination)
 
 
-def send_deleted_sessions_email(destination: str, sessions: List[response_models.LocalShowResult]) -> bool:
+def send_reminders_emails(reminders_results: List[Tuple[str, str, List[response_models.LocalShowResult]]]) -> int:
+    """
+    Send the emails with the sessions of the reminders of multiple users, in a single batch.
+
+    :param reminders_results: the list of results, each as a tuple with the destination address, the language and the
+    list of results.
+    :return: the number of emails sent with success.
+    """
+
+    emails = []
+
+    # The fragment of each session is rendered once per language, and shared by all the emails with it
+    fragments_cache = dict()
+
+    for destination, language, results in reminders_results:
+        subject = translate(language, 'subject_reminders_results')
+
+        content = render_results_email(language, 'reminders_email.html', 'session_fragment.html', destination,
+                                       subject, results, fragments_cache)
+
+        emails.append((content, subject, destination))
+
+    return send_emails(emails)
+
+
+def send_deleted_sessions_email(destination: str, language: str,
+                                sessions: List[response_models.LocalShowResult]) -> bool:
     """
     Send an email with a list of the show sessions that were deleted and were associated to a user's reminder.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param list sessions: the list of sessions.
     """
 
-    subject = current.gettext('subject_deleted_sessions')
+    subject = translate(language, 'subject_deleted_sessions')
 
-    content = env.get_template('deleted_sessions_email.html').render(application_name=configuration.application_name,
-                                                                     application_link=configuration.application_link,
-                                                                     username=destination, results=sessions,
-                                                                     title=subject)
+    content = render_results_email(language, 'deleted_sessions_email.html', 'session_fragment.html', destination,
+                                   subject, sessions, dict())
 
     return send_email(content, subject, destination)
 
 
-def send_password_recovery_email(destination: str, token: str) -> bool:
+def send_password_recovery_email(destination: str, language: str, token: str) -> bool:
     """
     Send a password recovery email.
 
     :param str destination: the destination address.
+    :param str language: the language of the email.
     :param str token: the password recovery token.
     """
 
-    subject = current.gettext('password_recovery_email')
+    subject = translate(language, 'password_recovery_email')
 
-    content = env.get_template('password_recovery_email.html').render(application_name=configuration.application_name,
-                                                                      application_link=configuration.application_link,
-                                                                      username=destination, token=token,
-                                                                      validity_hours=configuration.PASSWORD_RECOVERY_TOKEN_VALIDITY_DAYS * 24,
-                                                                      title=subject)
+    content = render_template(language, 'password_recovery_email.html', username=destination, token=token,
+                              validity_hours=configuration.PASSWORD_RECOVERY_TOKEN_VALIDITY_DAYS * 24,
+                              title=subject)
 
     return send_email(content, subject, destination)
@@ -1,7 +1,11 @@
+import concurrent.futures
 import datetime
+import hashlib
+import multiprocessing
+import threading
 import time
 from enum import Enum
-from typing import List, Tuple, Mapping, Optional
+from typing import List, Tuple, Mapping, Optional, Dict, Set, Callable, Any
 
 import flask_bcrypt as fb
 import sqlalchemy.orm
@@ -14,6 +18,7 @@ import external_authentication
 import models
 import process_emails
 import response_models
+import serialization
 import tmdb_calls
 
 
@@ -31,16 +36,30 @@ class ChangeType(Enum):
     EXCLUDED_CHANNELS = 'excluded_channels'
 
 
-def get_hash(text: str) -> str:
+# The pool of processes in which the passwords are hashed and verified, created when first needed
+bcrypt_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+bcrypt_semaphore: Optional[threading.BoundedSemaphore] = None
+bcrypt_pool_lock = threading.Lock()
+
+# The metrics of the pool: the hashes waiting or running, the maximum of those, and the completed with their total time
+bcrypt_metrics = {'pending': 0, 'max_pending': 0, 'completed': 0, 'total_seconds': 0.0}
+bcrypt_metrics_lock = threading.Lock()
+
+# The number of hashes between each print of the metrics of the pool
+BCRYPT_METRICS_INTERVAL = 100
+
+
+def generate_hash(text: str, rounds: int) -> str:
     """
-    Get the hash of a text, ensuring the result is a string.
+    Get the bcrypt hash of a text, ensuring the result is a string.
     (Some versions of flask_bcrypt's function return bytes, while others return string)
 
     :param text: the input text.
+    :param rounds: the number of rounds.
     :return: the resulting hash.
     """
 
-    text_hash = fb.generate_password_hash(text, configuration.bcrypt_rounds)
+    text_hash = fb.generate_password_hash(text, rounds)
 
     if isinstance(text_hash, bytes):
         return text_hash.decode()
@@ -48,6 +67,110 @@ def get_hash(text: str) -> str:
         return text_hash
 
 
+def check_hash(text_hash: Optional[str], text: str) -> bool:
+    """
+    Check whether a text matches a bcrypt hash.
+
+    :param text_hash: the hash.
+    :param text: the input text.
+    :return: whether the text matches the hash.
+    """
+
+    try:
+        return fb.check_password_hash(text_hash, text)
+    except (TypeError, ValueError):
+        return False
+
+
+def get_bcrypt_pool() -> Tuple[concurrent.futures.ProcessPoolExecutor, threading.BoundedSemaphore]:
+    """
+    Get the pool of processes for bcrypt, creating it when needed.
+    The processes are spawned, instead of forked, since the requests are served by multiple threads.
+
+    :return: the pool and the semaphore that limits the number of hashes submitted to it.
+    """
+
+    global bcrypt_pool, bcrypt_semaphore
+
+    with bcrypt_pool_lock:
+        if bcrypt_pool is None:
+            bcrypt_pool = concurrent.futures.ProcessPoolExecutor(
+                configuration.bcrypt_workers, mp_context=multiprocessing.get_context('spawn'))
+            bcrypt_semaphore = threading.BoundedSemaphore(max(configuration.bcrypt_max_pending, 1))
+
+        return bcrypt_pool, bcrypt_semaphore
+
+
+def run_bcrypt(function: Callable, *args) -> Any:
+    """
+    Run a bcrypt function in the pool of processes, so that the threads serving the requests are not kept busy by it,
+    or in the current thread when configuration.bcrypt_workers is 0.
+
+    :param function: the function, either generate_hash or check_hash.
+    :param args: the arguments of the function.
+    :return: the result of the function.
+    """
+
+    if configuration.bcrypt_workers == 0:
+        return function(*args)
+
+    pool, semaphore = get_bcrypt_pool()
+    start_time = time.monotonic()
+
+    with bcrypt_metrics_lock:
+        bcrypt_metrics['pending'] += 1
+        bcrypt_metrics['max_pending'] = max(bcrypt_metrics['max_pending'], bcrypt_metrics['pending'])
+
+    try:
+        with semaphore:
+            return pool.submit(function, *args).result()
+    finally:
+        with bcrypt_metrics_lock:
+            bcrypt_metrics['pending'] -= 1
+            bcrypt_metrics['completed'] += 1
+            bcrypt_metrics['total_seconds'] += time.monotonic() - start_time
+
+            should_print = bcrypt_metrics['completed'] % BCRYPT_METRICS_INTERVAL == 0
+
+        if should_print:
+            print_bcrypt_metrics()
+
+
+def get_bcrypt_metrics() -> Dict[str, Any]:
+    """
+    Get the metrics of the pool of processes for bcrypt.
+
+    :return: the dictionary with the metrics.
+    """
+
+    with bcrypt_metrics_lock:
+        return dict(bcrypt_metrics)
+
+
+def print_bcrypt_metrics():
+    """ Print the metrics of the pool of processes for bcrypt: the queue depth and the latency of the hashes. """
+
+    metrics = get_bcrypt_metrics()
+
+    if metrics['completed'] == 0:
+        return
+
+    print('Bcrypt pool: %d hashes in %.1f ms on average, %d pending (maximum of %d of %d allowed)!'
+          % (metrics['completed'], 1000 * metrics['total_seconds'] / metrics['completed'], metrics['pending'],
+             metrics['max_pending'], configuration.bcrypt_max_pending))
+
+
+def get_hash(text: str) -> str:
+    """
+    Get the hash of a text, ensuring the result is a string.
+
+    :param text: the input text.
+    :return: the resulting hash.
+    """
+
+    return run_bcrypt(generate_hash, text, configuration.bcrypt_rounds)
+
+
 def clear_show_list(session):
     """Delete entries with more than x days old, from the DB."""
 
@@ -494,38 +617,467 @@ def remove_alarm(session, alarm_id, user_id):
         session.commit()
 
 
-def process_alarms(session: sqlalchemy.orm.Session):
+class AlarmSessionIndex:
+    """Indexes over the sessions updated since the last processing of the alarms, used to match them in memory."""
+
+    tmdb_index: Dict[Tuple[int, bool], List[Tuple[models.ShowSession, models.Channel, models.ShowData]]]
+    title_index: Dict[str, List[Tuple[models.ShowSession, models.Channel, models.ShowData]]]
+
+    def __init__(self, db_shows: List[Tuple[models.ShowSession, models.Channel, models.ShowData]]):
+        self.tmdb_index = dict()
+        self.title_index = dict()
+
+        for s in db_shows:
+            show_data = s[2]
+
+            # Shows with a TMDB match are only found by their id, while the others are only found by their title
+            if show_data.tmdb_id is not None:
+                self.tmdb_index.setdefault((show_data.tmdb_id, show_data.is_movie), []).append(s)
+            else:
+                self.title_index.setdefault(show_data.search_title, []).append(s)
+
+    def search_tmdb_id(self, tmdb_id: int, is_movie: bool, show_season: Optional[int],
+                       show_episode: Optional[int]) -> List[Tuple[models.ShowSession, models.Channel, models.ShowData]]:
+        """
+        Get the indexed sessions that match a TMDB id.
+
+        :param tmdb_id: the TMDB id.
+        :param is_movie: whether it is a movie.
+        :param show_season: to specify a season.
+        :param show_episode: to specify an episode.
+        :return: the matching sessions.
+        """
+
+        results = []
+
+        for s in self.tmdb_index.get((tmdb_id, is_movie), []):
+            if show_season is not None and s[0].season != show_season:
+                continue
+
+            if show_episode is not None and s[0].episode != show_episode:
+                continue
+
+            results.append(s)
+
+        return results
+
+    def search_title(self, title: str, is_movie: Optional[bool], show_season: Optional[int],
+                     show_episode: Optional[int]) -> List[Tuple[models.ShowSession, models.Channel, models.ShowData]]:
+        """
+        Get the indexed sessions whose search title is a complete match for a title.
+
+        :param title: the title.
+        :param is_movie: True if the search is only for movies.
+        :param show_season: to specify a season.
+        :param show_episode: to specify an episode.
+        :return: the matching sessions.
+        """
+
+        results = []
+
+        for s in self.title_index.get(auxiliary.make_searchable_title(title), []):
+            show_session = s[0]
+            show_data = s[2]
+
+            if is_movie:
+                if show_data.is_movie is False:
+                    continue
+            else:
+                if is_movie is not None and show_data.is_movie is True:
+                    continue
+
+                if show_season is not None and show_session.season != show_season:
+                    continue
+
+                if show_episode is not None and show_session.episode != show_episode:
+                    continue
+
+            results.append(s)
+
+        return results
+
+
+def get_alarm_match_key(alarm: models.Alarm) -> Tuple:
+    """
+    Get the key that identifies the matches of an alarm, which is shared by all alarms for the same show.
+
+    :param alarm: the alarm.
+    :return: the key of the alarm.
+    """
+
+    if alarm.alarm_type == response_models.AlarmType.LISTINGS.value:
+        show_key = auxiliary.make_searchable_title(alarm.show_name)
+    else:
+        show_key = alarm.trakt_id
+
+    return alarm.alarm_type, show_key, alarm.is_movie, alarm.show_season, alarm.show_episode
+
+
+def match_alarm(alarm: models.Alarm, titles: List[str], index: AlarmSessionIndex) \
+        -> List[Tuple[models.Channel, response_models.LocalShowResult]]:
+    """
+    Get the sessions, in the index, that match an alarm, without applying any of the user's filters.
+
+    :param alarm: the alarm.
+    :param titles: the titles of the show of the alarm.
+    :param index: the index of the sessions.
+    :return: the matching sessions, each with the corresponding channel.
+    """
+
+    results = dict()
+
+    if alarm.alarm_type != response_models.AlarmType.LISTINGS.value:
+        for s in index.search_tmdb_id(alarm.trakt_id, alarm.is_movie, alarm.show_season, alarm.show_episode):
+            show = response_models.LocalShowResult.create_from_show_session(s[0], s[1], s[2])
+            show.match_reason = 'ID'
+
+            results[show.id] = (s[1], show)
+
+    for title in titles:
+        for s in index.search_title(title, alarm.is_movie, alarm.show_season, alarm.show_episode):
+            show = response_models.LocalShowResult.create_from_show_session(s[0], s[1], s[2])
+            show.match_reason = 'NAME'
+
+            results[show.id] = (s[1], show)
+
+    return list(results.values())
+
+
+def filter_alarm_matches(matches: List[Tuple[models.Channel, response_models.LocalShowResult]], search_adult: bool,
+                         excluded_channels: Set[int]) -> List[response_models.LocalShowResult]:
+    """
+    Apply the filters of a user to the matches of an alarm.
+
+    :param matches: the matching sessions, each with the corresponding channel.
+    :param search_adult: if it should also search in adult channels.
+    :param excluded_channels: the ids of the channels excluded by the user.
+    :return: the matching sessions that pass the filters.
     """
-    Process the alarms that exist in the DB.
+
+    results = []
+
+    for channel, show in matches:
+        # Skip sessions from adult channels found by name, unless the user wants them
+        if show.match_reason == 'NAME' and not search_adult and channel.adult is not False:
+            continue
+
+        # Skip sessions from excluded channels
+        if channel.id in excluded_channels:
+            continue
+
+        results.append(show)
+
+    return results
+
+
+class AlarmIndex:
+    """
+    Indexes over the alarms, grouped by their match key, used to find the alarms that might match a session.
+    The alarms are grouped so that the matches are computed only once per group.
+    The groups are found with the titles already stored in the DB, and the titles are only resolved, which might
+    require requests to TMDB, for the groups that are matched.
+    """
+
+    groups: Dict[Tuple, List[models.Alarm]]
+    titles: Dict[Tuple, List[str]]
+    resolved: Set[Tuple]
+    tmdb_index: Dict[Tuple[int, bool], Set[Tuple]]
+    title_index: Dict[str, Set[Tuple]]
+
+    def __init__(self, session: sqlalchemy.orm.Session, alarms: List[models.Alarm]):
+        self.groups = dict()
+        self.titles = dict()
+        self.resolved = set()
+        self.tmdb_index = dict()
+        self.title_index = dict()
+
+        # Group the alarms by their match key
+        for a in alarms:
+            self.groups.setdefault(get_alarm_match_key(a), []).append(a)
+
+        nb_alarms = sum(len(group) for group in self.groups.values())
+
+        if nb_alarms > 0:
+            print('Alarms: %d alarms in %d groups (%.1f%% deduplicated)!'
+                  % (nb_alarms, len(self.groups), 100 * (1 - len(self.groups) / nb_alarms)))
+
+        # Get the stored titles of all the shows at once
+        tmdb_ids = list({a.trakt_id for a in alarms if a.alarm_type != response_models.AlarmType.LISTINGS.value})
+        stored_titles = dict()
+
+        for show_titles in db_calls.get_shows_titles(session, tmdb_ids):
+            stored_titles[(show_titles.tmdb_id, show_titles.is_movie)] = show_titles.titles.split('|')
+
+        for key, group in self.groups.items():
+            a = group[0]
+
+            if a.alarm_type == response_models.AlarmType.LISTINGS.value:
+                titles = [a.show_name]
+                self.resolved.add(key)
+            else:
+                titles = stored_titles.get((a.trakt_id, a.is_movie))
+
+                # The titles that were never stored are resolved right away, so that the group can be found by them
+                if titles is None:
+                    titles = get_show_titles(session, a.trakt_id, a.is_movie)
+                    self.resolved.add(key)
+
+                self.tmdb_index.setdefault((a.trakt_id, a.is_movie), set()).add(key)
+
+            self.add_titles(key, titles)
+
+    def add_titles(self, key: Tuple, titles: List[str]):
+        """
+        Set the titles of a group of alarms, adding them to the index of titles.
+
+        :param key: the key of the group.
+        :param titles: the titles.
+        """
+
+        self.titles[key] = titles
+
+        for title in titles:
+            self.title_index.setdefault(auxiliary.make_searchable_title(title), set()).add(key)
+
+    def get_titles(self, session: sqlalchemy.orm.Session, key: Tuple) -> List[str]:
+        """
+        Get the titles of a group of alarms, resolving them if they were taken from the DB.
+
+        :param session: the db session.
+        :param key: the key of the group.
+        :return: the titles.
+        """
+
+        if key not in self.resolved:
+            a = self.groups[key][0]
+
+            self.add_titles(key, get_show_titles(session, a.trakt_id, a.is_movie))
+            self.resolved.add(key)
+
+        return self.titles[key]
+
+    def search_show_data(self, show_data: models.ShowData) -> Set[Tuple]:
+        """
+        Get the keys of the groups of alarms that might match the sessions of a show.
+
+        :param show_data: the show config.
+        :return: the keys of the groups.
+        """
+
+        # Shows with a TMDB match are only found by their id, while the others are only found by their title
+        if show_data.tmdb_id is not None:
+            return self.tmdb_index.get((show_data.tmdb_id, show_data.is_movie), set())
+        else:
+            return self.title_index.get(show_data.search_title, set())
+
+
+def get_alarms_results(session: sqlalchemy.orm.Session, alarm_index: AlarmIndex, index: AlarmSessionIndex,
+                       users: Dict[int, models.User], keys: Optional[Set[Tuple]] = None) \
+        -> Dict[int, List[List[response_models.LocalShowResult]]]:
+    """
+    Match the alarms against the indexed sessions.
+    The matches are computed only once per group of alarms, and only then are the filters of each user applied.
 
     :param session: the db session.
+    :param alarm_index: the index of the alarms.
+    :param index: the index of the sessions.
+    :param users: the owners of the alarms, by id.
+    :param keys: the keys of the groups of alarms to match, or None for all of them.
+    :return: for each user, the list of results of each of their alarms with matches.
     """
 
-    alarms = db_calls.get_alarms(session)
+    if keys is None:
+        keys = alarm_index.groups.keys()
+
+    # Get the excluded channels of all users at once
+    excluded_channels = dict()
+
+    for excluded_channel in db_calls.get_users_excluded_channels(session, list(users.keys())):
+        excluded_channels.setdefault(excluded_channel.user_id, set()).add(excluded_channel.channel_id)
+
+    alarms_results = dict()
+
+    for key in keys:
+        group = alarm_index.groups[key]
+
+        matches = match_alarm(group[0], alarm_index.get_titles(session, key), index)
+
+        if len(matches) == 0:
+            continue
+
+        # Fan out the matches to the owners of the alarms
+        for group_alarm in group:
+            user = users.get(group_alarm.user_id)
+
+            if user is None:
+                continue
+
+            results = filter_alarm_matches(matches, user.show_adult, excluded_channels.get(user.id, set()))
+
+            if len(results) > 0:
+                alarms_results.setdefault(user.id, []).append(results)
+
+    return alarms_results
+
+
+def send_alarms_results(alarms_results: Dict[int, List[List[response_models.LocalShowResult]]],
+                        users: Dict[int, models.User]):
+    """
+    Send the results of the alarms, with a single email per user with the results of all of their alarms.
+
+    :param alarms_results: for each user, the list of results of each of their alarms with matches.
+    :param users: the owners of the alarms, by id.
+    """
+
+    emails = []
 
-    for a in alarms:
-        user = db_calls.get_user_id(session, a.user_id)
-        search_adult = user.show_adult if user is not None else False
+    for user_id, results_list in alarms_results.items():
+        user = users[user_id]
 
-        if a.alarm_type == response_models.AlarmType.LISTINGS.value:
-            titles = [a.show_name]
+        user_results = dict()
 
-            db_shows = []
+        for results in results_list:
+            for r in results:
+                user_results[r.id] = r
+
+        emails.append((user.email, user.language, sorted(user_results.values(), key=lambda r: (r.date_time, r.id))))
+
+    if len(emails) > 0:
+        process_emails.send_alarms_emails(emails)
+
+
+def get_alarms_users(session: sqlalchemy.orm.Session, alarms: List[models.Alarm]) -> Dict[int, models.User]:
+    """
+    Get the owners of a list of alarms.
+
+    :param session: the db session.
+    :param alarms: the alarms.
+    :return: the owners of the alarms, by id.
+    """
+
+    users = dict()
+
+    for user in db_calls.get_users_ids(session, list({a.user_id for a in alarms})):
+        users[user.id] = user
+
+    return users
+
+
+def process_alarms_list(session: sqlalchemy.orm.Session, alarms: List[models.Alarm],
+                        below_datetime: Optional[datetime.datetime]):
+    """
+    Process a list of alarms, against the sessions updated after a given datetime.
+    The sessions are loaded once and every alarm is matched against them in memory.
+    Each user receives a single email with the results of all of their alarms.
+
+    :param session: the db session.
+    :param alarms: the alarms.
+    :param below_datetime: the datetime of the last processing of the alarms.
+    """
+
+    if len(alarms) == 0:
+        return
+
+    db_shows = db_calls.search_updated_show_sessions_data(session, below_datetime)
+    index = AlarmSessionIndex(db_shows)
+
+    users = get_alarms_users(session, alarms)
+    alarm_index = AlarmIndex(session, alarms)
+
+    send_alarms_results(get_alarms_results(session, alarm_index, index, users), users)
+
+
+def init_alarms_shard_worker():
+    """ Prepare a worker process for the processing of the alarms, with its own connections to the DB. """
+
+    engine = sqlalchemy.create_engine(configuration.database_url, encoding='utf-8',
+                                      pool_recycle=configuration.pool_recycle, pool_pre_ping=True)
+    configuration.Session = sqlalchemy.orm.sessionmaker(bind=engine)
+
+
+def process_alarms_shard(shard: int, nb_shards: int, below_datetime: Optional[datetime.datetime]) \
+        -> Tuple[int, bool, float]:
+    """
+    Process the alarms of a shard, in its own db session.
+    When successful, the datetime of the processing is registered for the shard, so that it is not processed again.
+
+    :param shard: the number of the shard.
+    :param nb_shards: the total number of shards.
+    :param below_datetime: the datetime of the last processing of the alarms of the shard.
+    :return: the number of the shard, whether it succeeded and how long it took, in seconds.
+    """
+
+    start_time = time.time()
+    processing_datetime = datetime.datetime.utcnow()
+
+    session = configuration.Session()
+
+    try:
+        process_alarms_list(session, db_calls.get_alarms_shard(session, shard, nb_shards), below_datetime)
+        session.commit()
+        success = db_calls.register_alarms_shard_update(session, nb_shards, shard, processing_datetime) is not None
+    except Exception as e:
+        session.rollback()
+        print('ERROR: Alarms shard %d failed: %s' % (shard, str(e)))
+        success = False
+    finally:
+        session.close()
+
+    return shard, success, time.time() - start_time
+
+
+def process_alarms_sharded(session: sqlalchemy.orm.Session, below_datetime: Optional[datetime.datetime]) -> bool:
+    """
+    Process the alarms partitioned by user across configuration.alarm_shards worker processes.
+    Each shard starts from its own last successful processing, when more recent than the one of all the alarms.
+
+    :param session: the db session.
+    :param below_datetime: the datetime of the last processing of all the alarms.
+    :return: True if every shard succeeded.
+    """
+
+    nb_shards = configuration.alarm_shards
+    shards_updates = db_calls.get_alarms_shards_updates(session, nb_shards)
+
+    shards_args = []
+
+    for shard in range(nb_shards):
+        shard_datetime = shards_updates.get(shard)
+
+        # A shard that succeeded in a run in which others failed does not process the same sessions again
+        if shard_datetime is not None and (below_datetime is None or shard_datetime > below_datetime):
+            shards_args.append((shard, nb_shards, shard_datetime))
         else:
-            titles = get_show_titles(session, a.trakt_id, a.is_movie)
+            shards_args.append((shard, nb_shards, below_datetime))
 
-            db_shows = search_sessions_db_with_tmdb_id(session, a.trakt_id, a.is_movie, only_new=True,
-                                                       show_season=a.show_season, show_episode=a.show_episode,
-                                                       use_excluded_channels=True, user_id=user.id)
+    # The workers inherit the configuration and the email templates from this process
+    with multiprocessing.get_context('fork').Pool(nb_shards, initializer=init_alarms_shard_worker) as pool:
+        shards_results = pool.starmap(process_alarms_shard, shards_args)
 
-        db_shows += search_sessions_db(session, titles, a.is_movie, complete_title=True, only_new=True,
-                                       show_season=a.show_season, show_episode=a.show_episode,
-                                       search_adult=search_adult, use_excluded_channels=True, user_id=user.id,
-                                       ignore_with_tmdb_id=True)
+    for shard, success, duration in shards_results:
+        print('Alarms shard %d/%d: %s in %.2f seconds!'
+              % (shard + 1, nb_shards, 'processed' if success else 'failed', duration))
 
-        if len(db_shows) > 0:
-            process_emails.set_language(user.language)
-            process_emails.send_alarms_email(user.email, db_shows)
+    return all(success for _, success, _ in shards_results)
+
+
+def process_alarms(session: sqlalchemy.orm.Session):
+    """
+    Process the alarms that exist in the DB, against the sessions updated since the last processing.
+    When configuration.alarm_shards is bigger than one, the alarms are processed across worker processes.
+
+    :param session: the db session.
+    """
+
+    below_datetime = get_last_update_alarms_datetime(session)
+
+    if configuration.alarm_shards > 1:
+        # Only advance the datetime of the last processing if every shard succeeded, so that none is skipped
+        if not process_alarms_sharded(session, below_datetime):
+            print('WARNING: Not all alarms shards succeeded, the failed ones will be processed again in the next run!')
+            return
+    else:
+        process_alarms_list(session, db_calls.get_alarms(session), below_datetime)
 
     # Update the datetime of the last processing of the alarms
     last_update = db_calls.get_last_update(session)
@@ -533,6 +1085,52 @@ def process_alarms(session: sqlalchemy.orm.Session):
     db_calls.commit(session)
 
 
+def process_alarm_events(session: sqlalchemy.orm.Session):
+    """
+    Process the alarms incrementally, only for the sessions registered as new since the last processing.
+    Only the groups of alarms whose ids or titles match the new sessions are evaluated.
+
+    :param session: the db session.
+    """
+
+    events = db_calls.get_new_session_events(session)
+
+    if len(events) == 0:
+        return
+
+    alarms = db_calls.get_alarms(session)
+
+    if len(alarms) > 0:
+        db_shows = db_calls.search_show_sessions_data_ids(session, list({e.session_id for e in events}))
+
+        if len(db_shows) > 0:
+            alarm_index = AlarmIndex(session, alarms)
+
+            # Get the groups of alarms that might match the new sessions
+            keys = set()
+
+            for s in db_shows:
+                keys.update(alarm_index.search_show_data(s[2]))
+
+            print('Alarm events: %d new sessions for %d groups of alarms!' % (len(db_shows), len(keys)))
+
+            if len(keys) > 0:
+                # Only the titles and the owners of the groups that might match are needed
+                users = get_alarms_users(session, [a for key in keys for a in alarm_index.groups[key]])
+
+                alarms_results = get_alarms_results(session, alarm_index, AlarmSessionIndex(db_shows), users, keys)
+                send_alarms_results(alarms_results, users)
+
+    db_calls.delete_new_session_events(session, [e.id for e in events])
+
+    # Keep the datetime of the last processing of the alarms, in case the daily processing is used again
+    last_update = db_calls.get_last_update(session)
+
+    if last_update is not None:
+        last_update.alarms_datetime = datetime.datetime.utcnow()
+        db_calls.commit(session)
+
+
 def get_last_update_alarms_datetime(session: sqlalchemy.orm.Session) -> Optional[datetime.datetime]:
     """
     Get the datetime of the last processing of the alarms.
@@ -634,8 +1232,7 @@ def send_verification_email(user: models.User):
 
     verification_token = authentication.generate_token(user.id, authentication.TokenType.VERIFICATION)
 
-    process_emails.set_language(user.language)
-    return process_emails.send_verification_email(user.email, verification_token)
+    return process_emails.send_verification_email(user.email, user.language, verification_token)
 
 
 def send_deletion_email(session, user_id: str) -> bool:
@@ -654,8 +1251,7 @@ def send_deletion_email(session, user_id: str) -> bool:
 
     deletion_token = authentication.generate_token(user.id, authentication.TokenType.DELETION, session)
 
-    process_emails.set_language(user.language)
-    return process_emails.send_deletion_email(user.email, deletion_token)
+    return process_emails.send_deletion_email(user.email, user.language, deletion_token)
 
 
 def send_change_email_old(session, user_id: str) -> bool:
@@ -675,8 +1271,7 @@ def send_change_email_old(session, user_id: str) -> bool:
     change_email_old_token = authentication.generate_token(user.id, authentication.TokenType.CHANGE_EMAIL_OLD,
                                                            session)
 
-    process_emails.set_language(user.language)
-    return process_emails.send_change_email_old(user.email, change_email_old_token)
+    return process_emails.send_change_email_old(user.email, user.language, change_email_old_token)
 
 
 def send_change_email_new(session, change_token_old: str, new_email: str) -> (bool, bool):
@@ -715,8 +1310,7 @@ def send_change_email_new(session, change_token_old: str, new_email: str) -> (bo
     change_email_new_token = authentication.generate_change_token(user.id, authentication.TokenType.CHANGE_EMAIL_NEW,
                                                                   changes).decode()
 
-    process_emails.set_language(user.language)
-    return process_emails.send_change_email_new(new_email, change_email_new_token, user.email), True
+    return process_emails.send_change_email_new(new_email, user.language, change_email_new_token, user.email), True
 
 
 def send_password_recovery_email(session, user_id: str) -> bool:
@@ -736,8 +1330,7 @@ def send_password_recovery_email(session, user_id: str) -> bool:
     password_recovery_token = authentication.generate_token(user.id, authentication.TokenType.PASSWORD_RECOVERY,
                                                             session)
 
-    process_emails.set_language(user.language)
-    return process_emails.send_password_recovery_email(user.email, password_recovery_token)
+    return process_emails.send_password_recovery_email(user.email, user.language, password_recovery_token)
 
 
 def check_login(session, email: str, password: str):
@@ -759,12 +1352,7 @@ def check_login(session, email: str, password: str):
     else:
         user_password = user.password
 
-    try:
-        valid = fb.check_password_hash(user_password, password)
-    except (TypeError, ValueError):
-        valid = False
-
-    return valid
+    return run_bcrypt(check_hash, user_password, password)
 
 
 def get_user_by_email(session, email: str):
@@ -795,6 +1383,8 @@ def logout(session, refresh_token: str):
         session.delete(token)
         session.commit()
 
+    authentication.invalidate_refresh_token(refresh_token)
+
 
 def delete_user(session, deletion_token: str):
     """
@@ -950,11 +1540,8 @@ def calculate_score_highlights_week(session: sqlalchemy.orm.Session, year: int,
     start_datetime = datetime.datetime.combine(week_start, datetime.time(0, 0, 0))
     end_datetime = datetime.datetime.combine(week_end, datetime.time(23, 59, 59))
 
-    # Get the top movies
-    shows = db_calls.get_highest_scored_shows_interval(session, start_datetime, end_datetime, True)
-
-    # Get the top tv shows
-    shows += db_calls.get_highest_scored_shows_interval(session, start_datetime, end_datetime, False)
+    # Get the top movies and tv shows
+    shows = db_calls.get_highest_scored_shows_interval(session, start_datetime, end_datetime)
 
     id_list = []
 
@@ -979,11 +1566,8 @@ def calculate_new_highlights_week(session: sqlalchemy.orm.Session, year: int, we
     start_datetime = datetime.datetime.combine(week_start, datetime.time(0, 0, 0))
     end_datetime = datetime.datetime.combine(week_end, datetime.time(23, 59, 59))
 
-    # Get the new movies
-    shows = db_calls.get_new_shows_interval(session, start_datetime, end_datetime, True)
-
-    # Get the new tv shows
-    shows += db_calls.get_new_shows_interval(session, start_datetime, end_datetime, False)
+    # Get the new movies and tv shows
+    shows = db_calls.get_new_shows_interval(session, start_datetime, end_datetime)
 
     id_list = []
     season_list = []
@@ -1012,21 +1596,28 @@ def update_tmdb_data_week(session: sqlalchemy.orm.Session, year: int, week: int)
 
     shows = db_calls.get_shows_interval(session, start_datetime, end_datetime)
 
-    for s in shows:
-        if s.is_movie and (s.year is None or s.year < 2010):
-            continue
+    # Ignore the older movies
+    shows = [s for s in shows if s.tmdb_id is not None and not (s.is_movie and (s.year is None or s.year < 2010))]
 
-        tmdb_show = tmdb_calls.get_show_using_id(session, s.tmdb_id, s.is_movie)
+    stats = dict()
+
+    tmdb_shows = tmdb_calls.get_shows_using_ids(session, [(s.tmdb_id, s.is_movie) for s in shows],
+                                                max_age=datetime.timedelta(hours=configuration.tmdb_refresh_hours),
+                                                stats=stats)
+
+    for s in shows:
+        tmdb_show = tmdb_shows.get((s.tmdb_id, s.is_movie))
 
         if tmdb_show:
             s.tmdb_vote_count = tmdb_show.vote_count
             s.tmdb_vote_average = tmdb_show.vote_average
             s.tmdb_popularity = tmdb_show.popularity
 
-            time.sleep(0.1)
-
     db_calls.commit(session)
 
+    print('TMDB data of the week %d/%d: %d shows cached, %d requested, %d failed, in %.1f seconds!'
+          % (week, year, stats['cached'], stats['requested'], stats['failed'], stats['seconds']))
+
 
 def recover_password(session: sqlalchemy.orm.Session, recover_token: str, new_password: str):
     """
@@ -1114,6 +1705,7 @@ def calculate_highlights(db_session: sqlalchemy.orm.Session):
     (year, week, _) = today.isocalendar()
 
     get_highlights_week(db_session, year, week)
+    store_highlights_payload(db_session, year, week)
 
     # Then the week after
     if week == 52:
@@ -1123,6 +1715,75 @@ def calculate_highlights(db_session: sqlalchemy.orm.Session):
         week = week + 1
 
     get_highlights_week(db_session, year, week)
+    store_highlights_payload(db_session, year, week)
+
+    # Discard the cached responses with the highlights
+    db_calls.increment_data_generation(db_session)
+
+
+def get_highlight_legacy_shows(db_highlight: models.Highlights) -> List[Tuple[int, Optional[int]]]:
+    """
+    Get the shows of a highlight from its legacy lists, of comma-separated ids and seasons.
+
+    :param db_highlight: the highlight.
+    :return: the list of shows, each as a tuple with the id of the ShowData and the season that premieres.
+    """
+
+    id_list = db_highlight.id_list.split(',') if db_highlight.id_list else []
+    season_list = db_highlight.season_list.split(',') if db_highlight.season_list is not None else None
+
+    shows = []
+
+    for i in range(len(id_list)):
+        if id_list[i] == '':
+            continue
+
+        season = None
+
+        if season_list is not None and season_list[i] != '-1':
+            season = int(season_list[i])
+
+        shows.append((int(id_list[i]), season))
+
+    return shows
+
+
+def migrate_highlights_shows(db_session: sqlalchemy.orm.Session) -> int:
+    """
+    Fill HighlightShow with the shows of the highlights registered before it existed.
+    It can run multiple times, since it only changes the highlights without shows.
+    The shows that no longer exist are skipped, since they can not be referenced.
+
+    :param db_session: the DB session.
+    :return: the number of highlights migrated.
+    """
+
+    nb_migrated = 0
+
+    highlights_shows = [(h, get_highlight_legacy_shows(h)) for h in db_calls.get_highlights_without_shows(db_session)]
+
+    # Get the shows that still exist, with a single query
+    show_ids = list({show_id for _, shows in highlights_shows for show_id, _ in shows})
+    existing_show_ids = {db_show.id for db_show in db_calls.get_show_data_ids(db_session, show_ids)}
+
+    for db_highlight, shows in highlights_shows:
+        missing_show_ids = [show_id for show_id, _ in shows if show_id not in existing_show_ids]
+
+        if len(missing_show_ids) > 0:
+            print('WARNING: The shows %s of the highlight %d no longer exist!' % (missing_show_ids, db_highlight.id))
+
+            shows = [s for s in shows if s[0] in existing_show_ids]
+
+        for position in range(len(shows)):
+            show_id, season = shows[position]
+            db_session.add(models.HighlightShow(db_highlight.id, position, show_id, season))
+
+        if len(shows) > 0:
+            nb_migrated += 1
+
+    db_calls.commit(db_session)
+
+    return nb_migrated
 
 
 def get_response_highlights_week(db_session: sqlalchemy.orm.Session, year: int, week: int) \
@@ -1138,34 +1799,42 @@ def get_response_highlights_week(db_session: sqlalchemy.orm.Session, year: int,
 
     highlights = []
 
-    # Convert the highlights from the DB to the format of the response
-    for db_highlight in [db_calls.get_week_highlights(db_session, models.HighlightsType.SCORE, year, week),
-                         db_calls.get_week_highlights(db_session, models.HighlightsType.NEW, year, week)]:
-        if db_highlight is None:
-            continue
+    db_highlights = [db_calls.get_week_highlights(db_session, models.HighlightsType.SCORE, year, week),
+                     db_calls.get_week_highlights(db_session, models.HighlightsType.NEW, year, week)]
+    db_highlights = [h for h in db_highlights if h is not None]
 
-        # Create the response highlight
-        highlight = response_models.HighlightResponse.create_from_highlight(db_highlight)
+    # Get the shows of each of the highlights
+    highlights_shows = dict()
 
-        # Create the list of shows for each highlight
-        id_list = db_highlight.id_list.split(',')
-        season_list = None
+    for highlight_show in db_calls.get_highlights_shows(db_session, [h.id for h in db_highlights]):
+        highlights_shows.setdefault(highlight_show.highlight_id, []) \
+            .append((highlight_show.show_id, highlight_show.season))
 
-        if db_highlight.season_list is not None:
-            season_list = db_highlight.season_list.split(',')
+    # The highlights registered before HighlightShow existed, that were not migrated yet, use the legacy lists
+    shows_lists = [highlights_shows.get(h.id) or get_highlight_legacy_shows(h) for h in db_highlights]
 
-        for i in range(len(id_list)):
-            if id_list[i] is None or id_list[i] == '':
-                continue
+    # Get all of the shows of the highlights at once
+    show_ids = list({show_id for shows_list in shows_lists for show_id, _ in shows_list})
 
-            show_id = int(id_list[i])
+    db_shows = {db_show.id: db_show for db_show in db_calls.get_show_data_ids(db_session, show_ids)}
 
-            db_show = db_calls.get_show_data_id(db_session, show_id)
-            tmdb_show = tmdb_calls.get_show_using_id(db_session, db_show.tmdb_id, db_show.is_movie)
+    tmdb_shows = tmdb_calls.get_shows_using_ids(db_session, [(db_show.tmdb_id, db_show.is_movie)
+                                                             for db_show in db_shows.values()])
+
+    # Convert the highlights from the DB to the format of the response
+    for db_highlight, shows_list in zip(db_highlights, shows_lists):
+        # Create the response highlight
+        highlight = response_models.HighlightResponse.create_from_highlight(db_highlight)
+
+        # Create the list of shows for each highlight
+        for show_id, season in shows_list:
+            db_show = db_shows.get(show_id)
 
             if db_show is None:
                 continue
 
+            tmdb_show = tmdb_shows.get((db_show.tmdb_id, db_show.is_movie))
+
             if tmdb_show is None:
                 print('WARNING: SOMETHING IS WRONG WITH THIS ENTRY: ' + str(db_show.id))
                 continue
@@ -1175,11 +1844,56 @@ def get_response_highlights_week(db_session: sqlalchemy.orm.Session, year: int,
             show_dict['show_title'] = db_show.original_title
             show_dict['translated_title'] = db_show.portuguese_title
 
-            if season_list is not None and season_list[i] != '-1':
-                show_dict['season_premiere'] = int(season_list[i])
+            if season is not None:
+                show_dict['season_premiere'] = season
 
             highlight.show_list.append(show_dict)
 
         highlights.append(highlight)
 
     return highlights
+
+
+def serialize_highlights(highlights: List[response_models.HighlightResponse]) -> Tuple[str, str]:
+    """
+    Serialize the response with the highlights.
+
+    :param highlights: the list of response highlights.
+    :return: the serialized response and its ETag.
+    """
+
+    payload = serialization.dumps({'highlight_list': highlights}, sort_keys=True)
+
+    return payload, hashlib.sha256(payload.encode()).hexdigest()
+
+
+def store_highlights_payload(db_session: sqlalchemy.orm.Session, year: int, week: int):
+    """
+    Store the serialized response with the highlights for a given week, so that it is served without assembling it.
+
+    :param db_session: the DB session.
+    :param year: the year.
+    :param week: the week.
+    """
+
+    payload, etag = serialize_highlights(get_response_highlights_week(db_session, year, week))
+
+    db_calls.register_highlights_payload(db_session, year, week, payload, etag)
+
+
+def get_response_highlights_payload(db_session: sqlalchemy.orm.Session, year: int, week: int) -> Tuple[str, str]:
+    """
+    Get the serialized response with the highlights for a given week, assembling it when it was not stored.
+
+    :param db_session: the DB session.
+    :param year: the year.
+    :param week: the week.
+    :return: the serialized response and its ETag.
+    """
+
+    highlights_payload = db_calls.get_highlights_payload(db_session, year, week)
+
+    if highlights_payload is not None:
+        return highlights_payload.payload, highlights_payload.etag
+
+    return serialize_highlights(get_response_highlights_week(db_session, year, week))
@@ -0,0 +1,197 @@
+import datetime
+import heapq
+import time
+from typing import List, Tuple, Dict, Optional
+
+import sqlalchemy.orm
+
+import configuration
+import db_calls
+import models
+import process_emails
+import reminders
+import response_models
+
+
+def get_reminder_fire_datetime(reminder: models.Reminder, show_session: models.ShowSession) -> datetime.datetime:
+    """
+    Get the datetime in which a reminder should be sent, with a precision of minutes.
+
+    :param reminder: the reminder.
+    :param show_session: the corresponding session.
+    :return: the datetime in which the reminder should be sent.
+    """
+
+    return show_session.date_time.replace(second=0, microsecond=0) \
+        - datetime.timedelta(minutes=reminder.anticipation_minutes)
+
+
+class ReminderScheduler:
+    """
+    Keeps the upcoming reminders in a heap, ordered by the datetime in which they should be sent.
+    The heap is refreshed incrementally with the reminders and sessions updated since the last refresh, and the entries
+    that no longer correspond to the current datetime of a reminder are only discarded when they reach the top.
+    """
+
+    heap: List[Tuple[datetime.datetime, int]]
+    fire_datetimes: Dict[int, datetime.datetime]
+    last_refresh: Optional[datetime.datetime]
+
+    def __init__(self):
+        self.heap = []
+        self.fire_datetimes = dict()
+        self.last_refresh = None
+
+    def refresh(self, session: sqlalchemy.orm.Session) -> int:
+        """
+        Add to the heap the reminders created or updated, or whose session was updated, since the last refresh.
+
+        :param session: the db session.
+        :return: the number of reminders whose datetime changed.
+        """
+
+        refresh_datetime = datetime.datetime.utcnow()
+        nb_changes = 0
+
+        for reminder, show_session in db_calls.get_reminders_updated(session, self.last_refresh):
+            fire_datetime = get_reminder_fire_datetime(reminder, show_session)
+
+            if self.fire_datetimes.get(reminder.id) != fire_datetime:
+                self.fire_datetimes[reminder.id] = fire_datetime
+                heapq.heappush(self.heap, (fire_datetime, reminder.id))
+
+                nb_changes += 1
+
+        self.last_refresh = refresh_datetime
+
+        return nb_changes
+
+    def get_next_fire_datetime(self) -> Optional[datetime.datetime]:
+        """
+        Get the datetime of the next reminder, discarding the outdated entries at the top of the heap.
+
+        :return: the datetime of the next reminder, or None if there are none.
+        """
+
+        while len(self.heap) > 0 and self.fire_datetimes.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+        if len(self.heap) == 0:
+            return None
+
+        return self.heap[0][0]
+
+    def get_sleep_seconds(self, now: datetime.datetime) -> float:
+        """
+        Get the number of seconds until the next reminder or the next refresh, whichever comes first.
+
+        :param now: the current datetime.
+        :return: the number of seconds to sleep.
+        """
+
+        sleep_seconds = configuration.reminders_scheduler_refresh_seconds
+        next_fire_datetime = self.get_next_fire_datetime()
+
+        if next_fire_datetime is not None:
+            sleep_seconds = min(sleep_seconds, (next_fire_datetime - now).total_seconds())
+
+        return max(sleep_seconds, 0)
+
+    def fire_due_reminders(self, session: sqlalchemy.orm.Session, now: datetime.datetime) -> int:
+        """
+        Send the reminders that are due, with a single email per user, and delete them.
+        The DB is the source of truth, so reminders deleted or moved since they were added to the heap are not sent.
+        If the sending or the deletion fails, the due entries are kept in the heap, to be fired again.
+
+        :param session: the db session.
+        :param now: the current datetime.
+        :return: the number of reminders sent.
+        """
+
+        next_fire_datetime = self.get_next_fire_datetime()
+
+        if next_fire_datetime is None or next_fire_datetime > now:
+            return 0
+
+        # Remove the due entries from the heap
+        due_entries = []
+
+        while len(self.heap) > 0 and self.heap[0][0] <= now:
+            due_entries.append(heapq.heappop(self.heap))
+
+        # The datetimes in the heap have a precision of minutes, so the reminders are due until the end of the minute,
+        # which keeps the query consistent with the heap for the sessions whose seconds are not zero
+        below_datetime = now.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+
+        try:
+            due_reminders = db_calls.get_due_reminders(session, below_datetime, reminders.MAX_ANTICIPATION_MINUTES)
+
+            users_results = dict()
+            fired_reminders = []
+
+            for reminder, show_session, channel, show_data, user in due_reminders:
+                local_show_result = response_models.LocalShowResult.create_from_show_session(show_session, channel,
+                                                                                             show_data)
+
+                users_results.setdefault(user.id, (user, []))[1].append(local_show_result)
+                fired_reminders.append(reminder.id)
+
+            if len(fired_reminders) > 0:
+                process_emails.send_reminders_emails(
+                    [(user.email, user.language, sorted(results, key=lambda r: r.date_time))
+                     for user, results in users_results.values()])
+
+                db_calls.delete_reminders(session, fired_reminders)
+        except Exception:
+            # Put the due entries back, so that the reminders are not lost
+            for entry in due_entries:
+                heapq.heappush(self.heap, entry)
+
+            raise
+
+        for reminder_id in fired_reminders:
+            self.fire_datetimes.pop(reminder_id, None)
+
+        # The due entries that the DB did not return belong to reminders that were deleted, or whose session moved,
+        # which the refresh schedules again
+        for fire_datetime, reminder_id in due_entries:
+            if self.fire_datetimes.get(reminder_id) == fire_datetime:
+                del self.fire_datetimes[reminder_id]
+
+        return len(fired_reminders)
+
+def main():
+    configuration.initialize()
+    process_emails.initialize()
+
+    scheduler = ReminderScheduler()
+
+    while True:
+        session = configuration.Session()
+
+        try:
+            nb_changes = scheduler.refresh(session)
+
+            if nb_changes > 0:
+                print('Reminder scheduler: %d reminders scheduled!' % nb_changes)
+
+            nb_sent = scheduler.fire_due_reminders(session, datetime.datetime.utcnow())
+
+            if nb_sent > 0:
+                print('Reminder scheduler: %d reminders sent!' % nb_sent)
+
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print('ERROR: Reminder scheduler failed: %s' % str(e))
+
+            # Reload all the reminders from the DB, since the heap may no longer match it
+            scheduler = ReminderScheduler()
+        finally:
+            session.close()
+
+        time.sleep(scheduler.get_sleep_seconds(datetime.datetime.utcnow()))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,9 @@ import models
 import process_emails
 import response_models
 
+# The maximum number of minutes of anticipation of a reminder
+MAX_ANTICIPATION_MINUTES = 1440
+
 
 def get_reminders(session, user_id: int) -> List[response_models.Reminder]:
     """
@@ -21,16 +24,8 @@ def get_reminders(session, user_id: int) -> List[response_models.Reminder]:
     if not user_id:
         return []
 
-    reminder_list = db_calls.get_reminders_user(session, user_id)
-
     # Convert the reminder list to a response reminder list
-    response_reminder_list = []
-
-    for r in reminder_list:
-        reminder_session_tuple = db_calls.get_show_session_complete(session, r.session_id)
-        response_reminder_list.append(response_models.Reminder(r, reminder_session_tuple))
-
-    return response_reminder_list
+    return [response_models.Reminder(r) for r in db_calls.get_reminders_user_complete(session, user_id)]
 
 
 def register_reminder(session: sqlalchemy.orm.Session, show_session_id: int, anticipation_minutes: int, user_id: int) \
@@ -101,28 +96,32 @@ def process_reminders(session: sqlalchemy.orm.Session) -> None:
     :param session: the db session.
     """
 
-    reminders_sessions = db_calls.get_sessions_reminders(session)
+    now = datetime.datetime.utcnow()
+
+    # The query selects the reminders that might be due, since the session's time is rounded down to the hour below
+    due_reminders = db_calls.get_due_reminders(session, now + datetime.timedelta(minutes=65),
+                                               MAX_ANTICIPATION_MINUTES)
 
-    for a_s in reminders_sessions:
-        reminder: models.Reminder = a_s[0]
-        show_session: models.ShowSession = a_s[1]
+    fired_reminders = []
 
-        anticipation_hours = int(reminder.anticipation_minutes / 60)
+    try:
+        for reminder, show_session, channel, show_data, user in due_reminders:
+            anticipation_hours = int(reminder.anticipation_minutes / 60)
 
-        # Replace the time minutes and seconds so that it can ensure the anticipation hours
-        show_time = show_session.date_time.replace(minute=0, second=0) - datetime.timedelta(minutes=5)
+            # Replace the time minutes and seconds so that it can ensure the anticipation hours
+            show_time = show_session.date_time.replace(minute=0, second=0) - datetime.timedelta(minutes=5)
 
-        # If it is time to fire the reminder
-        if datetime.datetime.utcnow() + datetime.timedelta(hours=anticipation_hours) > show_time:
-            show_session_tuple = db_calls.get_show_session_complete(session, show_session.id)
-            user = db_calls.get_user_id(session, reminder.user_id)
+            # If it is not yet time to fire the reminder
+            if now + datetime.timedelta(hours=anticipation_hours) <= show_time:
+                continue
 
-            local_show_result = response_models.LocalShowResult.create_from_show_session(show_session_tuple[0],
-                                                                                         show_session_tuple[1],
-                                                                                         show_session_tuple[2])
+            local_show_result = response_models.LocalShowResult.create_from_show_session(show_session, channel,
+                                                                                         show_data)
 
-            process_emails.set_language(user.language)
-            process_emails.send_reminders_email(user.email, [local_show_result])
+            process_emails.send_reminders_email(user.email, user.language, [local_show_result])
 
-            session.delete(reminder)
-            session.commit()
+            fired_reminders.append(reminder.id)
+    finally:
+        # The reminders already sent are deleted even when one of the others fails, so that they are not sent again
+        if len(fired_reminders) > 0:
+            db_calls.delete_reminders(session, fired_reminders)
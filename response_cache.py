@@ -0,0 +1,100 @@
+import collections
+import hashlib
+import threading
+from typing import Hashable, Optional, Tuple
+
+import compression
+import configuration
+
+# The serialized responses, by endpoint and arguments, with the generation of the data, the ETag and the compressed
+# versions, in LRU order
+responses: collections.OrderedDict = collections.OrderedDict()
+responses_lock = threading.Lock()
+
+
+def get_etag(payload: str) -> str:
+    """
+    Get the ETag of a serialized response, which depends only on its content.
+
+    :param payload: the serialized response.
+    :return: the ETag.
+    """
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_response(key: Hashable, data_generation: int) -> Optional[Tuple[str, str]]:
+    """
+    Get a cached response, if it was built from the current generation of the data.
+
+    :param key: the key of the response, with the endpoint and the arguments.
+    :param data_generation: the current generation of the data.
+    :return: the serialized response and its ETag, when cached.
+    """
+
+    with responses_lock:
+        entry = responses.get(key)
+
+        if entry is None:
+            return None
+
+        # The data changed since the response was built
+        if entry[0] != data_generation:
+            del responses[key]
+            return None
+
+        responses.move_to_end(key)
+
+        return entry[1], entry[2]
+
+
+def store_response(key: Hashable, data_generation: int, payload: str) -> str:
+    """
+    Store a response in the cache, evicting the least recently used ones beyond the size of the cache.
+
+    :param key: the key of the response, with the endpoint and the arguments.
+    :param data_generation: the generation of the data from which the response was built.
+    :param payload: the serialized response.
+    :return: the ETag of the response.
+    """
+
+    etag = get_etag(payload)
+
+    if configuration.response_cache_size <= 0:
+        return etag
+
+    with responses_lock:
+        responses[key] = (data_generation, payload, etag, dict())
+        responses.move_to_end(key)
+
+        while len(responses) > configuration.response_cache_size:
+            responses.popitem(last=False)
+
+    return etag
+
+
+def get_compressed_response(key: Hashable, data_generation: int, encoding: str) -> Optional[bytes]:
+    """
+    Get the compressed version of a cached response, compressing it only the first time it is requested.
+
+    :param key: the key of the response, with the endpoint and the arguments.
+    :param data_generation: the current generation of the data.
+    :param encoding: the encoding, br or gzip.
+    :return: the compressed response, when the response is cached.
+    """
+
+    with responses_lock:
+        entry = responses.get(key)
+
+        if entry is None or entry[0] != data_generation:
+            return None
+
+        compressed_payload = entry[3].get(encoding)
+
+    if compressed_payload is None:
+        compressed_payload = compression.compress(entry[1].encode(), encoding)
+
+        with responses_lock:
+            entry[3][encoding] = compressed_payload
+
+    return compressed_payload
@@ -1,6 +1,8 @@
 import datetime
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import List, Optional
+
+import sqlalchemy.engine
 
 import auxiliary
 import models
@@ -62,25 +64,23 @@ class Reminder:
 
     channel_name: str
 
-    def __init__(self, reminder: models.Reminder,
-                 reminder_session_tuple: Tuple[models.ShowSession, models.Channel, models.ShowData]):
+    def __init__(self, reminder_row: sqlalchemy.engine.Row):
         """
-        Create an instance using a reminder.
+        Create an instance using a row with the information of a reminder, as obtained from the DB.
 
-        :param reminder: the DB reminder.
-        :param reminder_session_tuple: the tuple with all information on a reminder.
+        :param reminder_row: the row with the information of a reminder, with the columns named after the fields.
         """
 
-        self.id = reminder.id
-        self.anticipation_minutes = reminder.anticipation_minutes
-        self.session_id = reminder.session_id
+        self.id = reminder_row.id
+        self.anticipation_minutes = reminder_row.anticipation_minutes
+        self.session_id = reminder_row.session_id
 
-        self.title = reminder_session_tuple[2].portuguese_title
-        self.season = reminder_session_tuple[0].season
-        self.episode = reminder_session_tuple[0].episode
-        self.date_time = reminder_session_tuple[0].date_time
+        self.title = reminder_row.title
+        self.season = reminder_row.season
+        self.episode = reminder_row.episode
+        self.date_time = reminder_row.date_time
 
-        self.channel_name = reminder_session_tuple[1].name
+        self.channel_name = reminder_row.channel_name
 
     def to_dict(self):
         """
@@ -0,0 +1,53 @@
+import datetime
+import json
+from typing import Any
+
+import werkzeug.http
+
+# orjson is used when it is installed, with the json module otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(o: Any) -> Any:
+    """
+    Convert the objects that are not natively serializable, keeping the format of the responses of Flask.
+    The response objects, such as LocalShowResult, Reminder, Alarm and HighlightResponse, are converted with to_dict.
+
+    :param o: the object.
+    :return: the serializable version of the object.
+    """
+
+    to_dict = getattr(o, 'to_dict', None)
+
+    if to_dict is not None:
+        return to_dict()
+
+    # The same format used by Flask
+    if isinstance(o, datetime.date):
+        return werkzeug.http.http_date(o)
+
+    raise TypeError('Object of type %s is not JSON serializable' % type(o).__name__)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """
+    Serialize an object to compact JSON, encoding the response objects directly.
+
+    :param obj: the object, which can contain response objects, at any level.
+    :param sort_keys: whether the keys of the dictionaries are sorted.
+    :return: the JSON.
+    """
+
+    if orjson is not None:
+        # The dates go through default, so that they are formatted as in Flask
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        return orjson.dumps(obj, default=default, option=option).decode()
+
+    return json.dumps(obj, default=default, sort_keys=sort_keys, separators=(',', ':'), ensure_ascii=False)
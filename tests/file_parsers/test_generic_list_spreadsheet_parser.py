@@ -38,6 +38,7 @@ class TestGenericSpreadsheetParser(unittest.TestCase):
     def setUp(self) -> None:
         self.session = unittest.mock.MagicMock()
         configuration.show_sessions_validity_days = 7
+        configuration.alarms_event_driven = False
         configuration.base_dir = base_path + '../'
 
         # Save the datetime.date
@@ -37,6 +37,7 @@ class TestGenericWeeklySpreadsheetParser(unittest.TestCase):
     def setUp(self) -> None:
         self.session = unittest.mock.MagicMock()
         configuration.show_sessions_validity_days = 7
+        configuration.alarms_event_driven = False
         configuration.base_dir = base_path + '../'
 
         # Save the datetime.date
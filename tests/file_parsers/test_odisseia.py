@@ -37,6 +37,7 @@ class TestOdisseia(unittest.TestCase):
     def setUp(self) -> None:
         self.session = unittest.mock.MagicMock()
         configuration.show_sessions_validity_days = 7
+        configuration.alarms_event_driven = False
 
         # Save the datetime.date
         self.datetime_backup = datetime.datetime
@@ -1,4 +1,5 @@
 import datetime
+import time
 import unittest.mock
 
 import globalsub
@@ -16,6 +17,11 @@ db_calls_mock = unittest.mock.MagicMock()
 class TestAuthentication(unittest.TestCase):
     def setUp(self) -> None:
         configuration.secret_key = 'secret key'
+        configuration.token_cache_size = 10
+        configuration.refresh_token_cache_seconds = 60
+
+        authentication.token_payload_cache.clear()
+        authentication.refresh_token_cache.clear()
 
     def tearDown(self) -> None:
         db_calls_mock.reset_mock()
@@ -316,6 +322,12 @@ class TestAuthentication(unittest.TestCase):
         refresh_token = authentication.generate_token(123, authentication.TokenType.REFRESH, unittest.mock.MagicMock())
         db_calls_mock.register_token.return_value = models.Token(refresh_token, expected_expiration_date.date())
 
+        user = models.User('email@something.com', 'password', 'en')
+        user.id = 123
+        user.show_adult = True
+
+        db_calls_mock.get_user_id.return_value = user
+
         # Call the function
         actual_result, actual_token = authentication.generate_access_token(unittest.mock.MagicMock(), refresh_token)
 
@@ -331,6 +343,10 @@ class TestAuthentication(unittest.TestCase):
         self.assertEqual(expected_type, authentication.get_token_field(actual_token, 'type'))
         self.assertEqual(123, authentication.get_token_field(actual_token, 'user'))
 
+        # Verify the claims
+        self.assertTrue(authentication.get_token_field(actual_token, 'show_adult'))
+        self.assertEqual('en', authentication.get_token_field(actual_token, 'language'))
+
     def test_generate_access_token_error_01(self) -> None:
         """ Test the function that generates an access token, with an error due to an invalid REFRESH token. """
 
@@ -346,6 +362,68 @@ class TestAuthentication(unittest.TestCase):
         self.assertFalse(actual_result)
         self.assertIsNone(actual_token)
 
+    def test_generate_access_token_error_02(self) -> None:
+        """ Test the function that generates an access token, with an error due to a user that no longer exists. """
+
+        # Prepare the mocks
+        configuration.REFRESH_TOKEN_VALIDITY_DAYS = 5
+
+        refresh_token = authentication.generate_token(123, authentication.TokenType.REFRESH, unittest.mock.MagicMock())
+        db_calls_mock.get_user_id.return_value = None
+
+        # Call the function
+        actual_result, actual_token = authentication.generate_access_token(unittest.mock.MagicMock(), refresh_token)
+
+        # Verify the result
+        self.assertFalse(actual_result)
+        self.assertIsNone(actual_token)
+
+    def test_refresh_access_token_ok(self) -> None:
+        """ Test the function that refreshes the claims of an access token, keeping its expiration. """
+
+        # Prepare the mocks
+        configuration.ACCESS_TOKEN_VALIDITY_HOURS = 10
+
+        access_token = authentication.generate_token(123, authentication.TokenType.ACCESS,
+                                                     payload_extra={'show_adult': False, 'language': 'pt'})
+
+        user = models.User('email@something.com', 'password', 'en')
+        user.id = 123
+        user.show_adult = True
+
+        db_calls_mock.get_user_id.return_value = user
+
+        session = unittest.mock.MagicMock()
+
+        # Call the function
+        actual_token = authentication.refresh_access_token(session, access_token)
+
+        # Verify the result
+        self.assertEqual('ACCESS', authentication.get_token_field(actual_token, 'type'))
+        self.assertEqual(123, authentication.get_token_field(actual_token, 'user'))
+        self.assertTrue(authentication.get_token_field(actual_token, 'show_adult'))
+        self.assertEqual('en', authentication.get_token_field(actual_token, 'language'))
+        self.assertEqual(authentication.get_token_field(access_token, 'exp'),
+                         authentication.get_token_field(actual_token, 'exp'))
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_user_id.assert_called_with(session, 123)
+
+    def test_refresh_access_token_error(self) -> None:
+        """ Test the function that refreshes the claims of an access token, with an error due to a REFRESH token. """
+
+        # Prepare the mocks
+        configuration.REFRESH_TOKEN_VALIDITY_DAYS = 5
+
+        refresh_token = authentication.generate_token(123, authentication.TokenType.REFRESH, unittest.mock.MagicMock())
+
+        # Call the function
+        actual_token = authentication.refresh_access_token(unittest.mock.MagicMock(), refresh_token)
+
+        # Verify the result
+        self.assertIsNone(actual_token)
+        db_calls_mock.get_user_id.assert_not_called()
+
     def test_validate_token_ok_01(self) -> None:
         """ Test the function that validates a token, with a success case for an ACCESS token. """
 
@@ -453,3 +531,77 @@ class TestAuthentication(unittest.TestCase):
         # Verify the result
         self.assertEqual(expected_result, actual_result)
         db_calls_mock.get_token.assert_called()
+
+    def test_get_token_payload_cache_01(self) -> None:
+        """ Test the function that returns the payload of a token, decoding the same token only once. """
+
+        # Prepare the mocks
+        token = jwt.encode({'key': 'value'}, 'secret key', algorithm='HS256')
+
+        # Call the function
+        with unittest.mock.patch('jwt.decode', wraps=jwt.decode) as decode_mock:
+            for _ in range(3):
+                self.assertEqual({'key': 'value'}, authentication.get_token_payload(token))
+                self.assertEqual('value', authentication.get_token_field(token, 'key'))
+
+        # Verify the calls to the mocks
+        self.assertEqual(1, decode_mock.call_count)
+
+    def test_get_token_payload_cache_02(self) -> None:
+        """ Test the function that returns the payload of a token, with the cached payload expired. """
+
+        # Prepare the mocks
+        token = jwt.encode({'key': 'value', 'exp': datetime.datetime.utcnow() - datetime.timedelta(days=5)},
+                           'secret key', algorithm='HS256')
+
+        authentication.token_payload_cache[authentication.get_token_digest(token)] = \
+            {'key': 'value', 'exp': time.time() - 1}
+
+        # Call the function
+        actual_result = authentication.get_token_payload(token)
+
+        # Verify the result
+        self.assertIsNone(actual_result)
+        self.assertEqual(0, len(authentication.token_payload_cache))
+
+    def test_get_token_payload_cache_03(self) -> None:
+        """ Test the function that returns the payload of a token, with the cache bounded by its size. """
+
+        configuration.token_cache_size = 2
+
+        tokens = [jwt.encode({'key': i}, 'secret key', algorithm='HS256') for i in range(3)]
+
+        # Call the function
+        for token in tokens:
+            authentication.get_token_payload(token)
+
+        # Verify the result
+        self.assertEqual([authentication.get_token_digest(t) for t in tokens[1:]],
+                         list(authentication.token_payload_cache.keys()))
+
+    def test_validate_token_refresh_cache(self) -> None:
+        """ Test the function that validates a token, with the check of the REFRESH token cached until logout. """
+
+        # Prepare the mocks
+        configuration.REFRESH_TOKEN_VALIDITY_DAYS = 5
+
+        refresh_token = authentication.generate_token(123, authentication.TokenType.REFRESH, unittest.mock.MagicMock())
+        db_calls_mock.get_token.return_value = models.Token(refresh_token, datetime.date.today())
+
+        session = unittest.mock.MagicMock()
+
+        # Call the function
+        for _ in range(3):
+            self.assertEqual((True, 123), authentication.validate_token(refresh_token.encode(),
+                                                                        authentication.TokenType.REFRESH, session))
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_token.assert_called_once_with(session, refresh_token.encode())
+
+        # After the logout it is checked in the DB again
+        authentication.invalidate_refresh_token(refresh_token)
+        db_calls_mock.get_token.return_value = None
+
+        self.assertEqual((False, None), authentication.validate_token(refresh_token.encode(),
+                                                                      authentication.TokenType.REFRESH, session))
+        self.assertEqual(2, db_calls_mock.get_token.call_count)
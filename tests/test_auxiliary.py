@@ -179,3 +179,18 @@ class TestAuxiliary(unittest.TestCase):
 
         # Verify the result
         self.assertEqual(expected_result, actual_result)
+
+    def test_token_bucket(self) -> None:
+        """ Test the class TokenBucket, waiting once the initial tokens are taken. """
+
+        bucket = auxiliary.TokenBucket(100, 2)
+
+        # Call the function
+        self.assertEqual(0, bucket.acquire())
+        self.assertEqual(0, bucket.acquire())
+
+        # Verify the result
+        self.assertTrue(bucket.acquire() > 0)
+
+        # Without a rate there is no limit
+        self.assertEqual(0, auxiliary.TokenBucket(0, 1).acquire())
@@ -0,0 +1,73 @@
+import gzip
+import unittest.mock
+
+import flask
+import werkzeug.datastructures
+
+import compression
+import configuration
+
+
+class TestCompression(unittest.TestCase):
+    app: flask.Flask
+
+    def setUp(self) -> None:
+        configuration.compression_min_size = 100
+        configuration.compression_level = 6
+        configuration.brotli_quality = 5
+
+        self.app = flask.Flask(__name__)
+
+    def test_get_encoding(self) -> None:
+        """ Test the function get_encoding, without brotli. """
+
+        with unittest.mock.patch('compression.brotli', None):
+            self.assertEqual('gzip', compression.get_encoding(
+                werkzeug.datastructures.Accept([('br', 1), ('gzip', 1)])))
+
+            self.assertIsNone(compression.get_encoding(werkzeug.datastructures.Accept([('identity', 1)])))
+
+    def test_get_encoding_brotli(self) -> None:
+        """ Test the function get_encoding, preferring brotli when it is installed. """
+
+        with unittest.mock.patch('compression.brotli', unittest.mock.MagicMock()):
+            self.assertEqual('br', compression.get_encoding(werkzeug.datastructures.Accept([('br', 1), ('gzip', 1)])))
+            self.assertEqual('gzip', compression.get_encoding(werkzeug.datastructures.Accept([('gzip', 1)])))
+
+    def test_should_compress(self) -> None:
+        """ Test the function should_compress, with responses of different types and sizes. """
+
+        with self.app.test_request_context():
+            self.assertTrue(compression.should_compress(flask.jsonify(list(range(100)))))
+
+            # Too small
+            self.assertFalse(compression.should_compress(flask.jsonify([1])))
+
+            # Not json
+            self.assertFalse(compression.should_compress(flask.Response(b'0' * 200, mimetype='image/png')))
+
+            # Not successful
+            self.assertFalse(compression.should_compress(flask.make_response(flask.jsonify(list(range(100))), 404)))
+
+    def test_encode_response(self) -> None:
+        """ Test the function encode_response, with gzip. """
+
+        with self.app.test_request_context():
+            response = flask.jsonify(list(range(100)))
+            response.set_etag('1234')
+
+            original_data = response.get_data()
+
+            # Call the function
+            compression.encode_response(response, 'gzip')
+
+            # Verify the result
+            self.assertEqual(original_data, gzip.decompress(response.get_data()))
+
+            self.assertEqual('gzip', response.headers['Content-Encoding'])
+            self.assertEqual(len(response.get_data()), response.content_length)
+            self.assertIn('Accept-Encoding', response.vary)
+            self.assertEqual(('1234', True), response.get_etag())
+
+            # It is no longer compressed
+            self.assertFalse(compression.should_compress(response))
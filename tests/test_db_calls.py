@@ -171,8 +171,8 @@ class TestDBCalls(unittest.TestCase):
         self.assertEqual(channel, actual_result[1])
         self.assertEqual(show_data, actual_result[2])
 
-    def test_get_reminders_error(self) -> None:
-        """ Test the function get_reminders without results. """
+    def test_get_reminders_user_complete_error(self) -> None:
+        """ Test the function get_reminders_user_complete without results. """
 
         # The expected result
         expected_result = []
@@ -182,13 +182,13 @@ class TestDBCalls(unittest.TestCase):
         self.assertIsNotNone(user)
 
         # Call the function
-        actual_result = db_calls.get_reminders_user(self.session, user.id)
+        actual_result = db_calls.get_reminders_user_complete(self.session, user.id)
 
         # Verify the result
         self.assertEqual(expected_result, actual_result)
 
-    def test_get_reminders_ok(self) -> None:
-        """ Test the function get_reminders with results. """
+    def test_get_reminders_user_complete_ok(self) -> None:
+        """ Test the function get_reminders_user_complete with results. """
 
         # Prepare the DB
         user = db_calls.register_user(self.session, 'test_email', 'test_password')
@@ -208,13 +208,14 @@ class TestDBCalls(unittest.TestCase):
         self.assertIsNotNone(reminder)
 
         # Call the function
-        actual_result = db_calls.get_reminders_user(self.session, user.id)
+        actual_result = db_calls.get_reminders_user_complete(self.session, user.id)
 
         # Verify the result
         self.assertEqual(1, len(actual_result))
+        self.assertEqual(reminder.id, actual_result[0].id)
         self.assertEqual(10, actual_result[0].anticipation_minutes)
         self.assertEqual(show_session.id, actual_result[0].session_id)
-        self.assertEqual(user.id, actual_result[0].user_id)
+        self.assertEqual('TEST_CHANNEL', actual_result[0].channel_name)
 
     def test_get_reminders_session_error(self) -> None:
         """ Test the function get reminders associated with a session without results. """
@@ -1928,7 +1929,7 @@ class TestGetHighestScoredShowsInterval(unittest.TestCase):
 
         # Call the function
         actual_result = db_calls.get_highest_scored_shows_interval(self.session, datetime.datetime(2021, 1, 10),
-                                                                   datetime.datetime(2021, 1, 15, 23, 59, 59), True)
+                                                                   datetime.datetime(2021, 1, 15, 23, 59, 59))
 
         # Verify the result
         self.assertIsNotNone(actual_result)
@@ -1938,7 +1939,7 @@ class TestGetHighestScoredShowsInterval(unittest.TestCase):
         self.assertEqual(7, actual_result[0][2])
 
     def test_ok_02(self) -> None:
-        """ Test the function get_highest_scored_shows_interval with three entries, but with limitation set to 1. """
+        """ Test the function get_highest_scored_shows_interval with a tv show and movies, with limitation set to 1. """
 
         # Set the counter to 1
         configuration.score_highlight_counter = 1
@@ -1987,15 +1988,20 @@ class TestGetHighestScoredShowsInterval(unittest.TestCase):
 
         # Call the function
         actual_result = db_calls.get_highest_scored_shows_interval(self.session, datetime.datetime(2021, 1, 10),
-                                                                   datetime.datetime(2021, 1, 15, 23, 59, 59), True)
+                                                                   datetime.datetime(2021, 1, 15, 23, 59, 59))
 
         # Verify the result
         self.assertIsNotNone(actual_result)
 
-        self.assertEqual(1, len(actual_result))
+        # The limit applies to the movies and the tv shows separately, with the movies first
+        self.assertEqual(2, len(actual_result))
+
         self.assertEqual(6789, actual_result[0][1])
         self.assertEqual(5, actual_result[0][2])
 
+        self.assertEqual(1234, actual_result[1][1])
+        self.assertEqual(7, actual_result[1][2])
+
     def test_ok_03(self) -> None:
         """ Test the function get_highest_scored_shows_interval with multiple sessions of the highest scored show. """
 
@@ -2050,7 +2056,7 @@ class TestGetHighestScoredShowsInterval(unittest.TestCase):
 
         # Call the function
         actual_result = db_calls.get_highest_scored_shows_interval(self.session, datetime.datetime(2021, 1, 10),
-                                                                   datetime.datetime(2021, 1, 15, 23, 59, 59), True)
+                                                                   datetime.datetime(2021, 1, 15, 23, 59, 59))
 
         # Verify the result
         self.assertIsNotNone(actual_result)
@@ -2085,7 +2091,7 @@ class TestGetNewShowsInterval(unittest.TestCase):
         configuration.new_highlight_counter = self.highlight_counter_backup
 
     def test_ok_01(self) -> None:
-        """ Test the function get_new_shows_interval, with is_movie=true. """
+        """ Test the function get_new_shows_interval, with movies and tv shows. """
 
         # Set the counter to 50
         configuration.new_highlight_counter = 50
@@ -2162,12 +2168,12 @@ class TestGetNewShowsInterval(unittest.TestCase):
 
         # Call the function
         actual_result = db_calls.get_new_shows_interval(self.session, datetime.datetime(2021, 1, 10),
-                                                        datetime.datetime(2021, 1, 15, 23, 59, 59), True)
+                                                        datetime.datetime(2021, 1, 15, 23, 59, 59))
 
         # Verify the result
         self.assertIsNotNone(actual_result)
 
-        self.assertEqual(2, len(actual_result))
+        self.assertEqual(3, len(actual_result))
 
         self.assertEqual(1234, actual_result[0][1])
         self.assertEqual(datetime.date(2021, 1, 12), actual_result[0][2])
@@ -2177,11 +2183,15 @@ class TestGetNewShowsInterval(unittest.TestCase):
         self.assertEqual(datetime.date(2021, 1, 15), actual_result[1][2])
         self.assertEqual(None, actual_result[1][3])
 
+        self.assertEqual(111, actual_result[2][1])
+        self.assertEqual(datetime.date(2021, 1, 10), actual_result[2][2])
+        self.assertEqual(2, actual_result[2][3])
+
     def test_ok_02(self) -> None:
-        """ Test the function get_new_shows_interval, with is_movie=false. """
+        """ Test the function get_new_shows_interval, with limitation set to 1. """
 
-        # Set the counter to 50
-        configuration.new_highlight_counter = 50
+        # Set the counter to 1
+        configuration.new_highlight_counter = 1
 
         # Prepare the DB
         channel = db_calls.register_channel(self.session, 'TC', 'TEST_CHANNEL')
@@ -2255,16 +2265,20 @@ class TestGetNewShowsInterval(unittest.TestCase):
 
         # Call the function
         actual_result = db_calls.get_new_shows_interval(self.session, datetime.datetime(2021, 1, 10),
-                                                        datetime.datetime(2021, 1, 15, 23, 59, 59), False)
+                                                        datetime.datetime(2021, 1, 15, 23, 59, 59))
 
         # Verify the result
         self.assertIsNotNone(actual_result)
 
-        self.assertEqual(1, len(actual_result))
+        # The first premiere of the movies and of the tv shows
+        self.assertEqual(2, len(actual_result))
+
+        self.assertEqual(1234, actual_result[0][1])
+        self.assertEqual(datetime.date(2021, 1, 12), actual_result[0][2])
 
-        self.assertEqual(111, actual_result[0][1])
-        self.assertEqual(datetime.date(2021, 1, 10), actual_result[0][2])
-        self.assertEqual(2, actual_result[0][3])
+        self.assertEqual(111, actual_result[1][1])
+        self.assertEqual(datetime.date(2021, 1, 10), actual_result[1][2])
+        self.assertEqual(2, actual_result[1][3])
 
 
 class TestHighlights(unittest.TestCase):
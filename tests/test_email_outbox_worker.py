@@ -0,0 +1,161 @@
+import datetime
+import unittest.mock
+
+import dns.exception
+import globalsub
+import sqlalchemy.orm
+
+import configuration
+import db_calls
+import email_outbox_worker
+import models
+import process_emails
+
+# Prepare the mock variables for the modules
+db_calls_mock = unittest.mock.MagicMock()
+process_emails_mock = unittest.mock.MagicMock()
+
+
+class TestEmailOutboxWorker(unittest.TestCase):
+    session: sqlalchemy.orm.Session
+
+    def setUp(self) -> None:
+        self.session = unittest.mock.MagicMock()
+        configuration.email_outbox_batch_size = 10
+        configuration.email_outbox_max_attempts = 3
+
+        db_calls_mock.reset_mock()
+        process_emails_mock.reset_mock()
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        global db_calls_mock, process_emails_mock
+
+        # Replace all references to the modules with mocks
+        globalsub.subs(db_calls, db_calls_mock)
+        globalsub.subs(process_emails, process_emails_mock)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        # Replace back all references to the mocked modules
+        globalsub.restore(db_calls)
+        globalsub.restore(process_emails)
+
+    def test_process_email_outbox_ok_01(self) -> None:
+        """ Test the function process_email_outbox, with an empty outbox. """
+
+        # Prepare the mocks
+        db_calls_mock.get_email_outbox_batch.return_value = []
+
+        # Call the function
+        actual_result = email_outbox_worker.process_email_outbox(self.session)
+
+        # Verify the result
+        self.assertEqual((0, 0, 0), actual_result)
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_email_outbox_batch.assert_called_with(self.session, 10)
+        process_emails_mock.deliver_emails.assert_not_called()
+
+    def test_process_email_outbox_ok_02(self) -> None:
+        """ Test the function process_email_outbox, with emails sent, retried and given up on. """
+
+        # Prepare the mocks
+        email_1 = models.EmailOutbox('Content 1', 'Subject', 'email1@something.com')
+        email_1.id = 1
+        email_1.nb_attempts = 0
+
+        email_2 = models.EmailOutbox('Content 2', 'Subject', 'email2@something.com')
+        email_2.id = 2
+        email_2.nb_attempts = 0
+
+        # This email already failed in the previous attempts
+        email_3 = models.EmailOutbox('Content 3', 'Subject', 'email3@something.com')
+        email_3.id = 3
+        email_3.nb_attempts = 2
+
+        db_calls_mock.get_email_outbox_batch.return_value = [email_1, email_2, email_3]
+        process_emails_mock.deliver_emails.return_value = [True, False, False]
+        process_emails_mock.verify_email.return_value = True
+
+        # Call the function
+        actual_result = email_outbox_worker.process_email_outbox(self.session)
+
+        # Verify the result
+        self.assertEqual((1, 1, 1), actual_result)
+
+        self.assertEqual(1, email_2.nb_attempts)
+        self.assertFalse(email_2.dead)
+        self.assertTrue(email_2.next_attempt_datetime > datetime.datetime.utcnow())
+
+        self.assertEqual(3, email_3.nb_attempts)
+        self.assertTrue(email_3.dead)
+
+        # Verify the calls to the mocks
+        process_emails_mock.deliver_emails.assert_called_with(
+            [('Content 1', 'Subject', 'email1@something.com'), ('Content 2', 'Subject', 'email2@something.com'),
+             ('Content 3', 'Subject', 'email3@something.com')])
+
+        self.session.delete.assert_called_once_with(email_1)
+        db_calls_mock.commit.assert_called_with(self.session)
+
+    def test_process_email_outbox_ok_03(self) -> None:
+        """ Test the function process_email_outbox, with an email to an invalid address. """
+
+        # Prepare the mocks
+        email_1 = models.EmailOutbox('Content 1', 'Subject', 'email1@invalid.com')
+        email_1.id = 1
+        email_1.nb_attempts = 0
+
+        email_2 = models.EmailOutbox('Content 2', 'Subject', 'email2@something.com')
+        email_2.id = 2
+        email_2.nb_attempts = 0
+
+        db_calls_mock.get_email_outbox_batch.return_value = [email_1, email_2]
+        process_emails_mock.deliver_emails.return_value = [False, False]
+        process_emails_mock.verify_email.side_effect = lambda destination: destination != 'email1@invalid.com'
+
+        # Call the function
+        actual_result = email_outbox_worker.process_email_outbox(self.session)
+
+        process_emails_mock.verify_email.side_effect = None
+
+        # Verify the result
+        self.assertEqual((0, 1, 1), actual_result)
+
+        # The email to the invalid address is given up on in the first attempt
+        self.assertEqual(1, email_1.nb_attempts)
+        self.assertTrue(email_1.dead)
+
+        # The email that failed to a valid address is retried
+        self.assertEqual(1, email_2.nb_attempts)
+        self.assertFalse(email_2.dead)
+
+        self.session.delete.assert_not_called()
+        db_calls_mock.commit.assert_called_with(self.session)
+
+    def test_process_email_outbox_ok_04(self) -> None:
+        """ Test the function process_email_outbox, with an error verifying the address of an email. """
+
+        # Prepare the mocks
+        email_1 = models.EmailOutbox('Content 1', 'Subject', 'email1@something.com')
+        email_1.id = 1
+        email_1.nb_attempts = 0
+
+        db_calls_mock.get_email_outbox_batch.return_value = [email_1]
+        process_emails_mock.deliver_emails.return_value = [False]
+        process_emails_mock.verify_email.side_effect = dns.exception.Timeout()
+
+        # Call the function
+        actual_result = email_outbox_worker.process_email_outbox(self.session)
+
+        process_emails_mock.verify_email.side_effect = None
+
+        # Verify the result
+        # The address may be valid, so the email is retried
+        self.assertEqual((0, 1, 0), actual_result)
+
+        self.assertEqual(1, email_1.nb_attempts)
+        self.assertFalse(email_1.dead)
+
+        db_calls_mock.commit.assert_called_with(self.session)
@@ -1,7 +1,9 @@
+import time
 import unittest.mock
 from types import ModuleType
 
 import globalsub
+import google.auth.transport
 import google.oauth2
 
 import configuration
@@ -15,6 +17,39 @@ def verify_oauth2_token_with_error(token, request, client_id):
     raise ValueError()
 
 
+class OfflineResponse(google.auth.transport.Response):
+    """ A response of the OfflineRequest. """
+
+    def __init__(self, status: int, headers: dict, data: bytes):
+        self._status = status
+        self._headers = headers
+        self._data = data
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def headers(self):
+        return self._headers
+
+    @property
+    def data(self):
+        return self._data
+
+
+class OfflineRequest(google.auth.transport.Request):
+    """ A transport that answers with the same response, without going to the network, counting the requests. """
+
+    def __init__(self, response: OfflineResponse):
+        self.response = response
+        self.urls = []
+
+    def __call__(self, url, method='GET', body=None, headers=None, timeout=None, **kwargs):
+        self.urls.append(url)
+        return self.response
+
+
 class TestExternalAuthentication(unittest.TestCase):
     def setUp(self) -> None:
         """ Prepare the mocks for each test. """
@@ -57,7 +92,8 @@ class TestExternalAuthentication(unittest.TestCase):
         self.assertEqual(expected_result, actual_result)
 
         # Verify the calls to the mocks
-        id_token_mock.verify_oauth2_token.assert_called_with('valid token', unittest.mock.ANY, 'google client id')
+        id_token_mock.verify_oauth2_token.assert_called_with('valid token', external_authentication.google_request,
+                                                             'google client id')
 
     def test_external_authentication_error_01(self) -> None:
         """ Test the function external_authentication, with an invalid source. """
@@ -97,3 +133,48 @@ class TestExternalAuthentication(unittest.TestCase):
 
         # Verify the calls to the mocks
         id_token_mock.verify_oauth2_token.assert_called_with('invalid token', unittest.mock.ANY, 'google client id')
+
+    def test_get_max_age(self) -> None:
+        """ Test the function get_max_age. """
+
+        self.assertEqual(19000, external_authentication.get_max_age(
+            {'Cache-Control': 'public, max-age=19000, must-revalidate, no-transform'}))
+        self.assertEqual(0, external_authentication.get_max_age({'Cache-Control': 'no-cache, max-age=100'}))
+        self.assertEqual(0, external_authentication.get_max_age({}))
+
+    def test_cached_request_ok(self) -> None:
+        """ Test the CachedRequest, with the certificates reused while the max-age is valid. """
+
+        # Prepare the mocks
+        offline_request = OfflineRequest(OfflineResponse(200, {'Cache-Control': 'public, max-age=100'}, b'{}'))
+        cached_request = external_authentication.CachedRequest(offline_request)
+
+        # Call the function
+        for _ in range(3):
+            self.assertEqual(b'{}', cached_request('https://certs', method='GET').data)
+
+        # Verify the result
+        self.assertEqual(['https://certs'], offline_request.urls)
+
+        # Expire the cached certificates
+        response, _ = cached_request.cache['https://certs']
+        cached_request.cache['https://certs'] = (response, time.monotonic() - 1)
+
+        cached_request('https://certs', method='GET')
+
+        self.assertEqual(['https://certs', 'https://certs'], offline_request.urls)
+
+    def test_cached_request_error(self) -> None:
+        """ Test the CachedRequest, with the error responses not being cached. """
+
+        # Prepare the mocks
+        offline_request = OfflineRequest(OfflineResponse(500, {'Cache-Control': 'max-age=100'}, b''))
+        cached_request = external_authentication.CachedRequest(offline_request)
+
+        # Call the function
+        cached_request('https://certs', method='GET')
+        cached_request('https://certs', method='GET')
+
+        # Verify the result
+        self.assertEqual(2, len(offline_request.urls))
+        self.assertEqual({}, cached_request.cache)
@@ -110,8 +110,8 @@ class TestGetFileData(unittest.TestCase):
         db_calls_mock.get_user_id.assert_has_calls(
             [unittest.mock.call(self.session, 7), unittest.mock.call(self.session, 4)])
         process_emails_mock.send_deleted_sessions_email.assert_has_calls(
-            [unittest.mock.call('user7@email.com', unittest.mock.ANY),
-             unittest.mock.call('user4@email.com', unittest.mock.ANY)])
+            [unittest.mock.call('user7@email.com', 'pt', unittest.mock.ANY),
+             unittest.mock.call('user4@email.com', 'pt', unittest.mock.ANY)])
         self.session.delete.assert_has_calls(
             [unittest.mock.call(reminder_1), unittest.mock.call(reminder_2), unittest.mock.call(show_session_1),
              unittest.mock.call(show_session_2)])
@@ -0,0 +1,307 @@
+import concurrent.futures
+import email
+import gettext
+import smtplib
+import time
+import unittest.mock
+
+import dns.exception
+import dns.resolver as dnsr
+import jinja2
+
+import configuration
+import process_emails
+import response_models
+
+
+class TestProcessEmails(unittest.TestCase):
+    verify_email_patch: unittest.mock._patch
+    dns_query_patch: unittest.mock._patch
+
+    def setUp(self) -> None:
+        configuration.email_debug = True
+        configuration.email_outbox = False
+        configuration.email_account = 'sender@something.com'
+        configuration.application_name = 'Application'
+        configuration.application_link = 'https://application.com'
+        configuration.email_batch_size = 2
+        configuration.email_batch_interval = 0
+        configuration.email_connections = 1
+        configuration.email_mx_cache_seconds = 60
+        configuration.email_mx_negative_cache_seconds = 10
+        configuration.email_mx_cache_size = 100
+
+        process_emails.close_connections()
+
+        process_emails.DebugSMTP.sent_messages = []
+        process_emails.DebugSMTP.nb_connections = 0
+
+        # Avoid querying the DNS for the domains of the emails
+        self.verify_email_patch = unittest.mock.patch('process_emails.verify_email', return_value=True)
+        self.verify_email_patch.start()
+
+        process_emails.mx_cache.clear()
+
+        self.dns_query_patch = unittest.mock.patch('dns.resolver.query')
+        self.dns_query_mock = self.dns_query_patch.start()
+
+    def tearDown(self) -> None:
+        self.verify_email_patch.stop()
+        self.dns_query_patch.stop()
+        process_emails.close_connections()
+
+    def test_send_email_ok(self) -> None:
+        """ Test the function send_email, reusing the same connection. """
+
+        # Call the function
+        self.assertTrue(process_emails.send_email('Content 1', 'Subject', 'email1@something.com'))
+        self.assertTrue(process_emails.send_email('Content 2', 'Subject', 'email2@something.com'))
+
+        # Verify the result
+        self.assertEqual(1, process_emails.DebugSMTP.nb_connections)
+        self.assertEqual(2, len(process_emails.DebugSMTP.sent_messages))
+
+        from_addr, to_addrs, _ = process_emails.DebugSMTP.sent_messages[0]
+
+        self.assertEqual('sender@something.com', from_addr)
+        self.assertEqual(['email1@something.com'], to_addrs)
+
+    def test_send_email_reconnect(self) -> None:
+        """ Test the function send_email, with the idle connection closed by the server. """
+
+        # Prepare the idle connection
+        self.assertTrue(process_emails.send_email('Content 1', 'Subject', 'email1@something.com'))
+
+        connection = process_emails.smtp_connections.get_nowait()
+        connection.closed = True
+        process_emails.smtp_connections.put(connection)
+
+        # Call the function
+        self.assertTrue(process_emails.send_email('Content 2', 'Subject', 'email2@something.com'))
+
+        # Verify the result
+        self.assertEqual(2, process_emails.DebugSMTP.nb_connections)
+        self.assertEqual(2, len(process_emails.DebugSMTP.sent_messages))
+
+    def test_send_email_refused(self) -> None:
+        """ Test the function send_email, with the recipient refused, which keeps the connection. """
+
+        # Prepare the mocks
+        refused = smtplib.SMTPRecipientsRefused({'email1@something.com': (550, b'No such user')})
+
+        with unittest.mock.patch.object(process_emails.DebugSMTP, 'sendmail', side_effect=refused):
+            self.assertFalse(process_emails.send_email('Content 1', 'Subject', 'email1@something.com'))
+
+        # Verify the result
+        self.assertEqual(1, process_emails.smtp_connections.qsize())
+
+    def test_send_emails_ok(self) -> None:
+        """ Test the function send_emails, with parallel connections. """
+
+        configuration.email_connections = 3
+
+        emails = [('Content %d' % i, 'Subject', 'email%d@something.com' % i) for i in range(7)]
+
+        # Call the function
+        actual_result = process_emails.send_emails(emails)
+
+        # Verify the result
+        self.assertEqual(7, actual_result)
+        self.assertEqual(7, len(process_emails.DebugSMTP.sent_messages))
+
+        self.assertTrue(process_emails.DebugSMTP.nb_connections <= 3)
+        self.assertTrue(process_emails.smtp_connections.qsize() <= 3)
+
+    def test_deliver_emails_error(self) -> None:
+        """ Test the function deliver_emails, with an error in one of the emails, which does not affect the others. """
+
+        emails = [('Content %d' % i, 'Subject', 'email%d@something.com' % i) for i in range(3)]
+
+        # Prepare the mocks
+        def verify_email(destination: str) -> bool:
+            if destination == 'email1@something.com':
+                raise dns.exception.Timeout()
+
+            return True
+
+        # Call the function
+        with unittest.mock.patch('process_emails.verify_email', side_effect=verify_email):
+            actual_result = process_emails.deliver_emails(emails)
+
+        # Verify the result
+        self.assertEqual([True, False, True], actual_result)
+        self.assertEqual(2, len(process_emails.DebugSMTP.sent_messages))
+
+    def test_send_emails_outbox(self) -> None:
+        """ Test the function send_emails, with the emails added to the outbox. """
+
+        configuration.email_outbox = True
+
+        emails = [('Content 1', 'Subject', 'email1@something.com'), ('Content 2', 'Subject', 'email2@something.com')]
+
+        outbox_session = unittest.mock.MagicMock()
+
+        # Call the function
+        with unittest.mock.patch.object(configuration, 'Session', return_value=outbox_session, create=True), \
+                unittest.mock.patch('db_calls.register_emails_outbox', return_value=True) as register_mock:
+            actual_result = process_emails.send_emails(emails)
+
+        # Verify the result
+        self.assertEqual(2, actual_result)
+        self.assertEqual(0, len(process_emails.DebugSMTP.sent_messages))
+
+        register_mock.assert_called_with(outbox_session, emails)
+        outbox_session.close.assert_called()
+
+    def test_verify_domain_cache(self) -> None:
+        """ Test the function verify_domain, with the results cached for both valid and invalid domains. """
+
+        # Prepare the mocks
+        def query(domain_name: str, _):
+            if domain_name != 'valid.com':
+                raise dnsr.NXDOMAIN()
+
+        self.dns_query_mock.side_effect = query
+
+        # Call the function
+        for _ in range(3):
+            self.assertTrue(process_emails.verify_domain('valid.com'))
+            self.assertFalse(process_emails.verify_domain('invalid.com'))
+
+        # Verify the calls to the mocks
+        self.assertEqual(2, self.dns_query_mock.call_count)
+
+    def test_verify_domain_expired(self) -> None:
+        """ Test the function verify_domain, with an expired result in the cache. """
+
+        process_emails.mx_cache['valid.com'] = (False, time.monotonic() - 1)
+
+        # Call the function
+        self.assertTrue(process_emails.verify_domain('valid.com'))
+
+        # Verify the calls to the mocks
+        self.dns_query_mock.assert_called_once_with('valid.com', 'MX')
+
+    def test_verify_domain_evicted(self) -> None:
+        """ Test the function verify_domain, evicting the least recently used domain from the cache. """
+
+        configuration.email_mx_cache_size = 2
+
+        # Call the function
+        process_emails.verify_domain('domain1.com')
+        process_emails.verify_domain('domain2.com')
+        process_emails.verify_domain('domain1.com')
+        process_emails.verify_domain('domain3.com')
+
+        # Verify the result
+        self.assertEqual(['domain1.com', 'domain3.com'], list(process_emails.mx_cache.keys()))
+
+        # Verify the calls to the mocks
+        self.assertEqual(3, self.dns_query_mock.call_count)
+
+    def test_resolve_domains(self) -> None:
+        """ Test the function resolve_domains, verifying each domain once. """
+
+        destinations = ['email%d@domain%d.com' % (i, i % 3) for i in range(9)]
+
+        # Call the function
+        process_emails.resolve_domains(destinations)
+
+        # Verify the result
+        self.assertEqual({'domain0.com', 'domain1.com', 'domain2.com'}, set(process_emails.mx_cache.keys()))
+        self.assertEqual(3, self.dns_query_mock.call_count)
+
+    def prepare_templates(self, templates: dict, messages: dict) -> None:
+        """
+        Prepare the environments of each language, with templates and translations from dictionaries.
+
+        :param templates: the templates, by name.
+        :param messages: the translated messages, by language.
+        """
+
+        class DictTranslations(gettext.NullTranslations):
+            def __init__(self, language_messages):
+                super().__init__()
+                self.language_messages = language_messages
+
+            def gettext(self, message):
+                return self.language_messages.get(message, message)
+
+        for name in ['envs', 'translations', 'templates']:
+            patch = unittest.mock.patch.dict(getattr(process_emails, name), clear=True)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        loader = jinja2.DictLoader(templates)
+
+        for language, language_messages in messages.items():
+            translation = DictTranslations(language_messages)
+
+            language_env = jinja2.Environment(loader=loader, extensions=['jinja2.ext.i18n'])
+            language_env.install_gettext_callables(gettext=translation.gettext, ngettext=translation.ngettext,
+                                                   newstyle=True)
+
+            process_emails.translations[language] = translation
+            process_emails.envs[language] = language_env
+            process_emails.templates[language] = {name: language_env.get_template(name) for name in templates}
+
+    def test_render_template_languages(self) -> None:
+        """ Test the function render_template, rendering concurrently in different languages. """
+
+        self.prepare_templates({'hello.html': '{{ _("hello") }} {{ username }}'},
+                               {'pt': {'hello': 'Olá'}, 'en': {'hello': 'Hello'}})
+
+        languages = ['pt', 'en', 'fr'] * 20
+
+        # Call the function
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            actual_result = list(executor.map(
+                lambda language: process_emails.render_template(language, 'hello.html', username='user'),
+                languages))
+
+        # Verify the result
+        self.assertEqual(['Olá user', 'Hello user', 'Hello user'] * 20, actual_result)
+        self.assertEqual('Olá', process_emails.translate('pt', 'hello'))
+
+    def test_send_reminders_emails_fragments(self) -> None:
+        """ Test the function send_reminders_emails, rendering the fragment of each session once per language. """
+
+        self.prepare_templates(
+            {'reminders_email.html': '{{ title }} {{ username }}:{% for fragment in fragments %} {{ fragment }}'
+                                     '{% endfor %}',
+             'session_fragment.html': '{{ _("at_date") }} {{ show.show_name }}'},
+            {'pt': {'at_date': 'em', 'subject_reminders_results': 'Lembretes'},
+             'en': {'at_date': 'at', 'subject_reminders_results': 'Reminders'}})
+
+        fragment_template = process_emails.templates['pt']['session_fragment.html']
+        fragment_mock = unittest.mock.MagicMock(wraps=fragment_template)
+        process_emails.templates['pt']['session_fragment.html'] = fragment_mock
+
+        result_1 = response_models.LocalShowResult()
+        result_1.id = 1
+        result_1.type = response_models.LocalShowResultType.TV
+        result_1.show_name = 'Show 1'
+
+        result_2 = response_models.LocalShowResult()
+        result_2.id = 2
+        result_2.type = response_models.LocalShowResultType.TV
+        result_2.show_name = 'Show 2'
+
+        reminders_results = [('email%d@something.com' % i, 'pt', [result_1, result_2]) for i in range(5)]
+        reminders_results.append(('email5@something.com', 'en', [result_2]))
+
+        # Call the function
+        actual_result = process_emails.send_reminders_emails(reminders_results)
+
+        # Verify the result
+        self.assertEqual(6, actual_result)
+        self.assertEqual(6, len(process_emails.DebugSMTP.sent_messages))
+
+        contents = [email.message_from_string(m[2]).get_payload(decode=True).decode()
+                    for m in process_emails.DebugSMTP.sent_messages]
+
+        self.assertEqual('Lembretes email0@something.com: em Show 1 em Show 2', contents[0])
+        self.assertEqual('Reminders email5@something.com: at Show 2', contents[5])
+
+        # Verify the calls to the mocks
+        self.assertEqual(2, fragment_mock.render.call_count)
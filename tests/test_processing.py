@@ -1,4 +1,5 @@
 import datetime
+import json
 import unittest.mock
 from typing import Type
 
@@ -35,6 +36,7 @@ class TestProcessing(unittest.TestCase):
     def setUp(self) -> None:
         self.session = unittest.mock.MagicMock()
         configuration.cache_validity_days = 1
+        configuration.alarm_shards = 1
 
         # Save the datetime.date
         self.date_backup = datetime.date
@@ -89,70 +91,70 @@ class TestProcessing(unittest.TestCase):
         """ Test the function process_alarms with an alarm that gets two matches. """
 
         # 1 - Prepare the mocks
-        # The db_calls.get_user_id in process_alarms
-        user = models.User('email', 'pasword', 'pt')
-        user.id = 933
-
-        db_calls_mock.get_user_id.return_value = user
-
         # The db_calls.get_alarms in process_alarms
         alarm = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 933)
 
         db_calls_mock.get_alarms.return_value = [alarm]
 
-        # The db_calls.get_show_titles in get_show_titles
-        show_titles = models.ShowTitles(123, True, 'Title 1|Title 2')
-        show_titles.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
-
-        db_calls_mock.get_show_titles.return_value = show_titles
-
-        # The db_calls.get_last_update in process_alarms -> search_sessions_db_with_tmdb_id ->
-        # get_last_update_alarms_datetime
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
         original_datetime = datetime.datetime(2020, 8, 1, 9)
         last_update = models.LastUpdate(None, original_datetime)
 
         db_calls_mock.get_last_update.return_value = last_update
 
-        # The db_calls.search_show_sessions_data_with_tmdb_id in process_alarms -> search_sessions_db_with_tmdb_id
+        # The db_calls.search_updated_show_sessions_data in process_alarms
         channel = models.Channel('CH', 'Channel')
         channel.id = 76
 
         show_data = models.ShowData('search title', 'Título')
         show_data.id = 27
         show_data.tmdb_id = 123
+        show_data.is_movie = True
 
         show_session = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=2), 76, 27)
+        show_session.id = 1
         show_session.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
 
-        db_calls_mock.search_show_sessions_data_with_tmdb_id.return_value = [(show_session, channel, show_data)]
+        show_data_2 = models.ShowData('_Title_1_', 'Título')
+        show_data_2.id = 28
+
+        show_session_2 = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=3), 76, 28)
+        show_session_2.id = 2
+        show_session_2.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
 
-        # The db_calls.get_user_excluded_channels in process_alarms -> search_sessions_db_with_tmdb_id
-        channel_2 = models.Channel('CH2', 'Channel 2')
-        channel_2.id = 981
+        # A session of a show with a different TMDB id
+        show_data_3 = models.ShowData('search title', 'Outro')
+        show_data_3.id = 29
+        show_data_3.tmdb_id = 124
+        show_data_3.is_movie = True
 
-        user_excluded_channel = models.UserExcludedChannel(933, 981)
+        show_session_3 = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=3), 76, 29)
+        show_session_3.id = 3
 
-        db_calls_mock.get_user_excluded_channels.return_value = [user_excluded_channel]
+        db_calls_mock.search_updated_show_sessions_data.return_value = [(show_session, channel, show_data),
+                                                                         (show_session_2, channel, show_data_2),
+                                                                         (show_session_3, channel, show_data_3)]
 
-        # The db_calls.get_last_update in process_alarms -> search_sessions_db -> get_last_update_alarms_datetime
-        # has been done with return_value
+        # The db_calls.get_users_ids in process_alarms
+        user = models.User('email', 'pasword', 'pt')
+        user.id = 933
 
-        # The db_calls.get_user_excluded_channels in process_alarms -> search_sessions_db
-        db_calls_mock.get_user_excluded_channels.return_value = [user_excluded_channel]
+        db_calls_mock.get_users_ids.return_value = [user]
 
-        # The db_calls.search_show_sessions_data in process_alarms -> search_sessions_db for 'Title 1'
-        show_session_2 = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=3), 76, 27)
-        show_session_2.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
+        # The db_calls.get_users_excluded_channels in process_alarms -> get_alarms_results
+        user_excluded_channel = models.UserExcludedChannel(933, 981)
 
-        db_calls_mock.search_show_sessions_data.side_effect = [[(show_session_2, channel, show_data)], []]
+        db_calls_mock.get_users_excluded_channels.return_value = [user_excluded_channel]
 
-        # The db_calls.search_show_sessions_data in process_alarms -> search_sessions_db
-        # for 'Title 1' has been done with side_effect
+        # The db_calls.get_show_titles in process_alarms -> get_alarms_results -> get_show_titles
+        show_titles = models.ShowTitles(123, True, 'Title 1|Title 2')
+        show_titles.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
 
-        # The process_emails.set_language in process_alarms is void
+        db_calls_mock.get_show_titles.return_value = show_titles
 
-        # The process_emails.send_alarms_email in process_alarms
-        process_emails_mock.send_alarms_email.return_value = True
+        # The process_emails.send_alarms_emails in process_alarms
+        process_emails_mock.send_alarms_emails.reset_mock()
+        process_emails_mock.send_alarms_emails.return_value = 1
 
         # The db_calls.get_last_update in process_alarms has been done with return_value
 
@@ -166,42 +168,29 @@ class TestProcessing(unittest.TestCase):
         self.assertTrue(last_update.alarms_datetime > original_datetime)
 
         # Verify the calls to the mocks
-        db_calls_mock.get_user_id.assert_called_with(self.session, 933)
-
         db_calls_mock.get_alarms.assert_called_with(self.session)
 
-        db_calls_mock.get_show_titles.assert_called_with(self.session, 123, True)
-
-        db_calls_mock.get_last_update.assert_has_calls([unittest.mock.call(self.session),
-                                                        unittest.mock.call(self.session),
-                                                        unittest.mock.call(self.session)])
+        db_calls_mock.search_updated_show_sessions_data.assert_called_with(self.session, original_datetime)
 
-        db_calls_mock.search_show_sessions_data_with_tmdb_id.assert_called_with(self.session, 123, True, None, None,
-                                                                                below_datetime=original_datetime)
+        db_calls_mock.get_users_ids.assert_called_with(self.session, [933])
 
-        db_calls_mock.get_user_excluded_channels.assert_has_calls([unittest.mock.call(self.session, 933),
-                                                                   unittest.mock.call(self.session, 933)])
+        db_calls_mock.get_users_excluded_channels.assert_called_with(self.session, [933])
 
-        db_calls_mock.search_show_sessions_data.assert_has_calls([unittest.mock.call(self.session, '_Title_1_', True,
-                                                                                     None, None, False, True,
-                                                                                     below_datetime=original_datetime,
-                                                                                     ignore_with_tmdb_id=True),
-                                                                  unittest.mock.call(self.session, '_Title_2_', True,
-                                                                                     None, None, False, True,
-                                                                                     below_datetime=original_datetime,
-                                                                                     ignore_with_tmdb_id=True)])
+        db_calls_mock.get_show_titles.assert_called_with(self.session, 123, True)
 
-        process_emails_mock.set_language.assert_called_with('pt')
+        db_calls_mock.get_last_update.assert_has_calls([unittest.mock.call(self.session),
+                                                        unittest.mock.call(self.session)])
 
-        send_alarms_email_calls = process_emails_mock.send_alarms_email.call_args_list
+        process_emails_mock.send_alarms_emails.assert_called_once()
 
-        self.assertEqual(1, len(send_alarms_email_calls))
+        emails = process_emails_mock.send_alarms_emails.call_args[0][0]
 
-        call_args, _ = send_alarms_email_calls[0]
+        self.assertEqual(1, len(emails))
 
-        self.assertEqual('email', call_args[0])
+        destination, language, actual_results = emails[0]
 
-        actual_results = call_args[1]
+        self.assertEqual('email', destination)
+        self.assertEqual('pt', language)
 
         self.assertEqual(2, len(actual_results))
 
@@ -209,11 +198,13 @@ class TestProcessing(unittest.TestCase):
         self.assertEqual('Título', actual_results[0].show_name)
         self.assertEqual('Channel', actual_results[0].service_name)
         self.assertEqual(original_datetime + datetime.timedelta(days=2), actual_results[0].date_time)
+        self.assertEqual('ID', actual_results[0].match_reason)
 
         self.assertEqual(response_models.LocalShowResultType.TV, actual_results[1].type)
         self.assertEqual('Título', actual_results[1].show_name)
         self.assertEqual('Channel', actual_results[1].service_name)
         self.assertEqual(original_datetime + datetime.timedelta(days=3), actual_results[1].date_time)
+        self.assertEqual('NAME', actual_results[1].match_reason)
 
         db_calls_mock.commit.assert_called_with(self.session)
 
@@ -221,64 +212,214 @@ class TestProcessing(unittest.TestCase):
         """ Test the function process_alarms with an alarm that gets two matches, but both from an excluded channel. """
 
         # 1 - Prepare the mocks
-        # The db_calls.get_user_id in process_alarms
+        # The db_calls.get_alarms in process_alarms
+        alarm = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 933)
+
+        db_calls_mock.get_alarms.return_value = [alarm]
+
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+        last_update = models.LastUpdate(None, original_datetime)
+
+        db_calls_mock.get_last_update.return_value = last_update
+
+        # The db_calls.search_updated_show_sessions_data in process_alarms
+        channel = models.Channel('CH', 'Channel')
+        channel.id = 76
+
+        show_data = models.ShowData('search title', 'Título')
+        show_data.id = 27
+        show_data.tmdb_id = 123
+        show_data.is_movie = True
+
+        show_session = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=2), 76, 27)
+        show_session.id = 1
+        show_session.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
+
+        show_data_2 = models.ShowData('_Title_1_', 'Título')
+        show_data_2.id = 28
+
+        show_session_2 = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=3), 76, 28)
+        show_session_2.id = 2
+        show_session_2.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
+
+        db_calls_mock.search_updated_show_sessions_data.return_value = [(show_session, channel, show_data),
+                                                                         (show_session_2, channel, show_data_2)]
+
+        # The db_calls.get_users_ids in process_alarms
         user = models.User('email', 'pasword', 'pt')
         user.id = 933
 
-        db_calls_mock.get_user_id.return_value = user
+        db_calls_mock.get_users_ids.return_value = [user]
 
-        # The db_calls.get_alarms in process_alarms
-        alarm = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 933)
+        # The db_calls.get_users_excluded_channels in process_alarms -> get_alarms_results
+        user_excluded_channel = models.UserExcludedChannel(933, 76)
 
-        db_calls_mock.get_alarms.return_value = [alarm]
+        db_calls_mock.get_users_excluded_channels.return_value = [user_excluded_channel]
 
-        # The db_calls.get_show_titles in get_show_titles
+        # The db_calls.get_show_titles in process_alarms -> get_alarms_results -> get_show_titles
         show_titles = models.ShowTitles(123, True, 'Title 1|Title 2')
         show_titles.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
 
         db_calls_mock.get_show_titles.return_value = show_titles
 
-        # The db_calls.get_last_update in process_alarms -> search_sessions_db_with_tmdb_id ->
-        # get_last_update_alarms_datetime
+        # The process_emails.send_alarms_emails in process_alarms
+        process_emails_mock.send_alarms_emails.reset_mock()
+
+        # The db_calls.commit in process_alarms
+        db_calls_mock.commit.return_value = True
+
+        # 2 - Call the function
+        processing.process_alarms(self.session)
+
+        # 3 - Verify the results
+        self.assertTrue(last_update.alarms_datetime > original_datetime)
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_alarms.assert_called_with(self.session)
+
+        db_calls_mock.search_updated_show_sessions_data.assert_called_with(self.session, original_datetime)
+
+        db_calls_mock.get_users_ids.assert_called_with(self.session, [933])
+
+        db_calls_mock.get_users_excluded_channels.assert_called_with(self.session, [933])
+
+        db_calls_mock.get_show_titles.assert_called_with(self.session, 123, True)
+
+        process_emails_mock.send_alarms_emails.assert_not_called()
+
+        db_calls_mock.commit.assert_called_with(self.session)
+
+    def test_process_alarms_ok_04(self) -> None:
+        """ Test the function process_alarms with alarms filtered by season, episode and adult channels. """
+
+        # 1 - Prepare the mocks
+        # The db_calls.get_alarms in process_alarms
+        alarm = models.Alarm('Série', None, False, response_models.AlarmType.LISTINGS.value, 2, 5, 933)
+        alarm_2 = models.Alarm('Série', None, False, response_models.AlarmType.LISTINGS.value, 2, 5, 934)
+
+        db_calls_mock.get_alarms.return_value = [alarm, alarm_2]
+
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+        last_update = models.LastUpdate(None, original_datetime)
+
+        db_calls_mock.get_last_update.return_value = last_update
+
+        # The db_calls.search_updated_show_sessions_data in process_alarms
+        channel = models.Channel('CH', 'Channel')
+        channel.id = 76
+        channel.adult = True
+
+        show_data = models.ShowData('_Serie_', 'Série')
+        show_data.id = 27
+        show_data.is_movie = False
+
+        show_session = models.ShowSession(2, 5, original_datetime + datetime.timedelta(days=2), 76, 27)
+        show_session.id = 1
+
+        # A session of a different episode
+        show_session_2 = models.ShowSession(2, 6, original_datetime + datetime.timedelta(days=3), 76, 27)
+        show_session_2.id = 2
+
+        db_calls_mock.search_updated_show_sessions_data.return_value = [(show_session, channel, show_data),
+                                                                         (show_session_2, channel, show_data)]
+
+        # The db_calls.get_users_ids in process_alarms
+        user = models.User('email', 'pasword', 'pt')
+        user.id = 933
+        user.show_adult = True
+
+        # This user does not want results from adult channels
+        user_2 = models.User('email2', 'pasword', 'en')
+        user_2.id = 934
+
+        db_calls_mock.get_users_ids.return_value = [user, user_2]
+
+        # The db_calls.get_users_excluded_channels in process_alarms -> get_alarms_results
+        db_calls_mock.get_users_excluded_channels.return_value = []
+
+        # The process_emails.send_alarms_emails in process_alarms
+        process_emails_mock.send_alarms_emails.reset_mock()
+        process_emails_mock.send_alarms_emails.return_value = 1
+
+        # The db_calls.commit in process_alarms
+        db_calls_mock.commit.return_value = True
+
+        # 2 - Call the function
+        processing.process_alarms(self.session)
+
+        # 3 - Verify the results
+        self.assertTrue(last_update.alarms_datetime > original_datetime)
+
+        emails = process_emails_mock.send_alarms_emails.call_args[0][0]
+
+        self.assertEqual(1, len(emails))
+
+        destination, _, actual_results = emails[0]
+
+        self.assertEqual('email', destination)
+
+        self.assertEqual(1, len(actual_results))
+        self.assertEqual(1, actual_results[0].id)
+        self.assertEqual('NAME', actual_results[0].match_reason)
+
+    def test_process_alarms_ok_05(self) -> None:
+        """ Test the function process_alarms with alarms of different users for the same show. """
+
+        # 1 - Prepare the mocks
+        # The db_calls.get_alarms in process_alarms
+        alarm = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 933)
+        alarm_2 = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 934)
+        alarm_3 = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 935)
+
+        db_calls_mock.get_alarms.return_value = [alarm, alarm_2, alarm_3]
+
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
         original_datetime = datetime.datetime(2020, 8, 1, 9)
         last_update = models.LastUpdate(None, original_datetime)
 
         db_calls_mock.get_last_update.return_value = last_update
 
-        # The db_calls.search_show_sessions_data_with_tmdb_id in process_alarms -> search_sessions_db_with_tmdb_id
+        # The db_calls.search_updated_show_sessions_data in process_alarms
         channel = models.Channel('CH', 'Channel')
         channel.id = 76
 
         show_data = models.ShowData('search title', 'Título')
         show_data.id = 27
         show_data.tmdb_id = 123
+        show_data.is_movie = True
 
         show_session = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=2), 76, 27)
-        show_session.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
+        show_session.id = 1
 
-        db_calls_mock.search_show_sessions_data_with_tmdb_id.return_value = [(show_session, channel, show_data)]
+        db_calls_mock.search_updated_show_sessions_data.return_value = [(show_session, channel, show_data)]
 
-        # The db_calls.get_user_excluded_channels in process_alarms -> search_sessions_db_with_tmdb_id
-        user_excluded_channel = models.UserExcludedChannel(933, 76)
+        # The db_calls.get_users_ids in process_alarms
+        user = models.User('email', 'pasword', 'pt')
+        user.id = 933
 
-        db_calls_mock.get_user_excluded_channels.return_value = [user_excluded_channel]
+        user_2 = models.User('email2', 'pasword', 'en')
+        user_2.id = 934
 
-        # The db_calls.get_last_update in process_alarms -> search_sessions_db -> get_last_update_alarms_datetime
-        # has been done with return_value
+        user_3 = models.User('email3', 'pasword', 'en')
+        user_3.id = 935
 
-        # The db_calls.get_user_excluded_channels in process_alarms -> search_sessions_db
-        db_calls_mock.get_user_excluded_channels.return_value = [user_excluded_channel]
+        db_calls_mock.get_users_ids.return_value = [user, user_2, user_3]
 
-        # The db_calls.search_show_sessions_data in process_alarms -> search_sessions_db for 'Title 1'
-        show_session_2 = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=3), 76, 27)
-        show_session_2.update_timestamp = datetime.datetime.utcnow() + datetime.timedelta(hours=38)
+        # The db_calls.get_users_excluded_channels in process_alarms -> get_alarms_results
+        db_calls_mock.get_users_excluded_channels.return_value = [models.UserExcludedChannel(934, 76)]
 
-        db_calls_mock.search_show_sessions_data.side_effect = [[(show_session_2, channel, show_data)], []]
+        # The db_calls.get_show_titles in process_alarms -> get_alarms_results -> get_show_titles
+        show_titles = models.ShowTitles(123, True, 'Title 1')
+        show_titles.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
 
-        # The db_calls.search_show_sessions_data in process_alarms -> search_sessions_db
-        # for 'Title 1' has been done with side_effect
+        db_calls_mock.get_show_titles.reset_mock()
+        db_calls_mock.get_show_titles.return_value = show_titles
 
-        # The db_calls.get_last_update in process_alarms has been done with return_value
+        # The process_emails.send_alarms_emails in process_alarms
+        process_emails_mock.send_alarms_emails.reset_mock()
+        process_emails_mock.send_alarms_emails.return_value = 1
 
         # The db_calls.commit in process_alarms
         db_calls_mock.commit.return_value = True
@@ -286,36 +427,356 @@ class TestProcessing(unittest.TestCase):
         # 2 - Call the function
         processing.process_alarms(self.session)
 
+        # 3 - Verify the results
+        # The titles are only collected once for the three alarms
+        db_calls_mock.get_show_titles.assert_called_once_with(self.session, 123, True)
+
+        # The second user excluded the channel
+        emails = process_emails_mock.send_alarms_emails.call_args[0][0]
+
+        self.assertEqual(2, len(emails))
+        self.assertEqual('email', emails[0][0])
+        self.assertEqual('email3', emails[1][0])
+
+    def test_process_alarms_ok_06(self) -> None:
+        """ Test the function process_alarms with multiple alarms of a user aggregated in a single email. """
+
+        # 1 - Prepare the mocks
+        # The db_calls.get_alarms in process_alarms
+        alarm = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 933)
+        alarm_2 = models.Alarm('Título', None, True, response_models.AlarmType.LISTINGS.value, None, None, 933)
+        alarm_3 = models.Alarm('Outro', None, True, response_models.AlarmType.LISTINGS.value, None, None, 933)
+
+        db_calls_mock.get_alarms.return_value = [alarm, alarm_2, alarm_3]
+
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+        last_update = models.LastUpdate(None, original_datetime)
+
+        db_calls_mock.get_last_update.return_value = last_update
+
+        # The db_calls.search_updated_show_sessions_data in process_alarms
+        channel = models.Channel('CH', 'Channel')
+        channel.id = 76
+        channel.adult = False
+
+        show_data = models.ShowData('_Titulo_', 'Título')
+        show_data.id = 27
+        show_data.tmdb_id = 123
+        show_data.is_movie = True
+
+        show_data_2 = models.ShowData('_Outro_', 'Outro')
+        show_data_2.id = 28
+        show_data_2.is_movie = True
+
+        show_session = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=2), 76, 27)
+        show_session.id = 1
+
+        show_session_2 = models.ShowSession(None, None, original_datetime + datetime.timedelta(days=1), 76, 28)
+        show_session_2.id = 2
+
+        db_calls_mock.search_updated_show_sessions_data.return_value = [(show_session, channel, show_data),
+                                                                         (show_session_2, channel, show_data_2)]
+
+        # The db_calls.get_users_ids in process_alarms
+        user = models.User('email', 'pasword', 'en')
+        user.id = 933
+
+        db_calls_mock.get_users_ids.return_value = [user]
+
+        # The db_calls.get_users_excluded_channels in process_alarms -> get_alarms_results
+        db_calls_mock.get_users_excluded_channels.return_value = []
+
+        # The db_calls.get_show_titles in process_alarms -> get_alarms_results -> get_show_titles
+        show_titles = models.ShowTitles(123, True, 'Título')
+        show_titles.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
+
+        db_calls_mock.get_show_titles.return_value = show_titles
+
+        # The process_emails.send_alarms_emails in process_alarms
+        process_emails_mock.send_alarms_emails.reset_mock()
+        process_emails_mock.send_alarms_emails.return_value = 1
+
+        # The db_calls.commit in process_alarms
+        db_calls_mock.commit.return_value = True
+
+        # 2 - Call the function
+        processing.process_alarms(self.session)
+
+        # 3 - Verify the results
+        process_emails_mock.send_alarms_emails.assert_called_once()
+
+        emails = process_emails_mock.send_alarms_emails.call_args[0][0]
+
+        self.assertEqual(1, len(emails))
+
+        destination, language, actual_results = emails[0]
+
+        self.assertEqual('email', destination)
+        self.assertEqual('en', language)
+
+        # The session matched by two alarms only appears once, and the results are sorted by date
+        self.assertEqual([2, 1], [r.id for r in actual_results])
+
+    def test_process_alarms_sharded_01(self) -> None:
+        """ Test the function process_alarms, in sharded mode, with a shard that failed. """
+
+        # 1 - Prepare the mocks
+        configuration.alarm_shards = 4
+
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+        last_update = models.LastUpdate(None, original_datetime)
+
+        db_calls_mock.get_last_update.return_value = last_update
+
+        # 2 - Call the function
+        with unittest.mock.patch('processing.process_alarms_sharded', return_value=False) as sharded_mock:
+            processing.process_alarms(self.session)
+
+        # 3 - Verify the results
+        # The datetime of the last processing is kept, so that the alarms are processed again
+        self.assertEqual(original_datetime, last_update.alarms_datetime)
+
+        sharded_mock.assert_called_with(self.session, original_datetime)
+
+    def test_process_alarms_sharded_02(self) -> None:
+        """ Test the function process_alarms, in sharded mode, with every shard succeeding. """
+
+        # 1 - Prepare the mocks
+        configuration.alarm_shards = 4
+
+        # The db_calls.get_last_update in process_alarms -> get_last_update_alarms_datetime
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+        last_update = models.LastUpdate(None, original_datetime)
+
+        db_calls_mock.get_last_update.return_value = last_update
+
+        db_calls_mock.get_alarms.reset_mock()
+
+        # 2 - Call the function
+        with unittest.mock.patch('processing.process_alarms_sharded', return_value=True):
+            processing.process_alarms(self.session)
+
         # 3 - Verify the results
         self.assertTrue(last_update.alarms_datetime > original_datetime)
 
-        # Verify the calls to the mocks
-        db_calls_mock.get_user_id.assert_called_with(self.session, 933)
+        # The coordinator does not process any alarm itself
+        db_calls_mock.get_alarms.assert_not_called()
 
-        db_calls_mock.get_alarms.assert_called_with(self.session)
+    def test_process_alarms_shard_01(self) -> None:
+        """ Test the function process_alarms_shard, with an error in the shard. """
 
-        db_calls_mock.get_show_titles.assert_called_with(self.session, 123, True)
+        # 1 - Prepare the mocks
+        shard_session = unittest.mock.MagicMock()
 
-        db_calls_mock.get_last_update.assert_has_calls([unittest.mock.call(self.session),
-                                                        unittest.mock.call(self.session),
-                                                        unittest.mock.call(self.session)])
+        # The db_calls.get_alarms_shard in process_alarms_shard
+        db_calls_mock.get_alarms_shard.side_effect = Exception('Connection lost')
+
+        # 2 - Call the function
+        with unittest.mock.patch.object(configuration, 'Session', return_value=shard_session, create=True):
+            shard, success, _ = processing.process_alarms_shard(2, 4, None)
 
-        db_calls_mock.search_show_sessions_data_with_tmdb_id.assert_called_with(self.session, 123, True, None, None,
-                                                                                below_datetime=original_datetime)
+        db_calls_mock.get_alarms_shard.side_effect = None
 
-        db_calls_mock.get_user_excluded_channels.assert_has_calls([unittest.mock.call(self.session, 933),
-                                                                   unittest.mock.call(self.session, 933)])
+        # 3 - Verify the results
+        self.assertEqual(2, shard)
+        self.assertFalse(success)
 
-        db_calls_mock.search_show_sessions_data.assert_has_calls([unittest.mock.call(self.session, '_Title_1_', True,
-                                                                                     None, None, False, True,
-                                                                                     below_datetime=original_datetime,
-                                                                                     ignore_with_tmdb_id=True),
-                                                                  unittest.mock.call(self.session, '_Title_2_', True,
-                                                                                     None, None, False, True,
-                                                                                     below_datetime=original_datetime,
-                                                                                     ignore_with_tmdb_id=True)])
+        db_calls_mock.get_alarms_shard.assert_called_with(shard_session, 2, 4)
 
-        db_calls_mock.commit.assert_called_with(self.session)
+        shard_session.rollback.assert_called()
+        shard_session.commit.assert_not_called()
+        shard_session.close.assert_called()
+
+    def test_process_alarms_shard_02(self) -> None:
+        """ Test the function process_alarms_shard, with a shard that succeeded. """
+
+        # 1 - Prepare the mocks
+        shard_session = unittest.mock.MagicMock()
+
+        # The db_calls.get_alarms_shard in process_alarms_shard
+        db_calls_mock.get_alarms_shard.return_value = []
+
+        # The db_calls.register_alarms_shard_update in process_alarms_shard
+        db_calls_mock.register_alarms_shard_update.reset_mock()
+        db_calls_mock.register_alarms_shard_update.return_value = unittest.mock.MagicMock()
+
+        # 2 - Call the function
+        with unittest.mock.patch.object(configuration, 'Session', return_value=shard_session, create=True):
+            shard, success, _ = processing.process_alarms_shard(1, 4, None)
+
+        # 3 - Verify the results
+        self.assertEqual(1, shard)
+        self.assertTrue(success)
+
+        # The datetime of the processing is registered for the shard, so that it is not processed again
+        db_calls_mock.register_alarms_shard_update.assert_called_once()
+        self.assertEqual((shard_session, 4, 1), db_calls_mock.register_alarms_shard_update.call_args[0][:3])
+
+        shard_session.commit.assert_called()
+        shard_session.close.assert_called()
+
+    def test_process_alarms_sharded_03(self) -> None:
+        """ Test the function process_alarms_sharded, with shards that succeeded in a previous run. """
+
+        # 1 - Prepare the mocks
+        configuration.alarm_shards = 3
+
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+
+        # The db_calls.get_alarms_shards_updates in process_alarms_sharded
+        # Shard 0 succeeded after the last processing of all the alarms, and shard 1 before it
+        db_calls_mock.get_alarms_shards_updates.return_value = {0: datetime.datetime(2020, 8, 1, 10),
+                                                                1: datetime.datetime(2020, 8, 1, 8)}
+
+        pool_mock = unittest.mock.MagicMock()
+        pool_mock.starmap.return_value = [(0, True, 0.1), (1, True, 0.1), (2, False, 0.1)]
+
+        context_mock = unittest.mock.MagicMock()
+        context_mock.Pool.return_value.__enter__.return_value = pool_mock
+
+        # 2 - Call the function
+        with unittest.mock.patch('multiprocessing.get_context', return_value=context_mock):
+            actual_result = processing.process_alarms_sharded(self.session, original_datetime)
+
+        # 3 - Verify the results
+        self.assertFalse(actual_result)
+
+        db_calls_mock.get_alarms_shards_updates.assert_called_with(self.session, 3)
+
+        # Each shard starts from the most recent of its processing and the processing of all the alarms
+        shards_args = pool_mock.starmap.call_args[0][1]
+
+        self.assertEqual([(0, 3, datetime.datetime(2020, 8, 1, 10)), (1, 3, original_datetime),
+                          (2, 3, original_datetime)], shards_args)
+
+    def test_process_alarm_events_ok_01(self) -> None:
+        """ Test the function process_alarm_events without events. """
+
+        # 1 - Prepare the mocks
+        # The db_calls.get_new_session_events in process_alarm_events
+        db_calls_mock.get_new_session_events.return_value = []
+
+        db_calls_mock.get_alarms.reset_mock()
+        db_calls_mock.delete_new_session_events.reset_mock()
+
+        # 2 - Call the function
+        processing.process_alarm_events(self.session)
+
+        # 3 - Verify the results
+        db_calls_mock.get_new_session_events.assert_called_with(self.session)
+        db_calls_mock.get_alarms.assert_not_called()
+        db_calls_mock.delete_new_session_events.assert_not_called()
+
+    def test_process_alarm_events_ok_02(self) -> None:
+        """ Test the function process_alarm_events, only evaluating the alarms that match the new sessions. """
+
+        # 1 - Prepare the mocks
+        # The db_calls.get_new_session_events in process_alarm_events
+        event = models.NewSessionEvent(1)
+        event.id = 10
+
+        event_2 = models.NewSessionEvent(2)
+        event_2.id = 11
+
+        db_calls_mock.get_new_session_events.return_value = [event, event_2]
+
+        # The db_calls.get_alarms in process_alarm_events
+        alarm = models.Alarm(None, 123, True, response_models.AlarmType.DB.value, None, None, 933)
+        alarm_2 = models.Alarm('Série', None, False, response_models.AlarmType.LISTINGS.value, None, None, 934)
+        alarm_3 = models.Alarm(None, 456, True, response_models.AlarmType.DB.value, None, None, 934)
+
+        db_calls_mock.get_alarms.return_value = [alarm, alarm_2, alarm_3]
+
+        # The db_calls.search_show_sessions_data_ids in process_alarm_events
+        channel = models.Channel('CH', 'Channel')
+        channel.id = 76
+        channel.adult = False
+
+        show_data = models.ShowData('_Titulo_', 'Título')
+        show_data.id = 27
+        show_data.tmdb_id = 123
+        show_data.is_movie = True
+
+        show_data_2 = models.ShowData('_Serie_', 'Série')
+        show_data_2.id = 28
+        show_data_2.is_movie = False
+
+        show_session = models.ShowSession(None, None, datetime.datetime(2020, 8, 3, 9), 76, 27)
+        show_session.id = 1
+
+        show_session_2 = models.ShowSession(1, 3, datetime.datetime(2020, 8, 2, 9), 76, 28)
+        show_session_2.id = 2
+
+        db_calls_mock.search_show_sessions_data_ids.return_value = [(show_session, channel, show_data),
+                                                                    (show_session_2, channel, show_data_2)]
+
+        # The db_calls.get_users_ids in process_alarm_events -> get_alarms_users
+        user = models.User('email', 'pasword', 'pt')
+        user.id = 933
+
+        user_2 = models.User('email2', 'pasword', 'en')
+        user_2.id = 934
+
+        db_calls_mock.get_users_ids.return_value = [user, user_2]
+
+        # The db_calls.get_shows_titles in process_alarm_events -> AlarmIndex
+        show_titles = models.ShowTitles(123, True, 'Título')
+        show_titles.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
+
+        show_titles_2 = models.ShowTitles(456, True, 'Outro')
+        show_titles_2.insertion_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=3)
+
+        db_calls_mock.get_shows_titles.return_value = [show_titles, show_titles_2]
+
+        # The db_calls.get_show_titles in process_alarm_events -> get_alarms_results -> AlarmIndex.get_titles
+        db_calls_mock.get_show_titles.reset_mock()
+        db_calls_mock.get_show_titles.return_value = show_titles
+
+        # The db_calls.get_users_excluded_channels in process_alarm_events -> get_alarms_results
+        db_calls_mock.get_users_excluded_channels.return_value = []
+
+        # The process_emails.send_alarms_emails in process_alarm_events -> send_alarms_results
+        process_emails_mock.send_alarms_emails.reset_mock()
+        process_emails_mock.send_alarms_emails.return_value = 2
+
+        # The db_calls.get_last_update in process_alarm_events
+        original_datetime = datetime.datetime(2020, 8, 1, 9)
+        last_update = models.LastUpdate(None, original_datetime)
+
+        db_calls_mock.get_last_update.return_value = last_update
+
+        db_calls_mock.delete_new_session_events.reset_mock()
+
+        # 2 - Call the function
+        processing.process_alarm_events(self.session)
+
+        db_calls_mock.get_shows_titles.return_value = []
+
+        # 3 - Verify the results
+        self.assertTrue(last_update.alarms_datetime > original_datetime)
+
+        db_calls_mock.search_show_sessions_data_ids.assert_called_with(self.session, [1, 2])
+        db_calls_mock.delete_new_session_events.assert_called_with(self.session, [10, 11])
+
+        # Only the titles of the group that matched are resolved
+        db_calls_mock.get_show_titles.assert_called_once_with(self.session, 123, True)
+
+        self.assertEqual({123, 456}, set(db_calls_mock.get_shows_titles.call_args[0][1]))
+        self.assertEqual({933, 934}, set(db_calls_mock.get_users_ids.call_args[0][1]))
+
+        emails = sorted(process_emails_mock.send_alarms_emails.call_args[0][0], key=lambda e: e[0])
+
+        self.assertEqual(2, len(emails))
+
+        self.assertEqual('email', emails[0][0])
+        self.assertEqual([1], [r.id for r in emails[0][2]])
+        self.assertEqual('ID', emails[0][2][0].match_reason)
+
+        self.assertEqual('email2', emails[1][0])
+        self.assertEqual([2], [r.id for r in emails[1][2]])
+        self.assertEqual('NAME', emails[1][2][0].match_reason)
 
     def test_process_excluded_channel_list_ok_01(self) -> None:
         """ Test the function process_excluded_channel_list without changes to the current list. """
@@ -464,13 +925,18 @@ class TestProcessing(unittest.TestCase):
         tmdb_show_3.vote_count = 25
         tmdb_show_3.id = 1274
 
-        tmdb_calls_mock.get_show_using_id.side_effect = [tmdb_show, tmdb_show_2, tmdb_show_3]
+        def get_shows_using_ids(*_, stats, **__):
+            stats.update({'cached': 1, 'requested': 2, 'failed': 0, 'seconds': 0.5})
+            return {(1234, True): tmdb_show, (6789, True): tmdb_show_2, (1274, False): tmdb_show_3}
+
+        configuration.tmdb_refresh_hours = 24
+        tmdb_calls_mock.get_shows_using_ids.side_effect = get_shows_using_ids
 
         # Calls to get the highest scored shows
-        db_calls_mock.get_highest_scored_shows_interval.side_effect = [[(189, 1234, 7)], [(46, 1274, 5.5)]]
+        db_calls_mock.get_highest_scored_shows_interval.side_effect = [[(189, 1234, 7), (46, 1274, 5.5)]]
 
         # Calls to get the new shows
-        db_calls_mock.get_new_shows_interval.side_effect = [[(55, 42, datetime.date(2021, 3, 10), 5)], []]
+        db_calls_mock.get_new_shows_interval.side_effect = [[(55, 42, datetime.date(2021, 3, 10), 5)]]
 
         # Calls to register highlights
         new_score_highlights = models.Highlights(models.HighlightsType.SCORE, 2021, 10, [189, 46], None)
@@ -480,9 +946,15 @@ class TestProcessing(unittest.TestCase):
         db_calls_mock.register_highlights.side_effect = [new_score_highlights, new_new_highlights]
 
         # Call the function
-        processing.calculate_highlights(self.session)
+        with unittest.mock.patch('processing.store_highlights_payload') as store_highlights_payload_mock:
+            processing.calculate_highlights(self.session)
 
         # Verify the calls to the mocks
+        store_highlights_payload_mock.assert_has_calls([unittest.mock.call(self.session, 2021, 10),
+                                                        unittest.mock.call(self.session, 2021, 11)])
+
+        db_calls_mock.increment_data_generation.assert_called_with(self.session)
+
         db_calls_mock.get_week_highlights.assert_has_calls(
             [unittest.mock.call(self.session, models.HighlightsType.SCORE, 2021, 10),
              unittest.mock.call(self.session, models.HighlightsType.NEW, 2021, 10),
@@ -492,37 +964,41 @@ class TestProcessing(unittest.TestCase):
         db_calls_mock.get_shows_interval.assert_called_with(self.session, datetime.datetime(2021, 3, 8),
                                                             datetime.datetime(2021, 3, 14, 23, 59, 59))
 
-        tmdb_calls_mock.get_show_using_id.assert_has_calls(
-            [unittest.mock.call(self.session, 1234, True),
-             unittest.mock.call(self.session, 6789, True),
-             unittest.mock.call(self.session, 1274, False)])
+        tmdb_calls_mock.get_shows_using_ids.assert_called_with(
+            self.session, [(1234, True), (6789, True), (1274, False)], max_age=datetime.timedelta(hours=24),
+            stats=unittest.mock.ANY)
+
+        self.assertEqual(7, show_data.tmdb_vote_average)
+        self.assertEqual(123, show_data_4.tmdb_popularity)
 
-        db_calls_mock.get_highest_scored_shows_interval.assert_has_calls(
-            [unittest.mock.call(self.session, datetime.datetime(2021, 3, 8),
-                                datetime.datetime(2021, 3, 14, 23, 59, 59), True),
-             unittest.mock.call(self.session, datetime.datetime(2021, 3, 8),
-                                datetime.datetime(2021, 3, 14, 23, 59, 59), False)])
+        db_calls_mock.get_highest_scored_shows_interval.assert_called_once_with(
+            self.session, datetime.datetime(2021, 3, 8), datetime.datetime(2021, 3, 14, 23, 59, 59))
 
-        db_calls_mock.get_new_shows_interval.assert_has_calls(
-            [unittest.mock.call(self.session, datetime.datetime(2021, 3, 15),
-                                datetime.datetime(2021, 3, 21, 23, 59, 59), True),
-             unittest.mock.call(self.session, datetime.datetime(2021, 3, 15),
-                                datetime.datetime(2021, 3, 21, 23, 59, 59), False)])
+        db_calls_mock.get_new_shows_interval.assert_called_once_with(
+            self.session, datetime.datetime(2021, 3, 15), datetime.datetime(2021, 3, 21, 23, 59, 59))
 
         db_calls_mock.register_highlights.assert_has_calls(
             [unittest.mock.call(self.session, models.HighlightsType.SCORE, 2021, 10, [189, 46]),
              unittest.mock.call(self.session, models.HighlightsType.NEW, 2021, 11, [55], [5])])
 
+        tmdb_calls_mock.get_shows_using_ids.reset_mock(side_effect=True)
+
     def test_get_response_highlights_week_ok(self) -> None:
         """ Test the function get_response_highlights_week. """
 
         # Prepare the mocks
         # Calls to get the highlights
         score_highlights = models.Highlights(models.HighlightsType.SCORE, 2021, 2, [3], None)
+        score_highlights.id = 1
+
         new_highlights = models.Highlights(models.HighlightsType.NEW, 2021, 2, [1, 2], [None, 10])
+        new_highlights.id = 2
 
         db_calls_mock.get_week_highlights.side_effect = [score_highlights, new_highlights]
 
+        # The shows of the score highlights come from HighlightShow, those of the new highlights from the legacy lists
+        db_calls_mock.get_highlights_shows.return_value = [models.HighlightShow(1, 0, 3, None)]
+
         # Calls to get the shows
         show_3 = models.ShowData("_Programa_3_", "Programa 3")
         show_3.id = 3
@@ -545,7 +1021,7 @@ class TestProcessing(unittest.TestCase):
         show_2.is_movie = False
         show_2.original_title = "Show 2"
 
-        db_calls_mock.get_show_data_id.side_effect = [show_3, show_1, show_2]
+        db_calls_mock.get_show_data_ids.return_value = [show_3, show_1, show_2]
 
         # Calls to obtain the TMDB config for each of the shows
         tmdb_show_3 = response_models.TmdbShow()
@@ -584,7 +1060,8 @@ class TestProcessing(unittest.TestCase):
         tmdb_show_2.original_language = "en"
         tmdb_show_2.match_reason = "Name"
 
-        tmdb_calls_mock.get_show_using_id.side_effect = [tmdb_show_3, tmdb_show, tmdb_show_2]
+        tmdb_calls_mock.get_shows_using_ids.return_value = {(3792, True): tmdb_show_3, (84, False): tmdb_show,
+                                                            (1111, False): tmdb_show_2}
 
         # Call the function
         actual_result = processing.get_response_highlights_week(self.session, 2021, 2)
@@ -594,15 +1071,13 @@ class TestProcessing(unittest.TestCase):
             [unittest.mock.call(self.session, models.HighlightsType.SCORE, 2021, 2),
              unittest.mock.call(self.session, models.HighlightsType.NEW, 2021, 2)])
 
-        db_calls_mock.get_show_data_id.assert_has_calls(
-            [unittest.mock.call(self.session, 3),
-             unittest.mock.call(self.session, 1),
-             unittest.mock.call(self.session, 2)])
+        db_calls_mock.get_highlights_shows.assert_called_once_with(self.session, [1, 2])
+
+        db_calls_mock.get_show_data_ids.assert_called_once_with(self.session, unittest.mock.ANY)
+        self.assertEqual({1, 2, 3}, set(db_calls_mock.get_show_data_ids.call_args[0][1]))
 
-        tmdb_calls_mock.get_show_using_id.assert_has_calls(
-            [unittest.mock.call(self.session, 3792, True),
-             unittest.mock.call(self.session, 84, False),
-             unittest.mock.call(self.session, 1111, False)])
+        tmdb_calls_mock.get_shows_using_ids.assert_called_once_with(
+            self.session, [(3792, True), (84, False), (1111, False)])
 
         # Verify the result
         self.assertEqual(2, len(actual_result))
@@ -638,3 +1113,155 @@ class TestProcessing(unittest.TestCase):
                            'season_premiere': 10, 'match_reason': 'Name'}
 
         self.assertEqual(expected_show_2, actual_result[1].show_list[1])
+
+    def test_check_login_ok_01(self) -> None:
+        """ Test the function check_login, with bcrypt running in the thread of the request. """
+
+        configuration.bcrypt_rounds = 4
+        configuration.bcrypt_workers = 0
+
+        # Prepare the mocks
+        user = models.User('email@something.com', processing.get_hash('password'), 'pt')
+        self.session.query.return_value.filter.return_value.first.return_value = user
+
+        # Call the function
+        self.assertTrue(processing.check_login(self.session, 'email@something.com', 'password'))
+        self.assertFalse(processing.check_login(self.session, 'email@something.com', 'other password'))
+
+        # Verify the result
+        self.assertEqual(0, processing.get_bcrypt_metrics()['pending'])
+
+    def test_check_login_ok_02(self) -> None:
+        """ Test the function check_login, with bcrypt running in the pool of processes. """
+
+        configuration.bcrypt_rounds = 4
+        configuration.bcrypt_workers = 1
+        configuration.bcrypt_max_pending = 2
+
+        completed = processing.get_bcrypt_metrics()['completed']
+
+        # The metrics are printed every two hashes
+        interval_patch = unittest.mock.patch('processing.BCRYPT_METRICS_INTERVAL', 2)
+        print_patch = unittest.mock.patch('processing.print_bcrypt_metrics')
+
+        with interval_patch, print_patch as print_mock:
+            # Prepare the mocks
+            user = models.User('email@something.com', processing.get_hash('password'), 'pt')
+            self.session.query.return_value.filter.return_value.first.return_value = user
+
+            # Call the function
+            self.assertTrue(processing.check_login(self.session, 'email@something.com', 'password'))
+            self.assertFalse(processing.check_login(self.session, 'email@something.com', 'other password'))
+
+            # A user that does not exist
+            self.session.query.return_value.filter.return_value.first.return_value = None
+            self.assertFalse(processing.check_login(self.session, 'other@something.com', 'password'))
+
+        # Verify the result
+        metrics = processing.get_bcrypt_metrics()
+
+        self.assertEqual(0, metrics['pending'])
+        self.assertEqual(completed + 4, metrics['completed'])
+
+        self.assertEqual(2, print_mock.call_count)
+
+        processing.bcrypt_pool.shutdown()
+        processing.bcrypt_pool = None
+
+    def test_print_bcrypt_metrics(self) -> None:
+        """ Test the function print_bcrypt_metrics, with the queue depth and the latency of the hashes. """
+
+        configuration.bcrypt_max_pending = 8
+
+        metrics = {'pending': 1, 'max_pending': 3, 'completed': 4, 'total_seconds': 1.0}
+
+        # Call the function
+        with unittest.mock.patch.dict(processing.bcrypt_metrics, metrics), \
+                unittest.mock.patch('builtins.print') as print_mock:
+            processing.print_bcrypt_metrics()
+
+        # Verify the result
+        print_mock.assert_called_once_with(
+            'Bcrypt pool: 4 hashes in 250.0 ms on average, 1 pending (maximum of 3 of 8 allowed)!')
+
+    def test_get_response_highlights_payload_ok_01(self) -> None:
+        """ Test the function get_response_highlights_payload, with the stored payload. """
+
+        # Prepare the mocks
+        db_calls_mock.get_highlights_payload.return_value = models.HighlightsPayload(2021, 2, '{}', 'etag')
+
+        # Call the function
+        with unittest.mock.patch('processing.get_response_highlights_week') as get_response_highlights_week_mock:
+            actual_result = processing.get_response_highlights_payload(self.session, 2021, 2)
+
+        # Verify the result
+        self.assertEqual(('{}', 'etag'), actual_result)
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_highlights_payload.assert_called_with(self.session, 2021, 2)
+        get_response_highlights_week_mock.assert_not_called()
+
+    def test_get_response_highlights_payload_ok_02(self) -> None:
+        """ Test the function get_response_highlights_payload, assembling the payload when it was not stored. """
+
+        # Prepare the mocks
+        db_calls_mock.get_highlights_payload.return_value = None
+
+        highlight = response_models.HighlightResponse.create_from_highlight(
+            models.Highlights(models.HighlightsType.SCORE, 2021, 2, [], None))
+        highlight.show_list.append({'show_title': 'Show 1', 'is_movie': True})
+
+        # Call the function
+        with unittest.mock.patch('processing.get_response_highlights_week', return_value=[highlight]):
+            payload, etag = processing.get_response_highlights_payload(self.session, 2021, 2)
+
+        # Verify the result
+        self.assertEqual({'highlight_list': [{'key': 'SCORE', 'year': 2021, 'week': 2,
+                                              'show_list': [{'show_title': 'Show 1', 'is_movie': True}]}]},
+                         json.loads(payload))
+
+        # The ETag depends only on the content
+        self.assertEqual(processing.serialize_highlights([highlight]), (payload, etag))
+
+    def test_migrate_highlights_shows(self) -> None:
+        """ Test the function migrate_highlights_shows. """
+
+        # Prepare the mocks
+        new_highlights = models.Highlights(models.HighlightsType.NEW, 2021, 2, [1, 2], [None, 10])
+        new_highlights.id = 2
+
+        empty_highlights = models.Highlights(models.HighlightsType.SCORE, 2021, 3, [], None)
+        empty_highlights.id = 3
+
+        # The show 4 no longer exists
+        score_highlights = models.Highlights(models.HighlightsType.SCORE, 2021, 2, [4, 3], None)
+        score_highlights.id = 4
+
+        db_calls_mock.get_highlights_without_shows.return_value = [new_highlights, empty_highlights, score_highlights]
+
+        show_data_ids = []
+
+        for show_id in [1, 2, 3]:
+            show_data = models.ShowData('Show %d' % show_id, 'Show %d' % show_id)
+            show_data.id = show_id
+
+            show_data_ids.append(show_data)
+
+        db_calls_mock.get_show_data_ids.return_value = show_data_ids
+
+        # Call the function
+        actual_result = processing.migrate_highlights_shows(self.session)
+
+        # Verify the result
+        self.assertEqual(2, actual_result)
+
+        added = [c[0][0] for c in self.session.add.call_args_list]
+
+        self.assertEqual([(2, 0, 1, None), (2, 1, 2, 10), (4, 0, 3, None)],
+                         [(h.highlight_id, h.position, h.show_id, h.season) for h in added])
+
+        # Verify the calls to the mocks
+        self.assertEqual({1, 2, 3, 4}, set(db_calls_mock.get_show_data_ids.call_args[0][1]))
+
+        db_calls_mock.commit.assert_called_with(self.session)
+
@@ -0,0 +1,265 @@
+import datetime
+import unittest.mock
+
+import globalsub
+import sqlalchemy.orm
+
+import configuration
+import db_calls
+import models
+import process_emails
+import reminder_scheduler
+import reminders
+
+# Prepare the mock variables for the modules
+db_calls_mock = unittest.mock.MagicMock()
+process_emails_mock = unittest.mock.MagicMock()
+
+
+class TestReminderScheduler(unittest.TestCase):
+    session: sqlalchemy.orm.Session
+
+    def setUp(self) -> None:
+        self.session = unittest.mock.MagicMock()
+        configuration.reminders_scheduler_refresh_seconds = 60
+
+        db_calls_mock.reset_mock()
+        process_emails_mock.reset_mock()
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        global db_calls_mock, process_emails_mock
+
+        # Replace all references to the modules with mocks
+        globalsub.subs(db_calls, db_calls_mock)
+        globalsub.subs(process_emails, process_emails_mock)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        # Replace back all references to the mocked modules
+        globalsub.restore(db_calls)
+        globalsub.restore(process_emails)
+
+    def test_get_reminder_fire_datetime(self) -> None:
+        """ Test the function get_reminder_fire_datetime, with a precision of minutes. """
+
+        # Prepare the data
+        reminder = models.Reminder(90, 1, 1)
+        show_session = models.ShowSession(None, None, datetime.datetime(2021, 3, 10, 21, 45, 30), 1, 1)
+
+        # Call the function
+        actual_result = reminder_scheduler.get_reminder_fire_datetime(reminder, show_session)
+
+        # Verify the result
+        self.assertEqual(datetime.datetime(2021, 3, 10, 20, 15), actual_result)
+
+    def test_refresh_ok(self) -> None:
+        """ Test the function ReminderScheduler.refresh, with a reminder whose session moved. """
+
+        # Prepare the mocks
+        reminder_1 = models.Reminder(60, 1, 1)
+        reminder_1.id = 1
+
+        reminder_2 = models.Reminder(120, 2, 1)
+        reminder_2.id = 2
+
+        show_session_1 = models.ShowSession(None, None, datetime.datetime(2021, 3, 10, 21), 1, 1)
+        show_session_2 = models.ShowSession(None, None, datetime.datetime(2021, 3, 10, 22), 1, 1)
+
+        db_calls_mock.get_reminders_updated.return_value = [(reminder_1, show_session_1), (reminder_2, show_session_2)]
+
+        scheduler = reminder_scheduler.ReminderScheduler()
+
+        # Call the function
+        self.assertEqual(2, scheduler.refresh(self.session))
+
+        # Verify the result
+        self.assertEqual(datetime.datetime(2021, 3, 10, 20), scheduler.get_next_fire_datetime())
+
+        # The first session moved to later
+        show_session_1_moved = models.ShowSession(None, None, datetime.datetime(2021, 3, 10, 23), 1, 1)
+        db_calls_mock.get_reminders_updated.return_value = [(reminder_1, show_session_1_moved)]
+
+        first_refresh = scheduler.last_refresh
+
+        self.assertEqual(1, scheduler.refresh(self.session))
+
+        # The outdated entry is discarded
+        self.assertEqual(datetime.datetime(2021, 3, 10, 20), scheduler.get_next_fire_datetime())
+        self.assertEqual(2, scheduler.heap[0][1])
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_reminders_updated.assert_has_calls([unittest.mock.call(self.session, None),
+                                                              unittest.mock.call(self.session, first_refresh)])
+
+    def test_get_sleep_seconds(self) -> None:
+        """ Test the function ReminderScheduler.get_sleep_seconds. """
+
+        scheduler = reminder_scheduler.ReminderScheduler()
+        now = datetime.datetime(2021, 3, 10, 20)
+
+        # Without reminders it sleeps until the next refresh
+        self.assertEqual(60, scheduler.get_sleep_seconds(now))
+
+        scheduler.fire_datetimes[1] = now + datetime.timedelta(seconds=20)
+        scheduler.heap.append((now + datetime.timedelta(seconds=20), 1))
+
+        # It sleeps until the next reminder
+        self.assertEqual(20, scheduler.get_sleep_seconds(now))
+
+        # It does not sleep if a reminder is late
+        self.assertEqual(0, scheduler.get_sleep_seconds(now + datetime.timedelta(minutes=1)))
+
+    def test_fire_due_reminders_ok_01(self) -> None:
+        """ Test the function ReminderScheduler.fire_due_reminders, without due reminders. """
+
+        scheduler = reminder_scheduler.ReminderScheduler()
+        now = datetime.datetime(2021, 3, 10, 20)
+
+        scheduler.fire_datetimes[1] = now + datetime.timedelta(minutes=5)
+        scheduler.heap.append((now + datetime.timedelta(minutes=5), 1))
+
+        # Call the function
+        self.assertEqual(0, scheduler.fire_due_reminders(self.session, now))
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_due_reminders.assert_not_called()
+        process_emails_mock.send_reminders_emails.assert_not_called()
+
+    def test_fire_due_reminders_ok_02(self) -> None:
+        """ Test the function ReminderScheduler.fire_due_reminders, with reminders of two users. """
+
+        scheduler = reminder_scheduler.ReminderScheduler()
+        now = datetime.datetime(2021, 3, 10, 20)
+
+        scheduler.fire_datetimes[1] = now
+        scheduler.fire_datetimes[2] = now
+        scheduler.fire_datetimes[3] = now
+        scheduler.heap.extend([(now, 1), (now, 2), (now, 3)])
+
+        # Prepare the mocks
+        channel = models.Channel(None, 'Channel')
+        show_data = models.ShowData('Show', 'Show')
+
+        show_session_1 = models.ShowSession(None, None, now + datetime.timedelta(hours=2), 1, 1)
+        show_session_1.id = 1
+
+        show_session_2 = models.ShowSession(None, None, now + datetime.timedelta(hours=1), 1, 1)
+        show_session_2.id = 2
+
+        user_1 = models.User('email1@something.com', 'password', 'pt')
+        user_1.id = 1
+
+        user_2 = models.User('email2@something.com', 'password', 'en')
+        user_2.id = 2
+
+        reminder_1 = models.Reminder(120, 1, 1)
+        reminder_1.id = 1
+
+        reminder_2 = models.Reminder(60, 2, 1)
+        reminder_2.id = 2
+
+        reminder_3 = models.Reminder(60, 2, 2)
+        reminder_3.id = 3
+
+        db_calls_mock.get_due_reminders.return_value = [(reminder_1, show_session_1, channel, show_data, user_1),
+                                                        (reminder_2, show_session_2, channel, show_data, user_1),
+                                                        (reminder_3, show_session_2, channel, show_data, user_2)]
+
+        # Call the function
+        self.assertEqual(3, scheduler.fire_due_reminders(self.session, now))
+
+        # Verify the result
+        self.assertIsNone(scheduler.get_next_fire_datetime())
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_due_reminders.assert_called_with(self.session, now + datetime.timedelta(minutes=1),
+                                                           reminders.MAX_ANTICIPATION_MINUTES)
+
+        emails = process_emails_mock.send_reminders_emails.call_args[0][0]
+
+        self.assertEqual(2, len(emails))
+
+        self.assertEqual('email1@something.com', emails[0][0])
+        self.assertEqual('pt', emails[0][1])
+        self.assertEqual([2, 1], [r.id for r in emails[0][2]])
+
+        self.assertEqual('email2@something.com', emails[1][0])
+        self.assertEqual([2], [r.id for r in emails[1][2]])
+
+        db_calls_mock.delete_reminders.assert_called_with(self.session, [1, 2, 3])
+
+    def test_fire_due_reminders_ok_03(self) -> None:
+        """ Test the function ReminderScheduler.fire_due_reminders, with a session whose seconds are not zero. """
+
+        # Prepare the mocks
+        channel = models.Channel(None, 'Channel')
+        show_data = models.ShowData('Show', 'Show')
+
+        show_session = models.ShowSession(None, None, datetime.datetime(2021, 3, 10, 20, 0, 30), 1, 1)
+        show_session.id = 1
+
+        user = models.User('email@something.com', 'password', 'pt')
+        user.id = 1
+
+        reminder = models.Reminder(60, 1, 1)
+        reminder.id = 1
+
+        db_calls_mock.get_reminders_updated.return_value = [(reminder, show_session)]
+        db_calls_mock.get_due_reminders.return_value = [(reminder, show_session, channel, show_data, user)]
+
+        scheduler = reminder_scheduler.ReminderScheduler()
+        scheduler.refresh(self.session)
+
+        now = datetime.datetime(2021, 3, 10, 19)
+
+        # Call the function
+        self.assertEqual(1, scheduler.fire_due_reminders(self.session, now))
+
+        # Verify the result
+        self.assertIsNone(scheduler.get_next_fire_datetime())
+
+        # Verify the calls to the mocks
+        # The reminder is due until the end of the minute, as in the heap, even though the session is at 20:00:30
+        db_calls_mock.get_due_reminders.assert_called_with(self.session, datetime.datetime(2021, 3, 10, 19, 1),
+                                                           reminders.MAX_ANTICIPATION_MINUTES)
+
+        db_calls_mock.delete_reminders.assert_called_with(self.session, [1])
+
+    def test_fire_due_reminders_error(self) -> None:
+        """ Test the function ReminderScheduler.fire_due_reminders, with an error sending the emails. """
+
+        scheduler = reminder_scheduler.ReminderScheduler()
+        now = datetime.datetime(2021, 3, 10, 20)
+
+        scheduler.fire_datetimes[1] = now
+        scheduler.heap.append((now, 1))
+
+        # Prepare the mocks
+        channel = models.Channel(None, 'Channel')
+        show_data = models.ShowData('Show', 'Show')
+
+        show_session = models.ShowSession(None, None, now + datetime.timedelta(hours=1), 1, 1)
+        show_session.id = 1
+
+        user = models.User('email@something.com', 'password', 'pt')
+        user.id = 1
+
+        reminder = models.Reminder(60, 1, 1)
+        reminder.id = 1
+
+        db_calls_mock.get_due_reminders.return_value = [(reminder, show_session, channel, show_data, user)]
+        process_emails_mock.send_reminders_emails.side_effect = Exception('Connection lost')
+
+        # Call the function
+        with self.assertRaises(Exception):
+            scheduler.fire_due_reminders(self.session, now)
+
+        process_emails_mock.send_reminders_emails.side_effect = None
+
+        # Verify the result
+        # The reminder is kept in the heap, to be fired again
+        self.assertEqual(now, scheduler.get_next_fire_datetime())
+
+        # Verify the calls to the mocks
+        db_calls_mock.delete_reminders.assert_not_called()
@@ -1,3 +1,4 @@
+import collections
 import datetime
 import unittest.mock
 
@@ -54,7 +55,7 @@ class TestReminders(unittest.TestCase):
         expected_result = []
 
         # Prepare the mocks
-        db_calls_mock.get_reminders_user.return_value = []
+        db_calls_mock.get_reminders_user_complete.return_value = []
 
         # Call the function
         actual_result = reminders.get_reminders(self.session, 1)
@@ -63,40 +64,19 @@ class TestReminders(unittest.TestCase):
         self.assertEqual(expected_result, actual_result)
 
         # Verify the calls to the mocks
-        db_calls_mock.get_reminders_user.assert_called_with(self.session, 1)
+        db_calls_mock.get_reminders_user_complete.assert_called_with(self.session, 1)
 
     def test_get_reminders_ok(self) -> None:
         """ Test the function that obtains the list of reminders of a user, with success. """
 
         # Prepare the mocks
-        reminder_1 = models.Reminder(10, 1, 1)
-        reminder_1.id = 1
-
-        reminder_2 = models.Reminder(50, 2, 1)
-        reminder_2.id = 2
-
-        db_calls_mock.get_reminders_user.return_value = [reminder_1, reminder_2]
-
-        response_reminder: response_models.Reminder = unittest.mock.MagicMock()
-        response_reminder.anticipation_minutes = 10
-
-        show_session = models.ShowSession(None, None, datetime.datetime(2020, 1, 1), 5, 10)
-        channel = models.Channel(None, 'Channel Name')
-
-        show_data = models.ShowData('_Show_Name_', 'Show Name')
-        show_data.is_movie = True
-
-        complete_session = (show_session, channel, show_data)
-
-        show_session_2 = models.ShowSession(None, None, datetime.datetime(2020, 2, 2), 15, 20)
-        channel_2 = models.Channel(None, 'Channel Name 2')
+        # The rows have the columns named after the fields of the response
+        reminder_row = collections.namedtuple('ReminderRow', ['id', 'anticipation_minutes', 'session_id', 'title',
+                                                              'season', 'episode', 'date_time', 'channel_name'])
 
-        show_data_2 = models.ShowData('_Show_Name_2_', 'Show Name 2')
-        show_data_2.is_movie = False
-
-        complete_session_2 = (show_session_2, channel_2, show_data_2)
-
-        db_calls_mock.get_show_session_complete.side_effect = [complete_session, complete_session_2]
+        db_calls_mock.get_reminders_user_complete.return_value = [
+            reminder_row(1, 10, 1, 'Show Name', None, None, datetime.datetime(2020, 1, 1), 'Channel Name'),
+            reminder_row(2, 50, 2, 'Show Name 2', 1, 2, datetime.datetime(2020, 2, 2), 'Channel Name 2')]
 
         # Call the function
         actual_result = reminders.get_reminders(self.session, 1)
@@ -115,9 +95,7 @@ class TestReminders(unittest.TestCase):
         self.assertEqual(50, actual_result[1].anticipation_minutes)
 
         # Verify the calls to the mocks
-        db_calls_mock.get_reminders_user.assert_called_with(self.session, 1)
-        db_calls_mock.get_show_session_complete.assert_has_calls(
-            [unittest.mock.call(self.session, 1), unittest.mock.call(self.session, 2)])
+        db_calls_mock.get_reminders_user_complete.assert_called_with(self.session, 1)
 
     def test_register_reminder_error_01(self) -> None:
         """ Test the function that register a reminder, with an invalid session id. """
@@ -306,13 +284,16 @@ class TestReminders(unittest.TestCase):
         """ Test the function that processes reminders, with an empty list. """
 
         # Prepare the mocks
-        db_calls_mock.get_sessions_reminders.return_value = []
+        db_calls_mock.get_due_reminders.return_value = []
+        db_calls_mock.delete_reminders.reset_mock()
 
         # Call the function
         reminders.process_reminders(self.session)
 
         # Verify the calls to the mocks
-        db_calls_mock.get_sessions_reminders.assert_called_with(self.session)
+        db_calls_mock.get_due_reminders.assert_called_with(self.session, unittest.mock.ANY,
+                                                           reminders.MAX_ANTICIPATION_MINUTES)
+        db_calls_mock.delete_reminders.assert_not_called()
 
     def test_process_reminders_ok_02(self) -> None:
         """ Test the function that processes reminders, with success. """
@@ -326,7 +307,8 @@ class TestReminders(unittest.TestCase):
         show_session_2 = models.ShowSession(2, 10, now + datetime.timedelta(minutes=100), 10, 15)
         show_session_2.id = 2
 
-        show_session_3 = models.ShowSession(None, None, now + datetime.timedelta(days=15), 10, 10)
+        # The session of this reminder is not yet within the anticipation, once rounded to the hour
+        show_session_3 = models.ShowSession(None, None, now.replace(minute=0) + datetime.timedelta(hours=3), 10, 10)
         show_session_3.id = 3
 
         channel_5 = models.Channel(None, 'Channel 5')
@@ -338,51 +320,86 @@ class TestReminders(unittest.TestCase):
         show_data_15 = models.ShowData('Show 15', 'Show 15')
         show_data_15.is_movie = False
 
+        user_1 = models.User('email1@something.com', 'password', 'pt')
+        user_2 = models.User('email2@something.com', 'password', 'en')
+        user_3 = models.User('email3@something.com', 'password', 'en')
+
         reminder_1 = models.Reminder(60, 1, 1)
-        reminder_session_1 = (reminder_1, show_session_1)
+        reminder_1.id = 1
 
         reminder_2 = models.Reminder(120, 2, 2)
-        reminder_session_2 = (reminder_2, show_session_2)
+        reminder_2.id = 2
 
         reminder_3 = models.Reminder(60, 1, 2)
-        reminder_session_3 = (reminder_3, show_session_1)
+        reminder_3.id = 3
 
-        # This session is still too far
-        reminder_4 = models.Reminder(60, 3, 3)
-        reminder_session_4 = (reminder_4, show_session_3)
+        reminder_4 = models.Reminder(119, 3, 3)
+        reminder_4.id = 4
 
-        db_calls_mock.get_sessions_reminders.return_value = [reminder_session_1, reminder_session_2, reminder_session_3,
-                                                             reminder_session_4]
+        db_calls_mock.get_due_reminders.return_value = [
+            (reminder_1, show_session_1, channel_5, show_data_10, user_1),
+            (reminder_2, show_session_2, channel_10, show_data_15, user_2),
+            (reminder_3, show_session_1, channel_5, show_data_10, user_2),
+            (reminder_4, show_session_3, channel_10, show_data_10, user_3)]
 
-        show_session_tuple_1 = (show_session_1, channel_5, show_data_10)
-        show_session_tuple_2 = (show_session_2, channel_10, show_data_15)
-        show_session_tuple_3 = (show_session_1, channel_5, show_data_10)
+        process_emails_mock.send_reminders_email.reset_mock()
+        process_emails_mock.send_reminders_email.return_value = True
 
-        db_calls_mock.get_show_session_complete.side_effect = [show_session_tuple_1, show_session_tuple_2,
-                                                               show_session_tuple_3]
-
-        db_calls_mock.get_user_id.side_effect = [models.User('email1@something.com', 'password', 'pt'),
-                                                 models.User('email2@something.com', 'password', 'en'),
-                                                 models.User('email2@something.com', 'password', 'en')]
-
-        process_emails_mock.send_alarms_email.side_effect = [True, True, True]
+        db_calls_mock.delete_reminders.reset_mock()
 
         # Call the function
         reminders.process_reminders(self.session)
 
         # Verify the calls to the mocks
-        db_calls_mock.get_sessions_reminders.assert_has_calls(self.session)
+        db_calls_mock.get_due_reminders.assert_called_with(self.session, unittest.mock.ANY,
+                                                           reminders.MAX_ANTICIPATION_MINUTES)
 
-        db_calls_mock.get_show_session_complete.assert_has_calls([unittest.mock.call(self.session, 1),
-                                                                  unittest.mock.call(self.session, 2),
-                                                                  unittest.mock.call(self.session, 1)])
+        send_reminders_email_calls = process_emails_mock.send_reminders_email.call_args_list
 
-        db_calls_mock.get_user_id.assert_has_calls([unittest.mock.call(self.session, 1),
-                                                    unittest.mock.call(self.session, 2),
-                                                    unittest.mock.call(self.session, 2)])
+        self.assertEqual(3, len(send_reminders_email_calls))
+        self.assertEqual(('email1@something.com', 'pt'), send_reminders_email_calls[0][0][:2])
+        self.assertEqual('en', send_reminders_email_calls[1][0][1])
+        self.assertEqual('Show 15', send_reminders_email_calls[1][0][2][0].show_name)
+        self.assertEqual(('email2@something.com', 'en'), send_reminders_email_calls[2][0][:2])
 
-        process_emails_mock.set_language.assert_has_calls([unittest.mock.call('pt'), unittest.mock.call('en'),
-                                                           unittest.mock.call('en')])
+        # The fired reminders are deleted at once
+        db_calls_mock.delete_reminders.assert_called_once_with(self.session, [1, 2, 3])
 
-        # Given that it can't compare the object sent in the email
-        self.assertEqual(3, process_emails_mock.send_reminders_email.call_count)
+    def test_process_reminders_error(self) -> None:
+        """ Test the function that processes reminders, with an error sending one of the emails. """
+
+        # Prepare the mocks
+        now = datetime.datetime.utcnow()
+
+        show_session = models.ShowSession(None, None, now + datetime.timedelta(minutes=30), 5, 10)
+        show_session.id = 1
+
+        channel = models.Channel(None, 'Channel 5')
+        show_data = models.ShowData('Show 10', 'Show 10')
+
+        user_1 = models.User('email1@something.com', 'password', 'pt')
+        user_2 = models.User('email2@something.com', 'password', 'en')
+
+        reminder_1 = models.Reminder(60, 1, 1)
+        reminder_1.id = 1
+
+        reminder_2 = models.Reminder(60, 1, 2)
+        reminder_2.id = 2
+
+        db_calls_mock.get_due_reminders.return_value = [(reminder_1, show_session, channel, show_data, user_1),
+                                                        (reminder_2, show_session, channel, show_data, user_2)]
+
+        process_emails_mock.send_reminders_email.reset_mock()
+        process_emails_mock.send_reminders_email.side_effect = [True, Exception('Connection lost')]
+
+        db_calls_mock.delete_reminders.reset_mock()
+
+        # Call the function
+        with self.assertRaises(Exception):
+            reminders.process_reminders(self.session)
+
+        process_emails_mock.send_reminders_email.side_effect = None
+
+        # Verify the calls to the mocks
+        # The reminder already sent is deleted, so that it is not sent again
+        db_calls_mock.delete_reminders.assert_called_once_with(self.session, [1])
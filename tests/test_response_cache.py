@@ -0,0 +1,82 @@
+import gzip
+import unittest.mock
+
+import compression
+import configuration
+import response_cache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        configuration.response_cache_size = 2
+        configuration.compression_level = 6
+
+        response_cache.responses.clear()
+
+    def test_get_response_ok(self) -> None:
+        """ Test the function get_response, with a response of the current generation of the data. """
+
+        etag = response_cache.store_response(('channels',), 3, '[1, 2]')
+
+        # Call the function
+        actual_result = response_cache.get_response(('channels',), 3)
+
+        # Verify the result
+        self.assertEqual(('[1, 2]', etag), actual_result)
+        self.assertEqual(response_cache.get_etag('[1, 2]'), etag)
+
+    def test_get_response_generation(self) -> None:
+        """ Test the function get_response, with a response built before the data changed. """
+
+        response_cache.store_response(('channels',), 3, '[1, 2]')
+
+        # Call the function
+        actual_result = response_cache.get_response(('channels',), 4)
+
+        # Verify the result
+        self.assertIsNone(actual_result)
+        self.assertEqual(0, len(response_cache.responses))
+
+    def test_store_response_eviction(self) -> None:
+        """ Test the function store_response, evicting the least recently used response. """
+
+        response_cache.store_response(('highlights', 2021, 10), 1, '{}')
+        response_cache.store_response(('highlights', 2021, 11), 1, '{}')
+
+        # Use the first response, so that the second one is the least recently used
+        self.assertIsNotNone(response_cache.get_response(('highlights', 2021, 10), 1))
+
+        # Call the function
+        response_cache.store_response(('channels',), 1, '[]')
+
+        # Verify the result
+        self.assertEqual([('highlights', 2021, 10), ('channels',)], list(response_cache.responses.keys()))
+
+    def test_store_response_disabled(self) -> None:
+        """ Test the function store_response, with the cache disabled. """
+
+        configuration.response_cache_size = 0
+
+        # Call the function
+        etag = response_cache.store_response(('channels',), 1, '[]')
+
+        # Verify the result
+        self.assertEqual(response_cache.get_etag('[]'), etag)
+        self.assertIsNone(response_cache.get_response(('channels',), 1))
+
+    def test_get_compressed_response(self) -> None:
+        """ Test the function get_compressed_response, compressing the response only once. """
+
+        response_cache.store_response(('channels',), 1, '[1, 2, 3]')
+
+        # Call the function
+        with unittest.mock.patch('compression.compress', wraps=compression.compress) as compress_mock:
+            actual_result = response_cache.get_compressed_response(('channels',), 1, 'gzip')
+            self.assertEqual(actual_result, response_cache.get_compressed_response(('channels',), 1, 'gzip'))
+
+        # Verify the result
+        self.assertEqual(b'[1, 2, 3]', gzip.decompress(actual_result))
+        self.assertIsNone(response_cache.get_compressed_response(('channels',), 2, 'gzip'))
+
+        # Verify the calls to the mocks
+        compress_mock.assert_called_once_with(b'[1, 2, 3]', 'gzip')
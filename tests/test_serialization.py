@@ -0,0 +1,92 @@
+import datetime
+import json
+import unittest.mock
+
+import flask
+
+import auxiliary
+import models
+import response_models
+import serialization
+
+
+class TestSerialization(unittest.TestCase):
+    app: flask.Flask
+
+    def setUp(self) -> None:
+        self.app = flask.Flask(__name__)
+
+    def get_response_objects(self) -> dict:
+        """
+        Get a response with one object of each type encoded directly.
+
+        :return: the response.
+        """
+
+        local_show_result = response_models.LocalShowResult.create_from_show_session(
+            models.ShowSession(2, 5, datetime.datetime(2021, 3, 10, 21, 45), 1, 1),
+            models.Channel('TC', 'Canal Ção'), models.ShowData('show', 'Show'))
+        local_show_result.match_reason = 'Name'
+
+        reminder_row = unittest.mock.MagicMock()
+        reminder_row.configure_mock(id=1, anticipation_minutes=60, session_id=2, title='Show', season=2, episode=5,
+                                    date_time=datetime.datetime(2021, 3, 10, 21, 45), channel_name='Canal')
+
+        db_alarm = models.Alarm('Show', 123, True, response_models.AlarmType.DB.value, None, None, 1)
+        db_alarm.id = 3
+
+        highlight = response_models.HighlightResponse.create_from_highlight(
+            models.Highlights(models.HighlightsType.SCORE, 2021, 10, [1], None))
+        highlight.show_list.append({'show_title': 'Show', 'vote_average': 7.5})
+
+        return {'show_list': [local_show_result], 'reminder_list': [response_models.Reminder(reminder_row)],
+                'alarm_list': [response_models.Alarm(db_alarm, ['Show'])], 'highlight_list': [highlight],
+                'show': {'premiere_date': datetime.date(2021, 3, 10)}}
+
+    def get_flask_result(self, response: dict) -> dict:
+        """
+        Get the result of serializing a response as it was done with to_dict and Flask.
+
+        :param response: the response.
+        :return: the parsed JSON.
+        """
+
+        converted_response = {k: auxiliary.list_to_json(v) if isinstance(v, list) else v for k, v in response.items()}
+
+        with self.app.app_context():
+            return json.loads(flask.json.dumps(converted_response))
+
+    def test_dumps_ok(self) -> None:
+        """ Test the function dumps, with the same result as Flask. """
+
+        response = self.get_response_objects()
+
+        # Call the function
+        actual_result = serialization.dumps(response)
+
+        # Verify the result
+        self.assertEqual(self.get_flask_result(response), json.loads(actual_result))
+        self.assertIn('"date_time":"2021-03-10T21:45:00"', actual_result)
+        self.assertIn('"date_time":"Wed, 10 Mar 2021 21:45:00 GMT"', actual_result)
+
+    def test_dumps_without_orjson(self) -> None:
+        """ Test the function dumps, with the json module, when orjson is not installed. """
+
+        response = self.get_response_objects()
+
+        # Call the function
+        with unittest.mock.patch('serialization.orjson', None):
+            actual_result = serialization.dumps(response, sort_keys=True)
+
+        # Verify the result
+        self.assertEqual(self.get_flask_result(response), json.loads(actual_result))
+        self.assertTrue(actual_result.startswith('{"alarm_list":[{"alarm_type":"DB",'))
+
+        if serialization.orjson is not None:
+            self.assertEqual(serialization.dumps(response, sort_keys=True), actual_result)
+
+    def test_dumps_error(self) -> None:
+        """ Test the function dumps, with an object that can not be serialized. """
+
+        with self.assertRaises(TypeError):
+            serialization.dumps({'value': object()})
@@ -1,5 +1,7 @@
+import datetime
 import os
 import unittest.mock
+import urllib.error
 import urllib.request
 
 import globalsub
@@ -43,6 +45,10 @@ class TestTmdbCalls(unittest.TestCase):
     def setUp(self) -> None:
         self.session = unittest.mock.MagicMock()
 
+        configuration_mock.tmdb_workers = 8
+        configuration_mock.tmdb_requests_per_second = 0
+        tmdb_calls.rate_limiter = None
+
     def test_get_show_using_id_01(self):
         """ Test get_show_using_id with no valid cache. """
 
@@ -93,3 +99,104 @@ class TestTmdbCalls(unittest.TestCase):
 
         external_request_mock.Request.assert_called_with('https://api.themoviedb.org/3/tv/74806?api_key=tmdb_key')
         external_request_mock.urlopen.assert_called_with('the request')
+
+    def test_get_shows_using_ids(self):
+        """ Test get_shows_using_ids with a show in the cache, a show requested and a request that fails. """
+
+        # Prepare the calls to the mocks
+        configuration_mock.tmdb_key = 'tmdb_key'
+
+        db_calls_mock.reset_mock()
+        external_request_mock.reset_mock()
+
+        tmdb_response_file = open(base_path + "data/tmdb_show_74806.json", "r")
+        tmdb_response = tmdb_response_file.read().encode()
+        tmdb_response_file.close()
+
+        # Prepare the call to read the cache
+        cache_entry = unittest.mock.MagicMock()
+        cache_entry.result = tmdb_response.decode("utf-8")
+
+        db_calls_mock.get_caches.return_value = {'tmdb|id|tv-None-1': cache_entry}
+
+        # Prepare the calls to TMDB
+        def urlopen(request):
+            if request.endswith('/3?api_key=tmdb_key'):
+                raise urllib.error.HTTPError(request, 404, 'Not Found', None, None)
+
+            http_response = unittest.mock.MagicMock()
+            http_response.read.return_value = tmdb_response
+
+            return http_response
+
+        external_request_mock.Request.side_effect = lambda url: url
+        external_request_mock.urlopen.side_effect = urlopen
+
+        # Call the function
+        actual_result = tmdb_calls.get_shows_using_ids(self.session, [(1, False), (2, False), (3, False), (1, False)])
+
+        # Verify the result
+        self.assertEqual(3, len(actual_result))
+        self.assertEqual(74806, actual_result[(1, False)].id)
+        self.assertEqual(74806, actual_result[(2, False)].id)
+        self.assertIsNone(actual_result[(3, False)])
+
+        # Verify the calls to the mocks
+        db_calls_mock.get_caches.assert_called_with(self.session, ['tmdb|id|tv-None-1', 'tmdb|id|tv-None-2',
+                                                                   'tmdb|id|tv-None-3'])
+
+        self.assertEqual(2, external_request_mock.urlopen.call_count)
+
+        db_calls_mock.register_cache.assert_called_once_with(self.session, 'tmdb|id|tv-None-2',
+                                                             tmdb_response.decode("utf-8"))
+
+        external_request_mock.Request.side_effect = None
+        external_request_mock.urlopen.side_effect = None
+
+    def test_get_shows_using_ids_refresh(self):
+        """ Test get_shows_using_ids with a cached show older than the maximum age. """
+
+        # Prepare the calls to the mocks
+        configuration_mock.tmdb_key = 'tmdb_key'
+
+        db_calls_mock.reset_mock()
+        external_request_mock.reset_mock()
+
+        tmdb_response_file = open(base_path + "data/tmdb_show_74806.json", "r")
+        tmdb_response = tmdb_response_file.read().encode()
+        tmdb_response_file.close()
+
+        # Prepare the call to read the cache
+        recent_entry = unittest.mock.MagicMock()
+        recent_entry.result = tmdb_response.decode("utf-8")
+        recent_entry.date_time = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+
+        old_entry = unittest.mock.MagicMock()
+        old_entry.result = tmdb_response.decode("utf-8")
+        old_entry.date_time = datetime.datetime.utcnow() - datetime.timedelta(hours=30)
+
+        db_calls_mock.get_caches.return_value = {'tmdb|id|tv-None-1': recent_entry, 'tmdb|id|tv-None-2': old_entry}
+
+        # Prepare the call to TMDB
+        http_response = unittest.mock.MagicMock()
+        http_response.read.return_value = tmdb_response
+
+        external_request_mock.urlopen.return_value = http_response
+
+        stats = dict()
+
+        # Call the function
+        actual_result = tmdb_calls.get_shows_using_ids(self.session, [(1, False), (2, False)],
+                                                       max_age=datetime.timedelta(hours=24), stats=stats)
+
+        # Verify the result
+        self.assertEqual(74806, actual_result[(1, False)].id)
+        self.assertEqual(74806, actual_result[(2, False)].id)
+        self.assertEqual({'cached': 1, 'requested': 1, 'failed': 0}, {k: stats[k] for k in ['cached', 'requested',
+                                                                                           'failed']})
+
+        # Verify the calls to the mocks
+        self.assertEqual(1, external_request_mock.urlopen.call_count)
+
+        db_calls_mock.update_cache.assert_called_once_with(self.session, old_entry, tmdb_response.decode("utf-8"))
+        db_calls_mock.register_cache.assert_not_called()
@@ -1,15 +1,24 @@
+import concurrent.futures
+import datetime
 import json
+import threading
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict, Union
 
 import sqlalchemy.orm
 
+import auxiliary
 import configuration
 import db_calls
 from response_models import TmdbShow, TmdbTranslation, TmdbAlias, TmdbCrewMember
 
+# The rate limiter shared by all the requests of the shows, created on first use
+rate_limiter: Optional[auxiliary.TokenBucket] = None
+rate_limiter_lock = threading.Lock()
+
 
 def search_shows_by_text(session: sqlalchemy.orm.Session, search_text: str, language: str = None, is_movie: bool = None,
                          page: int = 1, show_adult: bool = False, year: int = None) -> Tuple[int, List[TmdbShow]]:
@@ -94,16 +103,49 @@ def search_shows_by_text(session: sqlalchemy.orm.Session, search_text: str, lang
     return response_dict['total_pages'], tmdb_shows
 
 
-def get_show_using_id(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: bool, language: str = None) \
-        -> Optional[TmdbShow]:
+def get_show_cache_key(tmdb_id: int, is_movie: bool, language: str = None) -> str:
     """
-    Get a show's information, from TMDB.
+    Get the key of the cache for a show's information.
 
-    :param session: the db session.
     :param tmdb_id: the tmdb id of the show.
     :param is_movie: if the show is a movie.
     :param language: the language in which we want the response (pt-PT, en-US...).
-    :return: the TmdbShow.
+    :return: the key of the cache.
+    """
+
+    if is_movie:
+        show_type = 'movie'
+    else:
+        show_type = 'tv'
+
+    return 'tmdb|id|%s-%s-%s' % (show_type, language, tmdb_id)
+
+
+def get_rate_limiter() -> auxiliary.TokenBucket:
+    """
+    Get the rate limiter of the requests to TMDB, creating it if needed.
+
+    :return: the rate limiter.
+    """
+
+    global rate_limiter
+
+    with rate_limiter_lock:
+        if rate_limiter is None:
+            rate = configuration.tmdb_requests_per_second
+            rate_limiter = auxiliary.TokenBucket(rate, max(1.0, rate))
+
+        return rate_limiter
+
+
+def request_show(tmdb_id: int, is_movie: bool, language: str = None) -> Optional[bytes]:
+    """
+    Request a show's information to TMDB, without using the cache.
+
+    :param tmdb_id: the tmdb id of the show.
+    :param is_movie: if the show is a movie.
+    :param language: the language in which we want the response (pt-PT, en-US...).
+    :return: the response, or None when the request fails.
     """
 
     if is_movie:
@@ -111,7 +153,53 @@ def get_show_using_id(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: b
     else:
         show_type = 'tv'
 
-    cache_key = 'tmdb|id|%s-%s-%s' % (show_type, language, tmdb_id)
+    url = 'https://api.themoviedb.org/3/%s/%s?api_key=%s' % (show_type, tmdb_id, configuration.tmdb_key)
+
+    if language is not None:
+        url += '&language=%s' % language
+
+    show_request = urllib.request.Request(url)
+
+    # Stay within the limits of TMDB, even with concurrent requests
+    get_rate_limiter().acquire()
+
+    try:
+        return urllib.request.urlopen(show_request).read()
+    except urllib.error.HTTPError:
+        return None
+
+
+def parse_show(response: Union[str, bytes], is_movie: bool) -> TmdbShow:
+    """
+    Parse a show's information, from the response of TMDB.
+
+    :param response: the response.
+    :param is_movie: if the show is a movie.
+    :return: the TmdbShow.
+    """
+
+    # Parse the response to json
+    response_dict = json.loads(response)
+
+    tmdb_show = TmdbShow()
+    tmdb_show.fill_from_dict(response_dict, is_movie)
+
+    return tmdb_show
+
+
+def get_show_using_id(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: bool, language: str = None) \
+        -> Optional[TmdbShow]:
+    """
+    Get a show's information, from TMDB.
+
+    :param session: the db session.
+    :param tmdb_id: the tmdb id of the show.
+    :param is_movie: if the show is a movie.
+    :param language: the language in which we want the response (pt-PT, en-US...).
+    :return: the TmdbShow.
+    """
+
+    cache_key = get_show_cache_key(tmdb_id, is_movie, language)
 
     cache_entry = db_calls.get_cache(session, cache_key)
 
@@ -120,28 +208,90 @@ def get_show_using_id(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: b
         response = cache_entry.result
     else:
         # Make the request
-        url = 'https://api.themoviedb.org/3/%s/%s?api_key=%s' % (show_type, tmdb_id, configuration.tmdb_key)
+        response = request_show(tmdb_id, is_movie, language)
 
-        if language is not None:
-            url += '&language=%s' % language
-
-        show_request = urllib.request.Request(url)
-
-        try:
-            response = urllib.request.urlopen(show_request).read()
-        except urllib.error.HTTPError:
+        if response is None:
             return None
 
         # Save the result in the cache
         db_calls.register_cache(session, cache_key, response.decode("utf-8"))
 
-    # Parse the response to json
-    response_dict = json.loads(response)
+    return parse_show(response, is_movie)
 
-    tmdb_show = TmdbShow()
-    tmdb_show.fill_from_dict(response_dict, is_movie)
 
-    return tmdb_show
+def get_shows_using_ids(session: sqlalchemy.orm.Session, shows: List[Tuple[int, bool]], language: str = None,
+                        max_age: datetime.timedelta = None, stats: Dict[str, float] = None) \
+        -> Dict[Tuple[int, bool], Optional[TmdbShow]]:
+    """
+    Get the information of multiple shows, from TMDB.
+    The cache is read with a single query and the shows missing from it are requested concurrently, within the rate
+    limit.
+
+    :param session: the db session.
+    :param shows: the list of shows, each as a tuple with the tmdb id and whether it is a movie.
+    :param language: the language in which we want the response (pt-PT, en-US...).
+    :param max_age: the age after which the cached information is requested again, if any.
+    :param stats: a dictionary filled with the number of shows cached, requested and failed, and the seconds taken.
+    :return: the TmdbShow of each show, or None when it could not be obtained.
+    """
+
+    start_time = time.monotonic()
+
+    shows = list(dict.fromkeys(shows))
+    cache_keys = {show: get_show_cache_key(show[0], show[1], language) for show in shows}
+
+    cache_entries = db_calls.get_caches(session, list(cache_keys.values()))
+
+    if max_age is not None:
+        refresh_datetime = datetime.datetime.utcnow() - max_age
+    else:
+        refresh_datetime = None
+
+    responses = dict()
+    missing_shows = []
+
+    for show in shows:
+        cache_entry = cache_entries.get(cache_keys[show])
+
+        if cache_entry is not None:
+            responses[show] = cache_entry.result
+
+            # Request the information again if it is too old, keeping the cached version if that fails
+            if refresh_datetime is not None and cache_entry.date_time < refresh_datetime:
+                missing_shows.append(show)
+        else:
+            missing_shows.append(show)
+
+    nb_failed = 0
+
+    # Make the requests, which don't use the session, in parallel
+    if len(missing_shows) > 0:
+        with concurrent.futures.ThreadPoolExecutor(max(1, min(configuration.tmdb_workers, len(missing_shows)))) \
+                as executor:
+            missing_responses = list(executor.map(lambda s: request_show(s[0], s[1], language), missing_shows))
+
+        for show, response in zip(missing_shows, missing_responses):
+            if response is None:
+                nb_failed += 1
+                continue
+
+            # Save the result in the cache
+            cache_entry = cache_entries.get(cache_keys[show])
+
+            if cache_entry is not None:
+                db_calls.update_cache(session, cache_entry, response.decode("utf-8"))
+            else:
+                db_calls.register_cache(session, cache_keys[show], response.decode("utf-8"))
+
+            responses[show] = response
+
+    if stats is not None:
+        stats['cached'] = len(shows) - len(missing_shows)
+        stats['requested'] = len(missing_shows)
+        stats['failed'] = nb_failed
+        stats['seconds'] = time.monotonic() - start_time
+
+    return {show: parse_show(responses[show], show[1]) if show in responses else None for show in shows}
 
 
 def get_show_translations(session: sqlalchemy.orm.Session, tmdb_id: int, is_movie: bool) \
@@ -44,6 +44,9 @@ def insert_file_data(db_session: sqlalchemy.orm.Session, channel_set: int, filen
         print('%4d show sessions deleted!' % result.nb_deleted_sessions)
         print('%4d new shows!' % result.nb_new_shows)
 
+        # Discard the cached responses with the shows
+        db_calls.increment_data_generation(db_session)
+
 
 def insert_file_data_submenu(db_session: sqlalchemy.orm.Session):
     """